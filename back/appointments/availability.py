@@ -0,0 +1,326 @@
+"""
+Motor de disponibilidad para la agenda de los psicólogos.
+
+Cada día se representa como una máscara de 1440 bits (un bit por minuto):
+los bloques horarios (``Schedule``) encienden bits y las citas que ocupan
+agenda (``Appointment``), ampliadas con el margen entre sesiones, los apagan.
+Los inicios válidos para una sesión de N minutos salen de intersectar la
+máscara libre consigo misma desplazada, así que el costo no depende de la
+duración de la sesión ni del paso entre horarios. El listado de horarios y la
+validación de una reserva usan las mismas máscaras, por lo que no pueden
+contradecirse.
+"""
+from collections import defaultdict
+from itertools import islice
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from profiles.models import PsychologistProfile
+from schedules.models import Schedule
+from .models import Appointment, AvailabilitySummary
+
+# Estados de cita que ocupan el horario del psicólogo
+BLOCKING_STATUSES = ['PAYMENT_VERIFIED', 'CONFIRMED', 'PAYMENT_UPLOADED']
+
+# Índice de date.weekday() -> valor de Schedule.day_of_week
+WEEKDAYS = ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']
+WEEKDAY_INDEX = {name: index for index, name in enumerate(WEEKDAYS)}
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_SESSION_MINUTES = 60
+
+# Campos de PsychologistProfile que configuran la agenda
+CONFIG_FIELDS = ('session_length_minutes', 'slot_step_minutes', 'buffer_minutes')
+
+# Días hacia adelante en los que se busca el próximo horario libre del resumen
+SUMMARY_HORIZON_DAYS = 60
+
+
+def to_minutes(value):
+    """Convierte un ``datetime.time`` en minutos desde la medianoche."""
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    """Convierte minutos desde la medianoche en ``datetime.time``."""
+    return time(minutes // 60, minutes % 60)
+
+
+def interval_mask(start, end):
+    """Máscara con los minutos ``[start, end)`` encendidos, recortada al día."""
+    start, end = max(start, 0), min(end, MINUTES_PER_DAY)
+    if start >= end:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def run_starts(mask, length):
+    """
+    Bits ``i`` de ``mask`` tales que los minutos ``i .. i + length - 1`` están
+    todos encendidos. Usa O(log length) operaciones sobre la máscara completa.
+    """
+    covered = 1
+    while covered < length and mask:
+        shift = min(covered, length - covered)
+        mask &= mask >> shift
+        covered += shift
+    return mask
+
+
+def iter_bits(mask):
+    """Posiciones de los bits encendidos, de menor a mayor."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def _floor_mask(date, not_before):
+    """Máscara de los minutos de ``date`` que no son anteriores a ``not_before``."""
+    if not_before is None or date > not_before.date():
+        return -1
+    if date < not_before.date():
+        return 0
+    return ~((1 << (not_before.hour * 60 + not_before.minute)) - 1)
+
+
+class AvailabilityEngine:
+    """
+    Calcula los horarios libres de un psicólogo.
+
+    - ``schedules``: iterable de tuplas ``(day_of_week, start_time, end_time)``.
+    - ``appointments``: iterable de tuplas ``(date, start_time, end_time)`` con
+      las citas que bloquean agenda.
+    - ``session_minutes``: duración de cada sesión.
+    - ``step_minutes``: distancia entre inicios de horario, contada desde el
+      inicio de cada bloque (por defecto, la duración de la sesión).
+    - ``buffer_minutes``: margen libre exigido antes y después de cada cita.
+    """
+
+    def __init__(self, schedules, appointments, session_minutes=DEFAULT_SESSION_MINUTES,
+                 step_minutes=None, buffer_minutes=0):
+        self.session_minutes = session_minutes or DEFAULT_SESSION_MINUTES
+        self.step_minutes = step_minutes or self.session_minutes
+        self.buffer_minutes = buffer_minutes or 0
+
+        # Por día de la semana: minutos de horario y minutos donde puede empezar una sesión
+        self._schedule = defaultdict(int)
+        self._candidates = defaultdict(int)
+        for day_of_week, start_time, end_time in schedules:
+            weekday = WEEKDAY_INDEX.get(day_of_week)
+            start, end = to_minutes(start_time), to_minutes(end_time)
+            if weekday is None or start >= end:
+                continue
+            self._schedule[weekday] |= interval_mask(start, end)
+            for minute in range(start, end, self.step_minutes):
+                self._candidates[weekday] |= 1 << minute
+
+        # Por fecha: minutos ocupados, incluyendo el margen alrededor de cada cita
+        self._booked = defaultdict(int)
+        for date, start_time, end_time in appointments:
+            self._booked[date] |= interval_mask(
+                to_minutes(start_time) - self.buffer_minutes,
+                to_minutes(end_time) + self.buffer_minutes
+            )
+
+    @classmethod
+    def config_for(cls, psychologist):
+        """Parámetros de agenda configurados en el perfil del psicólogo."""
+        return {
+            'session_minutes': psychologist.session_length_minutes,
+            'step_minutes': psychologist.slot_step_minutes,
+            'buffer_minutes': psychologist.buffer_minutes,
+        }
+
+    @classmethod
+    def for_psychologist(cls, psychologist, start_date, end_date, **kwargs):
+        """Construye el motor para un psicólogo con dos consultas."""
+        schedules = Schedule.objects.filter(
+            psychologist=psychologist
+        ).values_list('day_of_week', 'start_time', 'end_time')
+        appointments = Appointment.objects.filter(
+            psychologist=psychologist,
+            date__gte=start_date,
+            date__lte=end_date,
+            status__in=BLOCKING_STATUSES
+        ).values_list('date', 'start_time', 'end_time')
+        return cls(schedules, appointments, **{**cls.config_for(psychologist), **kwargs})
+
+    @classmethod
+    def for_psychologists(cls, psychologist_ids, start_date, end_date, verified_only=True):
+        """
+        Construye un motor por psicólogo con dos consultas en total (por defecto
+        solo psicólogos verificados). Devuelve ``{psychologist_id: AvailabilityEngine}``;
+        los psicólogos sin horario no aparecen.
+        """
+        schedule_rows = Schedule.objects.filter(psychologist_id__in=psychologist_ids)
+        if verified_only:
+            schedule_rows = schedule_rows.filter(psychologist__verification_status='VERIFIED')
+
+        # La configuración de agenda viaja en la misma consulta de horarios
+        schedules = defaultdict(list)
+        configs = {}
+        for psychologist_id, session, step, buffer, *row in schedule_rows.values_list(
+            'psychologist_id', *(f'psychologist__{field}' for field in CONFIG_FIELDS),
+            'day_of_week', 'start_time', 'end_time'
+        ):
+            schedules[psychologist_id].append(row)
+            configs[psychologist_id] = {
+                'session_minutes': session, 'step_minutes': step, 'buffer_minutes': buffer
+            }
+
+        # Sin horario no hay disponibilidad: solo se buscan citas de quien lo tiene
+        appointments = defaultdict(list)
+        if schedules:
+            for psychologist_id, *row in Appointment.objects.filter(
+                psychologist_id__in=list(schedules),
+                date__gte=start_date,
+                date__lte=end_date,
+                status__in=BLOCKING_STATUSES
+            ).values_list('psychologist_id', 'date', 'start_time', 'end_time'):
+                appointments[psychologist_id].append(row)
+
+        return {
+            psychologist_id: cls(rows, appointments[psychologist_id], **configs[psychologist_id])
+            for psychologist_id, rows in schedules.items()
+        }
+
+    def free_mask(self, date):
+        """Minutos de horario de ``date`` que no están ocupados."""
+        return self._schedule.get(date.weekday(), 0) & ~self._booked.get(date, 0)
+
+    def slot_mask(self, date):
+        """Minutos de ``date`` en los que puede empezar una sesión completa."""
+        candidates = self._candidates.get(date.weekday(), 0)
+        if not candidates:
+            return 0
+        return run_starts(self.free_mask(date), self.session_minutes) & candidates
+
+    def slot_conflict(self, date, start_minutes, end_minutes):
+        """
+        Motivo por el que no se puede reservar ``[start, end)`` en ``date``:
+        ``None`` si es un horario libre, ``'schedule'`` si no corresponde a un
+        horario del psicólogo y ``'booked'`` si se cruza con otra cita.
+        """
+        if end_minutes - start_minutes != self.session_minutes or not 0 <= start_minutes < MINUTES_PER_DAY:
+            return 'schedule'
+        bit = 1 << start_minutes
+        if self.slot_mask(date) & bit:
+            return None
+        weekday = date.weekday()
+        schedule_slots = run_starts(self._schedule.get(weekday, 0), self.session_minutes)
+        if schedule_slots & self._candidates.get(weekday, 0) & bit:
+            return 'booked'
+        return 'schedule'
+
+    def is_bookable(self, date, start_minutes, end_minutes):
+        return self.slot_conflict(date, start_minutes, end_minutes) is None
+
+    def is_booked(self, date, start_minutes, end_minutes):
+        """Indica si ``[start, end)`` se cruza con una cita o con su margen."""
+        return bool(self._booked.get(date, 0) & interval_mask(start_minutes, end_minutes))
+
+    def iter_free_slots(self, start_date, end_date, not_before=None):
+        """
+        Genera tuplas ``(date, start_minutes, end_minutes)`` en orden cronológico.
+        Con ``not_before`` (datetime) se omiten los horarios que ya empezaron.
+        """
+        current_date = start_date
+        while current_date <= end_date:
+            slots = self.slot_mask(current_date) & _floor_mask(current_date, not_before)
+            for start in iter_bits(slots):
+                yield current_date, start, start + self.session_minutes
+            current_date += timedelta(days=1)
+
+    def free_minutes(self, start_date, end_date, not_before=None):
+        """
+        Minutos de horario sin citas (ni su margen) en el rango, desde
+        ``not_before`` si se indica.
+        """
+        total = 0
+        current_date = start_date
+        while current_date <= end_date:
+            total += bin(self.free_mask(current_date) & _floor_mask(current_date, not_before)).count('1')
+            current_date += timedelta(days=1)
+        return total
+
+    def next_slots(self, start_date, end_date, limit, not_before=None):
+        """Primeros ``limit`` horarios libres del rango, sin agrupar por día."""
+        return [
+            {
+                "date": date.strftime('%Y-%m-%d'),
+                "start_time": to_time(start).strftime('%H:%M'),
+                "end_time": to_time(end).strftime('%H:%M')
+            }
+            for date, start, end in islice(
+                self.iter_free_slots(start_date, end_date, not_before), limit
+            )
+        ]
+
+    def available_slots(self, start_date, end_date):
+        """
+        Horarios libres agrupados por día, con el formato que devuelve el
+        endpoint ``available_slots``.
+        """
+        days = []
+        current = None
+        for date, start, end in self.iter_free_slots(start_date, end_date):
+            if current is None or current['date'] != date:
+                current = {'date': date, 'slots': []}
+                days.append(current)
+            current['slots'].append({
+                "start_time": to_time(start).strftime('%H:%M'),
+                "end_time": to_time(end).strftime('%H:%M')
+            })
+
+        return [
+            {
+                "date": day['date'].strftime('%Y-%m-%d'),
+                "day_name": day['date'].strftime('%A'),
+                "slots": day['slots']
+            }
+            for day in days
+        ]
+
+
+def refresh_availability_summaries(psychologist_ids, now=None):
+    """
+    Recalcula ``AvailabilitySummary`` para los psicólogos indicados. Las
+    lecturas son tres consultas sin importar cuántos psicólogos sean.
+    """
+    # Ignorar psicólogos eliminados en la misma transacción que disparó el recálculo
+    psychologist_ids = list(PsychologistProfile.objects.filter(
+        id__in=list(psychologist_ids)
+    ).values_list('id', flat=True))
+    if not psychologist_ids:
+        return []
+
+    now = now or timezone.now()
+    today = now.date()
+    week_end = today + timedelta(days=6 - today.weekday())
+    horizon = max(today + timedelta(days=SUMMARY_HORIZON_DAYS), week_end)
+    engines = AvailabilityEngine.for_psychologists(psychologist_ids, today, horizon, verified_only=False)
+
+    summaries = []
+    for psychologist_id in psychologist_ids:
+        next_free_slot = None
+        free_hours = Decimal('0')
+        engine = engines.get(psychologist_id)
+        if engine is not None:
+            first = next(engine.iter_free_slots(today, horizon, not_before=now), None)
+            if first is not None:
+                next_free_slot = datetime.combine(first[0], to_time(first[1]))
+            free_hours = (Decimal(engine.free_minutes(today, week_end, not_before=now)) / 60).quantize(Decimal('0.01'))
+
+        summary, _ = AvailabilitySummary.objects.update_or_create(
+            psychologist_id=psychologist_id,
+            defaults={
+                'next_free_slot': next_free_slot,
+                'free_hours_this_week': free_hours,
+                'computed_at': now,
+            }
+        )
+        summaries.append(summary)
+    return summaries
@@ -0,0 +1,78 @@
+"""
+Reserva de horarios sin condiciones de carrera.
+
+La validación del serializer revisa la disponibilidad antes de guardar, pero
+entre esa revisión y el INSERT otra petición puede ocupar el mismo horario.
+Las funciones de este módulo toman un bloqueo por psicólogo y día
+(``AppointmentDayLock`` con ``select_for_update``), vuelven a validar con el
+bloqueo tomado y recién entonces escriben, todo dentro de una transacción.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .availability import BLOCKING_STATUSES, AvailabilityEngine, to_minutes
+from .models import AppointmentDayLock
+
+# Mensajes según el motivo devuelto por AvailabilityEngine.slot_conflict
+CONFLICT_MESSAGES = {
+    'schedule': "El psicólogo no tiene disponibilidad en este horario.",
+    'booked': "El psicólogo ya tiene una cita agendada en este horario.",
+}
+TAKEN_MESSAGE = "Este horario acaba de ser reservado. Por favor, seleccione otro horario."
+
+
+def lock_psychologist_day(psychologist_id, date):
+    """
+    Bloquea la agenda de un psicólogo para una fecha hasta el fin de la
+    transacción en curso. Debe llamarse dentro de ``transaction.atomic()``.
+    """
+    # INSERT ... ON CONFLICT DO NOTHING: crear la fila no compite con otra reserva
+    AppointmentDayLock.objects.bulk_create(
+        [AppointmentDayLock(psychologist_id=psychologist_id, date=date)],
+        ignore_conflicts=True
+    )
+    return AppointmentDayLock.objects.select_for_update().get(
+        psychologist_id=psychologist_id, date=date
+    )
+
+
+def book_appointment(serializer, **save_kwargs):
+    """
+    Guarda un ``AppointmentCreateSerializer`` ya validado. Con el día bloqueado
+    vuelve a comprobar el horario contra las citas confirmadas hasta ese
+    momento y convierte un choque con ``unique_together`` en error de validación.
+    """
+    data = serializer.validated_data
+    psychologist = data['psychologist']
+    date = data['date']
+
+    try:
+        with transaction.atomic():
+            lock_psychologist_day(psychologist.id, date)
+
+            engine = AvailabilityEngine.for_psychologist(psychologist, date, date)
+            conflict = engine.slot_conflict(date, to_minutes(data['start_time']), to_minutes(data['end_time']))
+            if conflict:
+                raise serializers.ValidationError(CONFLICT_MESSAGES[conflict])
+
+            return serializer.save(**save_kwargs)
+    except IntegrityError:
+        raise serializers.ValidationError(TAKEN_MESSAGE)
+
+
+def claim_slot(appointment):
+    """
+    Verifica, con el día bloqueado, que la cita puede pasar a un estado que
+    ocupa agenda sin cruzarse con otra. Debe llamarse dentro de
+    ``transaction.atomic()`` y antes de guardar el nuevo estado.
+    """
+    if appointment.status in BLOCKING_STATUSES:
+        return
+
+    lock_psychologist_day(appointment.psychologist_id, appointment.date)
+
+    # Solo importan las citas que ocupan agenda; el horario semanal pudo
+    # cambiar desde la reserva y no se vuelve a exigir.
+    engine = AvailabilityEngine.for_psychologist(appointment.psychologist, appointment.date, appointment.date)
+    if engine.is_booked(appointment.date, to_minutes(appointment.start_time), to_minutes(appointment.end_time)):
+        raise serializers.ValidationError(TAKEN_MESSAGE)
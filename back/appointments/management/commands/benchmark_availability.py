@@ -0,0 +1,120 @@
+import statistics
+import time
+from datetime import date, time as dtime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from appointments.models import Appointment
+from appointments.views import AppointmentViewSet
+from profiles.models import PsychologistProfile, ClientProfile
+from schedules.models import Schedule
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide consultas SQL y latencia del endpoint available_slots para ventanas "
+        "de 14, 60 y 180 días. Sin --psychologist-id crea datos sintéticos dentro "
+        "de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--psychologist-id', type=int, help="Usar un psicólogo existente en lugar de datos sintéticos")
+        parser.add_argument('--windows', default='14,60,180', help="Tamaños de ventana en días, separados por coma")
+        parser.add_argument('--repeat', type=int, default=20, help="Repeticiones por ventana")
+
+    def handle(self, *args, **options):
+        windows = [int(value) for value in options['windows'].split(',') if value]
+
+        if options['psychologist_id']:
+            try:
+                psychologist = PsychologistProfile.objects.get(id=options['psychologist_id'])
+            except PsychologistProfile.DoesNotExist:
+                raise CommandError("No existe el psicólogo indicado.")
+            client_user = User.objects.filter(user_type='client').first()
+            if client_user is None:
+                raise CommandError("Se necesita al menos un usuario cliente para llamar al endpoint.")
+            self._run(psychologist, client_user, windows, options['repeat'])
+            return
+
+        try:
+            with transaction.atomic():
+                psychologist, client_user = self._seed(max(windows))
+                self._run(psychologist, client_user, windows, options['repeat'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _seed(self, days):
+        """Psicólogo ocupado: lunes a sábado de 09:00 a 18:00 y la mitad de las horas reservadas."""
+        psychologist_user = User.objects.create_user(
+            email='bench-psychologist@example.com', username='bench-psychologist@example.com',
+            password='bench-password', user_type='psychologist'
+        )
+        client_user = User.objects.create_user(
+            email='bench-client@example.com', username='bench-client@example.com',
+            password='bench-password', user_type='client'
+        )
+        psychologist = PsychologistProfile.objects.get(user=psychologist_user)
+        client = ClientProfile.objects.get(user=client_user)
+
+        Schedule.objects.bulk_create([
+            Schedule(psychologist=psychologist, day_of_week=day, start_time=dtime(9), end_time=dtime(18))
+            for day in ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY']
+        ])
+
+        appointments = []
+        today = date.today()
+        for offset in range(days + 1):
+            current = today + timedelta(days=offset)
+            for hour in range(9, 18, 2):
+                appointments.append(Appointment(
+                    psychologist=psychologist, client=client, date=current,
+                    start_time=dtime(hour), end_time=dtime(hour + 1),
+                    status='CONFIRMED', payment_amount=Decimal('0')
+                ))
+        Appointment.objects.bulk_create(appointments)
+        self.stdout.write(f"Datos sintéticos: {len(appointments)} citas en {days + 1} días")
+        return psychologist, client_user
+
+    def _run(self, psychologist, client_user, windows, repeat):
+        factory = APIRequestFactory()
+        view = AppointmentViewSet.as_view({'get': 'available_slots'})
+        today = date.today()
+
+        self.stdout.write(f"{'ventana':>8} {'consultas':>10} {'mediana ms':>11} {'p95 ms':>8} {'días libres':>12}")
+        for window in windows:
+            params = {
+                'psychologist_id': psychologist.id,
+                'start_date': today.isoformat(),
+                'end_date': (today + timedelta(days=window)).isoformat(),
+            }
+            timings = []
+            query_count = 0
+            free_days = 0
+            for _ in range(repeat):
+                request = factory.get('/api/appointments/available-slots/', params)
+                force_authenticate(request, user=client_user)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    timings.append((time.perf_counter() - started) * 1000)
+                query_count = len(queries)
+                free_days = len(response.data.get('available_slots', []))
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{window:>8} {query_count:>10} {statistics.median(timings):>11.2f} {p95:>8.2f} {free_days:>12}"
+            )
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from backend.file_delivery import protected_file_response
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as status_file:
+        for line in status_file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _legacy(request, path, output):
+    """Lo que hacían las vistas de descarga: HttpResponse(file.read())."""
+    with open(path, 'rb') as file:
+        response = HttpResponse(file.read(), content_type='application/pdf')
+    os.write(output, response.content)
+
+
+def _streamed(request, path, output):
+    """FileResponse leído en bloques (servidores sin wsgi.file_wrapper)."""
+    response = protected_file_response(request, path)
+    for chunk in response.streaming_content:
+        os.write(output, chunk)
+    response.close()
+
+
+def _sendfile(request, path, output):
+    """Lo que hace gunicorn con el FileResponse: os.sendfile desde el descriptor."""
+    response = protected_file_response(request, path)
+    source = response.file_to_stream.fileno()
+    offset, remaining = 0, int(response['Content-Length'])
+    while remaining:
+        sent = os.sendfile(output, source, offset, remaining)
+        offset += sent
+        remaining -= sent
+    response.close()
+
+
+MODES = [
+    ('anterior (read)', _legacy),
+    ('FileResponse', _streamed),
+    ('sendfile', _sendfile),
+]
+
+
+def _run(mode, path, repeat, results):
+    # Proceso propio por modo: el pico de RSS de uno no contamina al otro
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')  # reinicia VmHWM
+    except OSError:
+        pass
+    baseline = _status_kb('VmRSS')
+    request = RequestFactory().get('/')
+    output = os.open(os.devnull, os.O_WRONLY)
+    samples = []
+    with override_settings(PROTECTED_MEDIA_MODE='django'):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            mode(request, path, output)
+            samples.append(time.perf_counter() - started)
+    os.close(output)
+    results.put((statistics.median(samples), _status_kb('VmHWM') - baseline))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la entrega de un archivo grande cargándolo en memoria (como las "
+        "vistas de descarga anteriores) con backend.file_delivery: FileResponse "
+        "en bloques y sendfile. Muestra el throughput y el pico de RSS de cada modo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50, help="Tamaño del archivo en MB")
+        parser.add_argument('--repeat', type=int, default=5, help="Entregas por modo")
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/status'):
+            raise CommandError("El pico de RSS se lee de /proc; ejecutar en Linux")
+
+        size = options['size'] * 1024 * 1024
+        context = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'archivo.pdf')
+            with open(path, 'wb') as file:
+                for _ in range(options['size']):
+                    file.write(os.urandom(1024 * 1024))
+
+            self.stdout.write(f"{'modo':<18} {'ms':>9} {'MB/s':>9} {'pico RSS MB':>12}")
+            for name, mode in MODES:
+                results = context.Queue()
+                process = context.Process(target=_run, args=(mode, path, options['repeat'], results))
+                process.start()
+                seconds, peak_kb = results.get()
+                process.join()
+                self.stdout.write(
+                    f"{name:<18} {seconds * 1000:>9.1f} {size / seconds / 1024 / 1024:>9.0f} "
+                    f"{peak_kb / 1024:>12.1f}"
+                )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from appointments.models import Appointment
+from appointments.query_plans import EXPECTED_INDEXES, SEED_APPOINTMENTS, check_plans, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las consultas más frecuentes de citas y reseñas y "
+        "falla si alguna recorre la tabla completa o no usa el índice previsto. "
+        "Solo PostgreSQL. Con --seed genera antes un volumen de datos sintéticos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, nargs='?', const=SEED_APPOINTMENTS, default=0,
+            help=f"Citas sintéticas a crear antes de medir (por defecto {SEED_APPOINTMENTS:,})"
+        )
+        parser.add_argument('--psychologist', type=int, help="Psicólogo usado en los filtros")
+        parser.add_argument('--client', type=int, help="Cliente usado en los filtros")
+        parser.add_argument('--analyze', action='store_true', help="EXPLAIN ANALYZE (ejecuta las consultas)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Los planes solo se verifican sobre PostgreSQL")
+
+        if options['seed']:
+            self.stdout.write(f"Creando {options['seed']:,} citas sintéticas...")
+            seed_dataset(options['seed'])
+
+        sample = Appointment.objects.order_by('-id').values('psychologist_id', 'client_id').first()
+        if sample is None and not (options['psychologist'] and options['client']):
+            raise CommandError("No hay citas; use --seed o indique --psychologist y --client")
+        psychologist_id = options['psychologist'] or sample['psychologist_id']
+        client_id = options['client'] or sample['client_id']
+
+        failed = []
+        for name, plan, indexed in check_plans(psychologist_id, client_id, analyze=options['analyze']):
+            label = self.style.SUCCESS('índice') if indexed else self.style.ERROR(
+                f"sin {' / '.join(EXPECTED_INDEXES[name])}"
+            )
+            self.stdout.write(f"{name:<28} {label}")
+            if options['verbosity'] > 1 or not indexed:
+                self.stdout.write('\n'.join(f"    {line}" for line in plan.splitlines()))
+            if not indexed:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(f"Consultas sin su índice: {', '.join(failed)}")
@@ -0,0 +1,42 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from appointments.availability import refresh_availability_summaries
+from profiles.models import PsychologistProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el resumen de disponibilidad (próximo horario libre y horas "
+        "libres de la semana). Las señales lo mantienen al día ante cambios; este "
+        "comando se ejecuta periódicamente para los resúmenes que vencen con el tiempo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale', action='store_true',
+            help="Solo resúmenes inexistentes, con el próximo horario ya pasado o calculados antes de esta semana"
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        queryset = PsychologistProfile.objects.filter(verification_status='VERIFIED')
+
+        if options['stale']:
+            week_start = datetime.combine(now.date() - timedelta(days=now.weekday()), time.min)
+            queryset = queryset.filter(
+                Q(availability_summary__isnull=True)
+                | Q(availability_summary__next_free_slot__lt=now)
+                | Q(availability_summary__computed_at__lt=week_start)
+            )
+
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for offset in range(0, len(ids), batch_size):
+            refresh_availability_summaries(ids[offset:offset + batch_size], now=now)
+
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes recalculados: {len(ids)}"))
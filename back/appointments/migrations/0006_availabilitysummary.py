@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:38
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0018_fix_experience_description"),
+        ("appointments", "0005_alter_appointment_created_at_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilitySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "next_free_slot",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Inicio del próximo horario libre, vacío si no hay disponibilidad",
+                        null=True,
+                    ),
+                ),
+                (
+                    "free_hours_this_week",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Horas libres restantes en la semana en curso",
+                        max_digits=6,
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(
+                        default=datetime.datetime.now,
+                        help_text="Momento en que se calculó el resumen",
+                    ),
+                ),
+                (
+                    "psychologist",
+                    models.OneToOneField(
+                        help_text="Psicólogo al que pertenece el resumen",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_summary",
+                        to="profiles.psychologistprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de disponibilidad",
+                "verbose_name_plural": "Resúmenes de disponibilidad",
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0019_psychologistprofile_buffer_minutes_and_more"),
+        ("appointments", "0006_availabilitysummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentDayLock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "psychologist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="appointment_day_locks",
+                        to="profiles.psychologistprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Bloqueo de agenda diaria",
+                "verbose_name_plural": "Bloqueos de agenda diaria",
+                "unique_together": {("psychologist", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no bloquea las escrituras en la tabla de citas,
+    # pero no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ("appointments", "0007_appointmentdaylock"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                fields=["psychologist", "status", "date"],
+                name="appt_psy_status_date_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                fields=["client", "status"], name="appt_client_status_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                fields=["status", "created_at"], name="appt_status_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                fields=["client", "psychologist", "date"],
+                name="appt_client_psy_date_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="appt_created_id_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(
+                    (
+                        "status__in",
+                        ["PAYMENT_VERIFIED", "CONFIRMED", "PAYMENT_UPLOADED"],
+                    )
+                ),
+                fields=["psychologist", "date"],
+                name="appt_blocking_idx",
+            ),
+        ),
+    ]
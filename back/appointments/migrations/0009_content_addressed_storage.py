@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:39
+
+import backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0008_appointment_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appointment",
+            name="payment_proof",
+            field=models.FileField(
+                blank=True,
+                help_text="Comprobante de pago subido por el cliente",
+                null=True,
+                storage=backend.storage.content_addressed_storage,
+                upload_to="payment_proofs/",
+            ),
+        ),
+    ]
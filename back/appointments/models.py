@@ -1,5 +1,6 @@
 from django.db import models
 from authentication.models import User
+from backend.storage import content_addressed_storage
 from profiles.models import PsychologistProfile, ClientProfile
 import datetime
 class Appointment(models.Model):
@@ -51,6 +52,7 @@ class Appointment(models.Model):
     )
     payment_proof = models.FileField(
         upload_to='payment_proofs/',
+        storage=content_addressed_storage,
         null=True,
         blank=True,
         help_text="Comprobante de pago subido por el cliente"
@@ -97,6 +99,20 @@ class Appointment(models.Model):
         ordering = ['-date', 'start_time']
         # Asegurar que no haya citas duplicadas para el mismo psicólogo en el mismo horario
         unique_together = ['psychologist', 'date', 'start_time']
+        # Índices según los filtros de los listados y dashboards (ver query_plans.py)
+        indexes = [
+            models.Index(fields=['psychologist', 'status', 'date'], name='appt_psy_status_date_idx'),
+            models.Index(fields=['client', 'status'], name='appt_client_status_idx'),
+            models.Index(fields=['status', 'created_at'], name='appt_status_created_idx'),
+            models.Index(fields=['client', 'psychologist', 'date'], name='appt_client_psy_date_idx'),
+            # Paginación por cursor del listado de administración
+            models.Index(fields=['-created_at', '-id'], name='appt_created_id_idx'),
+            # Citas que ocupan la agenda (BLOCKING_STATUSES en availability.py)
+            models.Index(
+                fields=['psychologist', 'date'], name='appt_blocking_idx',
+                condition=models.Q(status__in=['PAYMENT_VERIFIED', 'CONFIRMED', 'PAYMENT_UPLOADED'])
+            ),
+        ]
     
     def __str__(self):
         return f"Cita: {self.client.user.get_full_name()} con {self.psychologist.user.get_full_name()} - {self.date} {self.start_time}"
@@ -109,3 +125,60 @@ class Appointment(models.Model):
             ).exclude(pk=self.pk).exists()
             self.is_first_appointment = not exists
         super().save(*args, **kwargs)
+
+
+class AvailabilitySummary(models.Model):
+    """
+    Resumen precalculado de la disponibilidad de un psicólogo.
+    Se recalcula desde las señales de horarios y citas (ver appointments.signals)
+    y permite ordenar y filtrar el directorio sin generar horarios por fila.
+    """
+    psychologist = models.OneToOneField(
+        PsychologistProfile,
+        on_delete=models.CASCADE,
+        related_name='availability_summary',
+        help_text="Psicólogo al que pertenece el resumen"
+    )
+    next_free_slot = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Inicio del próximo horario libre, vacío si no hay disponibilidad"
+    )
+    free_hours_this_week = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        default=0,
+        help_text="Horas libres restantes en la semana en curso"
+    )
+    computed_at = models.DateTimeField(
+        default=datetime.datetime.now,
+        help_text="Momento en que se calculó el resumen"
+    )
+
+    class Meta:
+        verbose_name = "Resumen de disponibilidad"
+        verbose_name_plural = "Resúmenes de disponibilidad"
+
+    def __str__(self):
+        return f"Disponibilidad de {self.psychologist_id}: {self.next_free_slot}"
+
+
+class AppointmentDayLock(models.Model):
+    """
+    Fila de bloqueo por psicólogo y día. Las reservas la toman con
+    select_for_update para que dos reservas del mismo día no se validen a la vez.
+    """
+    psychologist = models.ForeignKey(
+        PsychologistProfile,
+        on_delete=models.CASCADE,
+        related_name='appointment_day_locks'
+    )
+    date = models.DateField()
+
+    class Meta:
+        verbose_name = "Bloqueo de agenda diaria"
+        verbose_name_plural = "Bloqueos de agenda diaria"
+        unique_together = ['psychologist', 'date']
+
+    def __str__(self):
+        return f"Bloqueo {self.psychologist_id} - {self.date}"
@@ -0,0 +1,166 @@
+"""
+Planes de ejecución de las consultas más frecuentes sobre citas y reseñas.
+
+``hot_queries`` reproduce los filtros de los listados y dashboards, y
+``check_plans`` ejecuta ``EXPLAIN`` sobre cada uno para verificar que
+PostgreSQL use el índice pensado para esa consulta (``EXPECTED_INDEXES``) y
+no recorra la tabla completa. ``seed_dataset``
+genera un volumen realista de datos (por defecto un millón de citas) con
+``generate_series`` para que el planificador se comporte como en producción.
+Lo usan el comando ``explain_hot_queries`` y los tests.
+"""
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from comments.models import Comment
+from profiles.models import ClientProfile, PsychologistProfile
+from .availability import BLOCKING_STATUSES
+from .models import Appointment
+
+SEED_APPOINTMENTS = 1_000_000
+SEED_PSYCHOLOGISTS = 200
+SEED_CLIENTS = 20_000
+
+# Reparto aproximado de estados: la mayoría de las citas son historial completado
+SEED_STATUSES = (
+    ['COMPLETED'] * 12 + ['CANCELLED'] * 2 +
+    ['NO_SHOW', 'CONFIRMED', 'CONFIRMED', 'PAYMENT_VERIFIED', 'PAYMENT_UPLOADED', 'PENDING_PAYMENT']
+)
+
+_SEED_APPOINTMENTS_SQL = """
+INSERT INTO {table} (
+    psychologist_id, client_id, date, start_time, end_time, status, payment_amount,
+    payment_proof, created_at, updated_at, is_first_appointment
+)
+SELECT
+    psy.ids[1 + g %% psy.n],
+    cli.ids[1 + (g %% cli.n) * 7919 %% cli.n],
+    %s::date - g / (psy.n * 10),
+    make_time(8 + (g / psy.n) %% 10, 0, 0),
+    make_time(9 + (g / psy.n) %% 10, 0, 0),
+    st.statuses[1 + g * 31 %% st.n],
+    30000,
+    '',
+    %s::timestamp - make_interval(mins => g),
+    %s::timestamp - make_interval(mins => g),
+    false
+FROM generate_series(0, %s::int - 1) AS g,
+    (SELECT %s::bigint[] AS ids, cardinality(%s::bigint[]) AS n) AS psy,
+    (SELECT %s::bigint[] AS ids, cardinality(%s::bigint[]) AS n) AS cli,
+    (SELECT %s::text[] AS statuses, cardinality(%s::text[]) AS n) AS st
+"""
+
+_SEED_COMMENTS_SQL = """
+INSERT INTO {comments} (psychologist_id, patient_id, appointment_id, comment, rating, created_at, status)
+SELECT psychologist_id, client_id, id, '', 1 + (id %% 5)::int, created_at,
+       (ARRAY['APPROVED', 'APPROVED', 'APPROVED', 'PENDING', 'REJECTED'])[1 + (id %% 5)::int]
+FROM {appointments}
+WHERE status = 'COMPLETED' AND id %% 4 = 0
+"""
+
+
+def _seed_profiles(model, user_type, count, prefix):
+    User = get_user_model()
+    # Sufijo por ejecución para poder sembrar más de una vez en la misma base
+    prefix = f"{prefix}-{uuid.uuid4().hex[:8]}-"
+    users = User.objects.bulk_create([
+        User(
+            username=f'{prefix}{index}@seed.local', email=f'{prefix}{index}@seed.local',
+            password='!', user_type=user_type, first_name=user_type, last_name=str(index)
+        )
+        for index in range(count)
+    ], batch_size=5000)
+    # bulk_create no dispara la señal que crea los perfiles
+    profiles = model.objects.bulk_create([model(user=user) for user in users], batch_size=5000)
+    return [profile.id for profile in profiles]
+
+
+def seed_dataset(appointments=SEED_APPOINTMENTS, psychologists=SEED_PSYCHOLOGISTS, clients=SEED_CLIENTS):
+    """Crea perfiles, citas y reseñas sintéticas y actualiza las estadísticas de la tabla."""
+    if connection.vendor != 'postgresql':
+        raise RuntimeError("El seed con generate_series solo funciona en PostgreSQL")
+
+    now = timezone.now()
+    with transaction.atomic():
+        psychologist_ids = _seed_profiles(PsychologistProfile, 'psychologist', psychologists, 'psy')
+        client_ids = _seed_profiles(ClientProfile, 'client', clients, 'client')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _SEED_APPOINTMENTS_SQL.format(table=Appointment._meta.db_table),
+                [
+                    (now + timedelta(days=30)).date(), now, now, appointments,
+                    psychologist_ids, psychologist_ids, client_ids, client_ids,
+                    SEED_STATUSES, SEED_STATUSES,
+                ]
+            )
+            cursor.execute(_SEED_COMMENTS_SQL.format(
+                comments=Comment._meta.db_table, appointments=Appointment._meta.db_table
+            ))
+
+    with connection.cursor() as cursor:
+        for model in (Appointment, Comment):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+    return psychologist_ids, client_ids
+
+
+def hot_queries(psychologist_id, client_id, today=None):
+    """Consultas representativas de cada endpoint, como ``(nombre, queryset)``."""
+    today = today or timezone.now().date()
+    appointments = Appointment.objects.all()
+    return [
+        # my_appointments / psychologist_pending_payments con filtro de estado y fechas
+        ('psychologist_status_dates', appointments.filter(
+            psychologist_id=psychologist_id, status='CONFIRMED',
+            date__range=(today - timedelta(days=30), today + timedelta(days=30))
+        ).order_by('date', 'start_time')),
+        # AvailabilityEngine: citas que ocupan la agenda en un rango
+        ('availability_blocking', appointments.filter(
+            psychologist_id=psychologist_id, status__in=BLOCKING_STATUSES,
+            date__range=(today, today + timedelta(days=14))
+        ).values_list('date', 'start_time', 'end_time')),
+        # client_stats / PendingAppointmentsView
+        ('client_status', appointments.filter(client_id=client_id, status='COMPLETED')),
+        # pending_payments / all_payments del administrador
+        ('status_recent', appointments.filter(status='PAYMENT_UPLOADED').order_by('-created_at')[:50]),
+        # admin_payment_verification (cursor sobre created_at, id)
+        ('admin_keyset', appointments.order_by('-created_at', '-id')[:51]),
+        # is_first_appointment en los listados de pagos
+        ('first_appointment', appointments.filter(
+            client_id=client_id, psychologist_id=psychologist_id, date__lt=today
+        ).values('id')[:1]),
+        # Reseñas públicas del psicólogo
+        ('comments_approved', Comment.objects.filter(
+            psychologist_id=psychologist_id, status='APPROVED'
+        ).order_by('-created_at')[:20]),
+    ]
+
+
+# Índices (de Appointment.Meta y Comment.Meta) que debe usar cada consulta; con
+# varios, cualquiera de ellos es un plan aceptable
+EXPECTED_INDEXES = {
+    'psychologist_status_dates': ('appt_psy_status_date_idx', 'appt_blocking_idx'),
+    'availability_blocking': ('appt_blocking_idx', 'appt_psy_status_date_idx'),
+    'client_status': ('appt_client_status_idx',),
+    'status_recent': ('appt_status_created_idx',),
+    'admin_keyset': ('appt_created_id_idx',),
+    'first_appointment': ('appt_client_psy_date_idx',),
+    'comments_approved': ('cmt_psy_status_created_idx',),
+}
+
+
+def uses_index(plan, table, indexes):
+    """El plan no recorre ``table`` completa (sin ``Seq Scan``) y usa alguno de ``indexes``."""
+    return f"Seq Scan on {table}" not in plan and any(index in plan for index in indexes)
+
+
+def check_plans(psychologist_id, client_id, analyze=False):
+    """Devuelve ``(nombre, plan, usa_índice)`` para cada consulta de ``hot_queries``."""
+    results = []
+    for name, queryset in hot_queries(psychologist_id, client_id):
+        plan = queryset.explain(analyze=analyze) if analyze else queryset.explain()
+        results.append((name, plan, uses_index(plan, queryset.model._meta.db_table, EXPECTED_INDEXES[name])))
+    return results
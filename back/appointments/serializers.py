@@ -1,24 +1,43 @@
 from rest_framework import serializers
 from .models import Appointment
+from .availability import AvailabilityEngine, to_minutes
+from .booking import CONFLICT_MESSAGES
 from payments.serializers import PaymentDetailSerializer
+from profiles.images import image_sizes
 from profiles.serializers import ClientProfileSerializer, PsychologistProfileBasicSerializer
 from django.conf import settings
+from backend.signed_urls import signed_file_url
 
 class AppointmentSerializer(serializers.ModelSerializer):
     payment_detail = PaymentDetailSerializer(read_only=True)
     psychologist_name = serializers.SerializerMethodField()
     client_name = serializers.SerializerMethodField()
     status_display = serializers.SerializerMethodField()
+    # Los comprobantes no se sirven desde /media/: ambos campos son URLs firmadas
+    payment_proof = serializers.SerializerMethodField()
     payment_proof_url = serializers.SerializerMethodField()
     client_data = serializers.SerializerMethodField()
     psychologist_data = serializers.SerializerMethodField()
     payment_verified_by_name = serializers.SerializerMethodField()
     
+    # Relaciones que leen los campos de este serializer. Los listados deben pasar
+    # su queryset por setup_queryset para no hacer consultas por cada cita.
+    select_related_fields = ('psychologist__user', 'client__user', 'payment_verified_by', 'payment_detail')
+    prefetch_related_fields = ()
+    
     class Meta:
         model = Appointment
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'payment_verified_by')
     
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Aplica el select_related/prefetch_related que necesita el serializer."""
+        queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+    
     def get_psychologist_name(self, obj):
         return obj.psychologist.user.get_full_name()
     
@@ -29,9 +48,13 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return obj.get_status_display()
         
     def get_payment_proof_url(self, obj):
+        """URL firmada y con vencimiento del comprobante (ver backend/signed_urls.py)"""
         if obj.payment_proof:
-            return obj.payment_proof.url
+            return signed_file_url(self.context.get('request'), 'payment_proof', obj.payment_proof)
         return None
+
+    def get_payment_proof(self, obj):
+        return self.get_payment_proof_url(obj)
     
     def get_client_data(self, obj):
         """Obtener datos básicos del cliente"""
@@ -42,7 +65,8 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'name': client.user.get_full_name(),
             'email': client.user.email,
             'phone': client.phone_number,
-            'profile_image': client.profile_image.url if client.profile_image else None
+            'profile_image': client.profile_image.url if client.profile_image else None,
+            'profile_image_sizes': image_sizes(client)
         }
     
     def get_psychologist_data(self, obj):
@@ -55,7 +79,8 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'email': psychologist.user.email,
             'phone': psychologist.phone,
             'professional_title': psychologist.professional_title,
-            'profile_image': psychologist.profile_image.url if psychologist.profile_image else None
+            'profile_image': psychologist.profile_image.url if psychologist.profile_image else None,
+            'profile_image_sizes': image_sizes(psychologist)
         }
     
     def get_payment_verified_by_name(self, obj):
@@ -81,35 +106,12 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         start_time = data.get('start_time')
         end_time = data.get('end_time')
         
-        # Asegurarse de que estamos usando la fecha correcta para la validación
-        # sin conversión de zona horaria
-        
-        # Check if the psychologist has this time slot in their schedule
-        day_of_week = date.strftime('%A').upper()
-        schedule_exists = psychologist.schedules.filter(
-            day_of_week=day_of_week,
-            start_time__lte=start_time,
-            end_time__gte=end_time
-        ).exists()
-        
-        if not schedule_exists:
-            raise serializers.ValidationError(
-                "El psicólogo no tiene disponibilidad en este horario."
-            )
-        
-        # Check if the psychologist already has an appointment at this time
-        # Usamos la fecha exacta que viene del frontend
-        appointment_exists = Appointment.objects.filter(
-            psychologist=psychologist,
-            date=date,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            status__in=['PAYMENT_VERIFIED', 'CONFIRMED', 'PAYMENT_UPLOADED']
-        ).exists()
+        # Se valida con el mismo motor que genera el listado de horarios
+        # disponibles, así que un horario listado siempre se puede reservar.
+        engine = AvailabilityEngine.for_psychologist(psychologist, date, date)
+        conflict = engine.slot_conflict(date, to_minutes(start_time), to_minutes(end_time))
         
-        if appointment_exists:
-            raise serializers.ValidationError(
-                "El psicólogo ya tiene una cita agendada en este horario."
-            )
+        if conflict:
+            raise serializers.ValidationError(CONFLICT_MESSAGES[conflict])
         
         return data
\ No newline at end of file
@@ -0,0 +1,115 @@
+import weakref
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from profiles.models import PsychologistProfile
+from schedules.models import Schedule
+from .availability import BLOCKING_STATUSES, CONFIG_FIELDS, refresh_availability_summaries
+from .models import Appointment
+from .stats import invalidate_client_stats, invalidate_psychologist_stats
+
+# Campos de la cita que afectan la disponibilidad
+_TRACKED_FIELDS = ('psychologist_id', 'date', 'start_time', 'end_time', 'status')
+
+
+# Psicólogos por recalcular en la transacción en curso de cada conexión
+_pending_refreshes = weakref.WeakKeyDictionary()
+
+
+def _refresh_pending(connection):
+    """Callback de on_commit: el primero de la transacción recalcula todos los pendientes."""
+    psychologist_ids = _pending_refreshes.pop(connection, None)
+    if psychologist_ids:
+        refresh_availability_summaries(sorted(psychologist_ids))
+
+
+def schedule_availability_refresh(psychologist_id):
+    """
+    Recalcula el resumen de disponibilidad cuando se confirme la transacción.
+    Los cambios de una misma transacción se resuelven con un solo recálculo.
+    """
+    connection = transaction.get_connection()
+    _pending_refreshes.setdefault(connection, set()).add(psychologist_id)
+    # Cada llamada registra su callback (un savepoint revertido descarta el
+    # suyo) y los que llegan después del primero no encuentran nada pendiente.
+    # Si la transacción se revierte, sus IDs se recalculan con la siguiente: de
+    # más, pero nunca de menos. robust: un fallo no rompe la petición ya confirmada
+    transaction.on_commit(partial(_refresh_pending, connection), robust=True)
+
+
+def _blocks_agenda(values):
+    return values is not None and values['status'] in BLOCKING_STATUSES
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def schedule_changed(sender, instance, **kwargs):
+    schedule_availability_refresh(instance.psychologist_id)
+
+
+@receiver(post_init, sender=PsychologistProfile)
+def remember_session_config(sender, instance, **kwargs):
+    # Duración, paso y margen de las sesiones (CONFIG_FIELDS) cambian los horarios libres
+    instance._session_config_snapshot = (
+        {field: instance.__dict__[field] for field in CONFIG_FIELDS}
+        if all(field in instance.__dict__ for field in CONFIG_FIELDS) else None
+    )
+
+
+@receiver(post_save, sender=PsychologistProfile)
+def session_config_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and not set(update_fields) & set(CONFIG_FIELDS)):
+        return
+    previous = instance._session_config_snapshot
+    current = {field: getattr(instance, field) for field in CONFIG_FIELDS}
+    if previous != current:
+        schedule_availability_refresh(instance.pk)
+    instance._session_config_snapshot = current
+
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_state(sender, instance, **kwargs):
+    # Con .only()/.defer() algunos campos no están cargados y no se registran
+    instance._availability_snapshot = (
+        {field: instance.__dict__[field] for field in _TRACKED_FIELDS}
+        if all(field in instance.__dict__ for field in _TRACKED_FIELDS) else None
+    )
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._availability_snapshot
+    current = {field: getattr(instance, field) for field in _TRACKED_FIELDS}
+
+    if created:
+        changed = _blocks_agenda(current)
+    elif previous is None:
+        changed = True
+    else:
+        changed = previous != current and (_blocks_agenda(previous) or _blocks_agenda(current))
+
+    if changed:
+        schedule_availability_refresh(instance.psychologist_id)
+        if previous and previous['psychologist_id'] != instance.psychologist_id:
+            schedule_availability_refresh(previous['psychologist_id'])
+
+    # Cualquier escritura puede cambiar los contadores del dashboard
+    invalidate_psychologist_stats(instance.psychologist_id)
+    invalidate_client_stats(instance.client_id)
+    if previous and previous['psychologist_id'] != instance.psychologist_id:
+        invalidate_psychologist_stats(previous['psychologist_id'])
+
+    instance._availability_snapshot = current
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    snapshot = instance._availability_snapshot
+    if snapshot is None or _blocks_agenda(snapshot):
+        schedule_availability_refresh(instance.psychologist_id)
+    invalidate_psychologist_stats(instance.psychologist_id)
+    invalidate_client_stats(instance.client_id)
+
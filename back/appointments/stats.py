@@ -0,0 +1,133 @@
+"""
+Estadísticas de los dashboards de citas.
+
+Los contadores se calculan con una sola consulta de agregación condicional
+(``Count(filter=Q(...))``) y el resultado se guarda en la cache por un tiempo
+corto (``DASHBOARD_STATS_CACHE_TTL``). Las señales de ``Appointment`` borran las
+entradas del psicólogo y del cliente afectados cada vez que se guarda o elimina
+una cita.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Appointment
+
+ACTIVE_CLIENT_DAYS = 30
+ACTIVE_CLIENT_STATUSES = ['CONFIRMED', 'COMPLETED']
+UPCOMING_LIMIT = 5
+
+
+def psychologist_stats_key(psychologist_id):
+    return f"appointments:psychologist-stats:{psychologist_id}"
+
+
+def client_stats_key(client_id):
+    return f"appointments:client-stats:{client_id}"
+
+
+def _invalidate(key):
+    """Borra una entrada ahora y de nuevo al confirmar la transacción."""
+    cache.delete(key)
+    # Una petición concurrente podría volver a guardar datos anteriores al commit
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _cached(key, compute):
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TTL', 60))
+    return stats
+
+
+def invalidate_psychologist_stats(psychologist_id):
+    _invalidate(psychologist_stats_key(psychologist_id))
+
+
+def invalidate_client_stats(client_id):
+    _invalidate(client_stats_key(client_id))
+
+
+def _upcoming_q(now):
+    return Q(date__gt=now.date()) | Q(date=now.date(), start_time__gt=now.time())
+
+
+def compute_psychologist_stats(psychologist_id, now=None):
+    """Contadores del psicólogo en una consulta y las próximas citas en otra."""
+    now = now or timezone.now()
+    today = now.date()
+
+    counts = Appointment.objects.filter(psychologist_id=psychologist_id).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='COMPLETED')),
+        pending_payment=Count('id', filter=Q(status='PENDING_PAYMENT')),
+        # Clientes con citas confirmadas o completadas en los últimos 30 días
+        active_clients=Count('client', distinct=True, filter=Q(
+            date__gte=today - timedelta(days=ACTIVE_CLIENT_DAYS),
+            status__in=ACTIVE_CLIENT_STATUSES,
+        )),
+    )
+
+    upcoming = (
+        Appointment.objects.filter(psychologist_id=psychologist_id)
+        .filter(_upcoming_q(now))
+        .exclude(status__in=['CANCELLED', 'NO_SHOW'])
+        .select_related('client__user')
+        .only('id', 'date', 'start_time', 'status', 'client__user__first_name', 'client__user__last_name')
+        .order_by('date', 'start_time')[:UPCOMING_LIMIT]
+    )
+
+    return {
+        "totalAppointments": counts['total'],
+        "completedAppointments": counts['completed'],
+        "pendingPaymentAppointments": counts['pending_payment'],
+        "activeClients": counts['active_clients'],
+        "upcomingAppointments": [
+            {
+                "id": appt.id,
+                "client_name": f"{appt.client.user.first_name} {appt.client.user.last_name}",
+                "date": appt.date,
+                "time": appt.start_time,
+                "status": appt.status,
+            }
+            for appt in upcoming
+        ],
+    }
+
+
+def get_psychologist_stats(psychologist_id):
+    """Estadísticas del dashboard del psicólogo, desde la cache si están vigentes."""
+    return _cached(
+        psychologist_stats_key(psychologist_id),
+        lambda: compute_psychologist_stats(psychologist_id)
+    )
+
+
+def compute_client_stats(client_id, now=None):
+    """Contadores del cliente y fecha de la última sesión completada, en una consulta."""
+    now = now or timezone.now()
+    completed = Q(status='COMPLETED')
+
+    counts = Appointment.objects.filter(client_id=client_id).aggregate(
+        total=Count('id'),
+        upcoming=Count('id', filter=_upcoming_q(now) & ~Q(status__in=['COMPLETED', 'CANCELLED', 'NO_SHOW'])),
+        completed=Count('id', filter=completed),
+        last_session=Max('date', filter=completed),
+    )
+
+    return {
+        "totalAppointments": counts['total'],
+        "upcomingAppointments": counts['upcoming'],
+        "completedAppointments": counts['completed'],
+        "lastSessionDate": counts['last_session'],
+    }
+
+
+def get_client_stats(client_id):
+    """Estadísticas del dashboard del cliente, desde la cache si están vigentes."""
+    return _cached(client_stats_key(client_id), lambda: compute_client_stats(client_id))
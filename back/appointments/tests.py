@@ -1,3 +1,876 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+import time as time_module
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from backend.metrics import QueryBudgetExceeded, registry
+from backend.testing import LOCMEM_CACHES, QueryBudgetMixin
+from payments.models import PaymentDetail
+from profiles.models import PsychologistProfile, ClientProfile
+from schedules.models import Schedule
+from .availability import BLOCKING_STATUSES, AvailabilityEngine, to_minutes, to_time
+from .booking import book_appointment, claim_slot
+from .models import Appointment, AvailabilitySummary
+from .query_plans import EXPECTED_INDEXES, check_plans, seed_dataset
+from .serializers import AppointmentCreateSerializer
+
+User = get_user_model()
+
+# Lunes conocido para que los tests no dependan del día en que se ejecutan
+MONDAY = date(2030, 1, 7)
+
+
+class AvailabilityEngineTests(TestCase):
+    def slots(self, schedules, appointments, start=MONDAY, end=MONDAY):
+        engine = AvailabilityEngine(schedules, appointments)
+        return [(d, s, e) for d, s, e in engine.iter_free_slots(start, end)]
+
+    def test_free_day_uses_whole_block(self):
+        slots = self.slots([('MONDAY', time(9), time(12))], [])
+        self.assertEqual([s for _, s, _ in slots], [540, 600, 660])
+
+    def test_slot_never_overflows_block(self):
+        slots = self.slots([('MONDAY', time(9), time(10, 30))], [])
+        self.assertEqual(slots, [(MONDAY, 540, 600)])
+
+    def test_booked_and_overlapping_appointments_block_slots(self):
+        slots = self.slots(
+            [('MONDAY', time(9), time(13))],
+            [(MONDAY, time(9, 30), time(10, 30)), (MONDAY, time(10), time(11))]
+        )
+        self.assertEqual([s for _, s, _ in slots], [660, 720])
+
+    def test_other_weekdays_are_empty(self):
+        slots = self.slots([('MONDAY', time(9), time(10))], [], end=MONDAY + timedelta(days=6))
+        self.assertEqual(slots, [(MONDAY, 540, 600)])
+
+    def test_session_length_step_and_buffer(self):
+        engine = AvailabilityEngine(
+            [('MONDAY', time(9), time(11))],
+            [(MONDAY, time(10), time(10, 30))],
+            session_minutes=45, step_minutes=15, buffer_minutes=10
+        )
+        starts = [start for _, start, _ in engine.iter_free_slots(MONDAY, MONDAY)]
+        # 09:00 termina 09:45 (margen hasta 09:50); 10:30 + 10 de margen deja 10:45 fuera de 11:00
+        self.assertEqual(starts, [540])
+        self.assertEqual(engine.slot_conflict(MONDAY, 555, 600), 'booked')
+        self.assertEqual(engine.slot_conflict(MONDAY, 540, 600), 'schedule')
+
+    def test_listing_and_validator_agree(self):
+        rng = random.Random(2024)
+        for _ in range(200):
+            schedules = []
+            for _ in range(rng.randint(1, 3)):
+                start = rng.randrange(6 * 60, 20 * 60, 5)
+                schedules.append(('MONDAY', to_time(start), to_time(min(start + rng.randint(30, 300), 23 * 60 + 59))))
+            appointments = []
+            for _ in range(rng.randint(0, 5)):
+                start = rng.randrange(6 * 60, 22 * 60, 5)
+                appointments.append((MONDAY, to_time(start), to_time(start + rng.choice([30, 45, 50, 60]))))
+            session = rng.choice([30, 45, 50, 60, 90])
+            engine = AvailabilityEngine(
+                schedules, appointments, session_minutes=session,
+                step_minutes=rng.choice([None, 5, 15, 30]), buffer_minutes=rng.choice([0, 5, 10, 15])
+            )
+
+            listed = {start for _, start, _ in engine.iter_free_slots(MONDAY, MONDAY)}
+            for start in range(0, 24 * 60 - session):
+                self.assertEqual(engine.is_bookable(MONDAY, start, start + session), start in listed)
+                # Un horario listado nunca se cruza con una cita
+                if start in listed:
+                    for _, booked_start, booked_end in appointments:
+                        self.assertFalse(to_minutes(booked_start) < start + session and start < to_minutes(booked_end))
+
+
+class AvailableSlotsEndpointTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        client_user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.psychologist = PsychologistProfile.objects.get(user=psychologist_user)
+        client = ClientProfile.objects.get(user=client_user)
+        Schedule.objects.create(
+            psychologist=self.psychologist, day_of_week='MONDAY',
+            start_time=time(9), end_time=time(12)
+        )
+        Appointment.objects.create(
+            psychologist=self.psychologist, client=client, date=MONDAY,
+            start_time=time(10), end_time=time(11),
+            status='CONFIRMED', payment_amount=Decimal('0')
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(user=client_user)
+
+    def get_slots(self, days):
+        return self.api.get('/api/appointments/available-slots/', {
+            'psychologist_id': self.psychologist.id,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=days)).isoformat(),
+        })
+
+    def test_response_excludes_booked_slot(self):
+        response = self.get_slots(0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = response.data['available_slots'][0]['slots']
+        self.assertEqual([slot['start_time'] for slot in slots], ['09:00', '11:00'])
+
+    def test_every_listed_slot_validates(self):
+        self.psychologist.session_length_minutes = 50
+        self.psychologist.slot_step_minutes = 10
+        self.psychologist.buffer_minutes = 10
+        self.psychologist.save()
+        listed = self.get_slots(0).data['available_slots'][0]['slots']
+        self.assertEqual([slot['start_time'] for slot in listed], ['09:00', '11:10'])
+
+        for start in range(9 * 60, 12 * 60, 10):
+            serializer = AppointmentCreateSerializer(data={
+                'psychologist': self.psychologist.id, 'date': MONDAY.isoformat(),
+                'start_time': to_time(start).strftime('%H:%M'),
+                'end_time': to_time(start + 50).strftime('%H:%M'),
+            })
+            is_listed = any(slot['start_time'] == to_time(start).strftime('%H:%M') for slot in listed)
+            self.assertEqual(serializer.is_valid(), is_listed)
+
+    def test_query_count_does_not_grow_with_window(self):
+        # Psicólogo + horarios + citas, sin importar los días del rango
+        with self.assertNumQueries(3):
+            self.get_slots(14)
+        with self.assertNumQueries(3):
+            self.get_slots(180)
+        self.assertWithinBudget(self.get_slots(30))
+
+
+class BatchAvailableSlotsTests(TestCase):
+    def setUp(self):
+        self.psychologists = []
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f'psy{index}@example.com', username=f'psy{index}@example.com',
+                password='testpass123', user_type='psychologist'
+            )
+            profile = PsychologistProfile.objects.get(user=user)
+            profile.verification_status = 'VERIFIED'
+            profile.save()
+            Schedule.objects.create(
+                psychologist=profile, day_of_week='MONDAY',
+                start_time=time(9 + index), end_time=time(12)
+            )
+            self.psychologists.append(profile)
+        self.api = APIClient()
+
+    def get_batch(self, **params):
+        params.setdefault('start_date', MONDAY.isoformat())
+        params.setdefault('end_date', (MONDAY + timedelta(days=6)).isoformat())
+        return self.api.get('/api/appointments/batch-available-slots/', params)
+
+    def test_returns_next_slots_per_psychologist_with_two_queries(self):
+        ids = ','.join(str(profile.id) for profile in self.psychologists)
+        with self.assertNumQueries(2):
+            response = self.get_batch(psychologist_ids=ids, limit=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_slots = [
+            [slot['start_time'] for slot in result['next_slots']]
+            for result in response.data['results']
+        ]
+        self.assertEqual(first_slots, [['09:00', '10:00'], ['10:00', '11:00'], ['11:00']])
+
+    def test_directory_filter_excludes_unverified(self):
+        self.psychologists[0].verification_status = 'PENDING'
+        self.psychologists[0].save()
+        response = self.get_batch()
+        self.assertEqual(
+            [result['psychologist_id'] for result in response.data['results']],
+            [profile.id for profile in self.psychologists[1:]]
+        )
+
+
+class AvailabilitySummaryTests(TestCase):
+    def setUp(self):
+        self.profiles = []
+        for index in range(2):
+            user = User.objects.create_user(
+                email=f'psy{index}@example.com', username=f'psy{index}@example.com',
+                password='testpass123', user_type='psychologist'
+            )
+            profile = PsychologistProfile.objects.get(user=user)
+            profile.verification_status = 'VERIFIED'
+            profile.save()
+            self.profiles.append(profile)
+        client_user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.client_profile = ClientProfile.objects.get(user=client_user)
+        self.api = APIClient()
+
+    def add_schedule(self, profile, start_hour, weekdays=('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY')):
+        with self.captureOnCommitCallbacks(execute=True):
+            for day in weekdays:
+                Schedule.objects.create(
+                    psychologist=profile, day_of_week=day,
+                    start_time=time(start_hour), end_time=time(start_hour + 2)
+                )
+
+    def test_summary_follows_schedule_and_appointment_status(self):
+        profile = self.profiles[0]
+        self.add_schedule(profile, 21)
+        summary = AvailabilitySummary.objects.get(psychologist=profile)
+        self.assertIsNotNone(summary.next_free_slot)
+        first_slot = summary.next_free_slot
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                psychologist=profile, client=self.client_profile,
+                date=first_slot.date(), start_time=first_slot.time(),
+                end_time=(first_slot + timedelta(hours=1)).time(),
+                status='CONFIRMED', payment_amount=Decimal('0')
+            )
+        summary.refresh_from_db()
+        self.assertGreater(summary.next_free_slot, first_slot)
+
+        # Cancelar la cita libera el horario otra vez
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'CANCELLED'
+            appointment.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.next_free_slot, first_slot)
+
+    def test_session_config_changes_refresh_summary(self):
+        profile = self.profiles[0]
+        self.add_schedule(profile, 9)
+        summary = AvailabilitySummary.objects.get(psychologist=profile)
+        self.assertIsNotNone(summary.next_free_slot)
+
+        # Sesiones más largas que los bloques de dos horas: no queda ningún horario
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.session_length_minutes = 180
+            profile.save()
+        summary.refresh_from_db()
+        self.assertIsNone(summary.next_free_slot)
+
+        with mock.patch('appointments.signals.refresh_availability_summaries') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                profile = PsychologistProfile.objects.get(pk=profile.pk)
+                profile.verification_status = 'VERIFIED'
+                profile.save()
+                profile.buffer_minutes = 10
+                profile.save(update_fields=['buffer_minutes'])
+        refresh.assert_called_once_with([profile.pk])
+
+    def test_changes_in_one_transaction_refresh_once(self):
+        with mock.patch('appointments.signals.refresh_availability_summaries') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for profile in self.profiles:
+                    for day in ('MONDAY', 'TUESDAY'):
+                        Schedule.objects.create(
+                            psychologist=profile, day_of_week=day, start_time=time(9), end_time=time(11)
+                        )
+        refresh.assert_called_once_with(sorted(profile.pk for profile in self.profiles))
+
+    def test_rolled_back_changes_do_not_block_later_refreshes(self):
+        with mock.patch('appointments.signals.refresh_availability_summaries') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        Schedule.objects.create(
+                            psychologist=self.profiles[0], day_of_week='MONDAY', start_time=time(9), end_time=time(11)
+                        )
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                Schedule.objects.create(
+                    psychologist=self.profiles[1], day_of_week='MONDAY', start_time=time(9), end_time=time(11)
+                )
+        # El recálculo del primero se descartó con el savepoint, pero el del segundo se ejecuta
+        refresh.assert_called_once()
+        self.assertIn(self.profiles[1].pk, refresh.call_args.args[0])
+
+        # Lo pendiente de una transacción revertida se recalcula con la siguiente
+        with mock.patch('appointments.signals.refresh_availability_summaries') as refresh:
+            try:
+                with transaction.atomic():
+                    Schedule.objects.create(
+                        psychologist=self.profiles[0], day_of_week='TUESDAY', start_time=time(9), end_time=time(11)
+                    )
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with self.captureOnCommitCallbacks(execute=True):
+                Schedule.objects.create(
+                    psychologist=self.profiles[1], day_of_week='TUESDAY', start_time=time(9), end_time=time(11)
+                )
+        refresh.assert_called_once()
+
+    def test_directory_orders_by_availability(self):
+        self.add_schedule(self.profiles[1], 21)
+        response = self.api.get('/api/profiles/public/psychologists/', {'ordering': 'availability'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.profiles[1].id, self.profiles[0].id])
+        self.assertIsNotNone(response.data['results'][0]['next_available_slot'])
+
+        response = self.api.get('/api/profiles/public/psychologists/', {'available_within_days': 7})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.profiles[1].id])
+
+
+class BookingServiceTests(TestCase):
+    def setUp(self):
+        psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.psychologist = PsychologistProfile.objects.get(user=psychologist_user)
+        self.psychologist.slot_step_minutes = 30
+        self.psychologist.save()
+        Schedule.objects.create(
+            psychologist=self.psychologist, day_of_week='MONDAY',
+            start_time=time(9), end_time=time(13)
+        )
+        self.clients = []
+        for index in range(2):
+            user = User.objects.create_user(
+                email=f'client{index}@example.com', username=f'client{index}@example.com',
+                password='testpass123', user_type='client'
+            )
+            self.clients.append(ClientProfile.objects.get(user=user))
+
+    def book(self, client, start, **save_kwargs):
+        serializer = AppointmentCreateSerializer(data={
+            'psychologist': self.psychologist.id, 'date': MONDAY.isoformat(),
+            'start_time': start, 'end_time': (datetime.strptime(start, '%H:%M') + timedelta(hours=1)).strftime('%H:%M'),
+        })
+        serializer.is_valid(raise_exception=True)
+        save_kwargs.setdefault('status', 'PENDING_PAYMENT')
+        return book_appointment(serializer, client=client, payment_amount=Decimal('0'), **save_kwargs)
+
+    def test_same_start_race_becomes_validation_error(self):
+        # El segundo cliente valida antes de que el primero guarde
+        serializer = AppointmentCreateSerializer(data={
+            'psychologist': self.psychologist.id, 'date': MONDAY.isoformat(),
+            'start_time': '09:00', 'end_time': '10:00',
+        })
+        serializer.is_valid(raise_exception=True)
+        self.book(self.clients[0], '09:00')
+        with self.assertRaises(ValidationError):
+            book_appointment(serializer, client=self.clients[1], payment_amount=Decimal('0'), status='PENDING_PAYMENT')
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_claim_rejects_overlap_with_blocking_appointment(self):
+        first = self.book(self.clients[0], '09:00')
+        second = self.book(self.clients[1], '09:30')
+
+        with transaction.atomic():
+            claim_slot(first)
+            first.status = 'PAYMENT_UPLOADED'
+            first.save()
+
+        with self.assertRaises(ValidationError):
+            with transaction.atomic():
+                claim_slot(second)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PsychologistStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.psychologist = PsychologistProfile.objects.get(user=self.psychologist_user)
+        today = date.today()
+        for index, (offset, appointment_status) in enumerate([
+            (-40, 'COMPLETED'), (-3, 'COMPLETED'), (-2, 'CONFIRMED'), (-1, 'CANCELLED'),
+            (2, 'PENDING_PAYMENT'), (3, 'CONFIRMED'), (4, 'CANCELLED'), (5, 'CONFIRMED'),
+        ]):
+            client_user = User.objects.create_user(
+                email=f'client{index}@example.com', username=f'client{index}@example.com',
+                password='testpass123', user_type='client', first_name=f'Cliente{index}'
+            )
+            Appointment.objects.create(
+                psychologist=self.psychologist, client=ClientProfile.objects.get(user=client_user),
+                date=today + timedelta(days=offset), start_time=time(10), end_time=time(11),
+                status=appointment_status, payment_amount=Decimal('0')
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.psychologist_user)
+
+    def get_stats(self):
+        response = self.api.get('/api/appointments/psychologist-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counts_and_upcoming(self):
+        data = self.get_stats()
+        self.assertEqual(data['totalAppointments'], 8)
+        self.assertEqual(data['completedAppointments'], 2)
+        self.assertEqual(data['pendingPaymentAppointments'], 1)
+        self.assertEqual(data['activeClients'], 4)
+        self.assertEqual(
+            [appt['client_name'].strip() for appt in data['upcomingAppointments']],
+            ['Cliente4', 'Cliente5', 'Cliente7']
+        )
+
+    def test_query_count(self):
+        # Perfil + agregación + próximas citas; luego solo el perfil
+        with self.assertNumQueries(3):
+            self.get_stats()
+        with self.assertNumQueries(1):
+            self.get_stats()
+
+    def test_status_change_invalidates_cache(self):
+        self.assertEqual(self.get_stats()['completedAppointments'], 2)
+        appointment = Appointment.objects.get(psychologist=self.psychologist, status='PENDING_PAYMENT')
+        appointment.status = 'COMPLETED'
+        appointment.save()
+        data = self.get_stats()
+        self.assertEqual(data['completedAppointments'], 3)
+        self.assertEqual(data['pendingPaymentAppointments'], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ClientStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.client_user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        psychologist = PsychologistProfile.objects.get(user=psychologist_user)
+        self.client_profile = ClientProfile.objects.get(user=self.client_user)
+        today = date.today()
+        for offset, appointment_status in [
+            (-20, 'COMPLETED'), (-5, 'COMPLETED'), (-1, 'NO_SHOW'),
+            (3, 'CONFIRMED'), (4, 'PENDING_PAYMENT'), (6, 'CANCELLED'),
+        ]:
+            Appointment.objects.create(
+                psychologist=psychologist, client=self.client_profile,
+                date=today + timedelta(days=offset), start_time=time(10), end_time=time(11),
+                status=appointment_status, payment_amount=Decimal('0')
+            )
+        self.last_session = today - timedelta(days=5)
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.client_user)
+
+    def test_both_endpoints_share_stats(self):
+        expected = {
+            'totalAppointments': 6,
+            'upcomingAppointments': 2,
+            'completedAppointments': 2,
+            'lastSessionDate': self.last_session,
+        }
+        stats = self.api.get('/api/appointments/client-stats/').data
+        self.assertEqual(stats, expected)
+        test_stats = self.api.get('/api/appointments/test-stats/').data
+        self.assertEqual({key: test_stats[key] for key in expected}, expected)
+
+    def test_query_count(self):
+        # Perfil + agregación; luego solo el perfil, también desde test-stats
+        with self.assertNumQueries(2):
+            self.api.get('/api/appointments/client-stats/')
+        with self.assertNumQueries(1):
+            self.api.get('/api/appointments/test-stats/')
+
+    def test_appointment_write_invalidates_cache(self):
+        self.assertEqual(self.api.get('/api/appointments/client-stats/').data['completedAppointments'], 2)
+        Appointment.objects.filter(client=self.client_profile, status='NO_SHOW').get().delete()
+        appointment = Appointment.objects.get(client=self.client_profile, status='CONFIRMED')
+        appointment.status = 'COMPLETED'
+        appointment.save()
+        data = self.api.get('/api/appointments/client-stats/').data
+        self.assertEqual(data['totalAppointments'], 5)
+        self.assertEqual(data['completedAppointments'], 3)
+        self.assertEqual(data['lastSessionDate'], appointment.date)
+
+
+class AppointmentListQueryTests(TestCase):
+    ENDPOINTS = [
+        ('admin', '/api/appointments/admin-payment-verification/'),
+        ('psychologist', '/api/appointments/my-appointments/'),
+        ('psychologist', '/api/appointments/psychologist-pending-payments/'),
+        ('client', '/api/appointments/client-appointments/'),
+        ('client', '/api/comments/client/pending-appointments/'),
+    ]
+
+    def setUp(self):
+        self.users = {
+            user_type: User.objects.create_user(
+                email=f'{user_type}@example.com', username=f'{user_type}@example.com',
+                password='testpass123', user_type=user_type
+            )
+            for user_type in ('admin', 'psychologist', 'client')
+        }
+        self.psychologist = PsychologistProfile.objects.get(user=self.users['psychologist'])
+        self.client_profile = ClientProfile.objects.get(user=self.users['client'])
+        self.created = 0
+
+    def add_appointments(self, total):
+        # Cada listado filtra por estado distinto: se crean ``total`` citas de cada uno
+        yesterday = date.today() - timedelta(days=1)
+        appointments = Appointment.objects.bulk_create([
+            Appointment(
+                psychologist=self.psychologist, client=self.client_profile,
+                date=yesterday - timedelta(days=offset),
+                start_time=time(index // 60, index % 60), end_time=time(23, 59),
+                status=appointment_status, payment_amount=Decimal('0'),
+                payment_verified_by=self.users['admin'],
+            )
+            for index in range(self.created, total)
+            for offset, appointment_status in enumerate(['COMPLETED', 'CONFIRMED'])
+        ])
+        PaymentDetail.objects.bulk_create([
+            PaymentDetail(appointment=appointment, payment_method='transfer') for appointment in appointments
+        ])
+        self.created = total
+
+    def query_counts(self):
+        counts = []
+        for user_type, url in self.ENDPOINTS:
+            api = APIClient()
+            api.force_authenticate(user=self.users[user_type])
+            with CaptureQueriesContext(connection) as queries:
+                response = api.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            counts.append(len(queries))
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_appointments(1)
+        expected = self.query_counts()
+        for total in (10, 1000):
+            self.add_appointments(total)
+            self.assertEqual(self.query_counts(), expected, f"{total} citas")
+
+
+class AdminPaymentVerificationTests(TestCase):
+    URL = '/api/appointments/admin-payment-verification/'
+
+    def setUp(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', username='admin@example.com',
+            password='testpass123', user_type='admin'
+        )
+        psychologist = PsychologistProfile.objects.get(user=User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        ))
+        client = ClientProfile.objects.get(user=User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client', first_name='Ana'
+        ))
+        # Varias citas comparten created_at: el id desempata el cursor
+        created = datetime(2030, 1, 1, 12)
+        Appointment.objects.bulk_create([
+            Appointment(
+                psychologist=psychologist, client=client, date=MONDAY + timedelta(days=index),
+                start_time=time(10), end_time=time(11), payment_amount=Decimal('100'),
+                status=('CONFIRMED', 'PAYMENT_UPLOADED')[index % 2],
+                created_at=created + timedelta(hours=index // 3),
+            )
+            for index in range(11)
+        ])
+        self.expected = list(Appointment.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.api = APIClient()
+        self.api.force_authenticate(user=admin)
+
+    def test_cursor_walks_every_row_once(self):
+        ids = []
+        response = self.api.get(self.URL, {'page_size': 4})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.api.get(response.data['next'])
+        self.assertEqual(ids, self.expected)
+
+    def test_filters_apply_to_pages(self):
+        response = self.api.get(self.URL, {'status': 'PAYMENT_UPLOADED', 'page_size': 50})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.api.get(self.URL, {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_streaming_exports(self):
+        response = self.api.get(self.URL, {'export': 'ndjson'})
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], self.expected)
+
+        response = self.api.get(self.URL, {'export': 'csv', 'status': 'CONFIRMED'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'created_at', 'date'])
+        self.assertEqual(len(lines), 1 + 6)
+
+        self.assertEqual(self.api.get(self.URL, {'export': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin@example.com',
+            password='testpass123', user_type='admin'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.admin)
+
+    def test_requests_are_recorded_by_view_and_action(self):
+        response = self.api.get('/api/appointments/admin-payment-verification/')
+        self.assertEqual(response.request_metrics['view'], 'AppointmentViewSet.admin_payment_verification')
+        self.assertEqual(response.request_metrics['queries'], 1)
+        self.api.get('/api/appointments/admin-payment-verification/')
+
+        data = self.api.get('/api/metrics/requests/').data
+        stats = data['endpoints']['AppointmentViewSet.admin_payment_verification']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['queries_max'], 1)
+        self.assertIn('AppointmentViewSet.available_slots', data['budgets'])
+
+        self.assertEqual(self.api.delete('/api/metrics/requests/').status_code, status.HTTP_204_NO_CONTENT)
+        # La propia petición DELETE queda registrada después de reiniciar
+        self.assertEqual(self.api.get('/api/metrics/requests/').data['endpoints'].keys(), {'request_metrics.delete'})
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.assertEqual(APIClient().get('/api/metrics/requests/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_strict_budget_fails_the_request(self):
+        with override_settings(QUERY_BUDGETS_STRICT=True):
+            self.api.get('/api/appointments/admin-payment-verification/')
+            with mock.patch('backend.metrics.load_budgets', return_value={
+                'AppointmentViewSet.admin_payment_verification': {'queries': 0}
+            }):
+                with self.assertRaises(QueryBudgetExceeded):
+                    self.api.get('/api/appointments/admin-payment-verification/')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "EXPLAIN de PostgreSQL")
+class HotQueryPlanTests(TestCase):
+    """
+    Cada consulta frecuente usa el índice creado para ella (``EXPECTED_INDEXES``).
+
+    Por defecto se siembran 2.000 citas para que el test sea rápido; con tan
+    pocos datos el planificador preferiría recorrer la tabla, así que se
+    desalienta el ``Seq Scan`` y el test solo prueba que el índice previsto es
+    utilizable y el más barato entre los índices. Con
+    ``QUERY_PLAN_TEST_APPOINTMENTS`` >= ``REALISTIC_APPOINTMENTS`` (por ejemplo
+    1000000, como ``manage.py explain_hot_queries --seed``) el planificador
+    elige libremente, igual que en producción.
+    """
+    APPOINTMENTS = int(os.getenv('QUERY_PLAN_TEST_APPOINTMENTS', '2000'))
+    REALISTIC_APPOINTMENTS = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        psychologist_ids, client_ids = seed_dataset(
+            appointments=cls.APPOINTMENTS,
+            psychologists=max(20, cls.APPOINTMENTS // 5000),
+            clients=max(200, cls.APPOINTMENTS // 50),
+        )
+        cls.psychologist_id = psychologist_ids[0]
+        cls.client_id = client_ids[0]
+
+    def test_hot_queries_use_their_indexes(self):
+        if self.APPOINTMENTS < self.REALISTIC_APPOINTMENTS:
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, plan, indexed in check_plans(self.psychologist_id, self.client_id):
+            with self.subTest(name):
+                self.assertTrue(indexed, f"Se esperaba {' o '.join(EXPECTED_INDEXES[name])}:\n{plan}")
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentBookingTests(TransactionTestCase):
+    """Muchas reservas simultáneas sobre horarios que se cruzan (requiere PostgreSQL)."""
+    BOOKINGS = 200
+    WORKERS = 20
+
+    def setUp(self):
+        psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.psychologist = PsychologistProfile.objects.get(user=psychologist_user)
+        self.psychologist.slot_step_minutes = 15
+        self.psychologist.save()
+        Schedule.objects.create(
+            psychologist=self.psychologist, day_of_week='MONDAY',
+            start_time=time(9), end_time=time(13)
+        )
+        client_user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.client_profile = ClientProfile.objects.get(user=client_user)
+
+    def attempt(self, start):
+        started = time_module.perf_counter()
+        try:
+            serializer = AppointmentCreateSerializer(data={
+                'psychologist': self.psychologist.id, 'date': MONDAY.isoformat(),
+                'start_time': to_time(start).strftime('%H:%M'),
+                'end_time': to_time(start + 60).strftime('%H:%M'),
+            })
+            if serializer.is_valid():
+                book_appointment(
+                    serializer, client=self.client_profile,
+                    payment_amount=Decimal('0'), status='CONFIRMED'
+                )
+        except ValidationError:
+            pass
+        finally:
+            connection.close()
+        return time_module.perf_counter() - started
+
+    def test_no_double_booking_under_load(self):
+        rng = random.Random(7)
+        starts = [rng.randrange(9 * 60, 12 * 60 + 1, 15) for _ in range(self.BOOKINGS)]
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            latencies = sorted(pool.map(self.attempt, starts))
+
+        booked = sorted(
+            (to_minutes(start), to_minutes(end))
+            for start, end in Appointment.objects.filter(
+                psychologist=self.psychologist, status__in=BLOCKING_STATUSES
+            ).values_list('start_time', 'end_time')
+        )
+        self.assertTrue(booked)
+        for (_, previous_end), (next_start, _) in zip(booked, booked[1:]):
+            self.assertLessEqual(previous_end, next_start)
+
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.assertLess(p99, 2.0)
+
+
+class PaymentProofDeliveryTests(TestCase):
+    CONTENT = bytes(range(256)) * 40
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        psychologist_user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.client_user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.appointment = Appointment.objects.create(
+            psychologist=PsychologistProfile.objects.get(user=psychologist_user),
+            client=ClientProfile.objects.get(user=self.client_user),
+            date=MONDAY, start_time=time(10), end_time=time(11), payment_amount=Decimal('100')
+        )
+        self.appointment.payment_proof.save('comprobante.pdf', ContentFile(self.CONTENT))
+        self.url = f'/api/appointments/{self.appointment.pk}/download-payment-proof/'
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.client_user)
+
+    def test_streams_whole_file(self):
+        response = self.api.get(self.url, {'view': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(self.CONTENT)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_and_etag(self):
+        etag = self.api.get(self.url)['ETag']
+        response = self.api.get(self.url, HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[100:300])
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.CONTENT)}')
+
+        response = self.api.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[-10:])
+        # If-Range con otro ETag: el archivo cambió y se entrega completo
+        response = self.api.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.api.get(self.url, HTTP_RANGE=f'bytes={len(self.CONTENT)}-').status_code, 416)
+        self.assertEqual(self.api.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_proxy_modes(self):
+        with override_settings(PROTECTED_MEDIA_MODE='x-accel-redirect'):
+            response = self.api.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.appointment.payment_proof.name}')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+
+        with override_settings(PROTECTED_MEDIA_MODE='x-sendfile'):
+            response = self.api.get(self.url)
+        self.assertEqual(response['X-Sendfile'], os.path.realpath(self.appointment.payment_proof.path))
+
+    def test_signed_url_is_checked_without_queries(self):
+        response = self.api.get(f'/api/appointments/{self.appointment.pk}/payment-proof-url/', {'view': 'true'})
+        self.assertEqual(response.status_code, 200)
+        url = response.data['url']
+
+        anonymous = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = anonymous.get(url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[:100])
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+
+        # Firma alterada, de otro tipo de archivo o vencida
+        kind = url.rstrip('/').split('/')[-2]
+        self.assertEqual(anonymous.get(url[:-3] + 'xx/').status_code, 403)
+        self.assertEqual(anonymous.get(url.replace(f'/{kind}/', '/document/')).status_code, 403)
+        with override_settings(SIGNED_FILE_URL_MAX_AGE=-1):
+            self.assertEqual(anonymous.get(url).status_code, 403)
+
+    def test_listings_only_return_signed_urls(self):
+        response = self.api.get(f'/api/appointments/{self.appointment.pk}/')
+        self.assertEqual(response.status_code, 200)
+        for field in ('payment_proof', 'payment_proof_url'):
+            self.assertIn('/api/files/payment_proof/', response.data[field])
+            self.assertNotIn(self.appointment.payment_proof.name, response.data[field])
+        # /media/ ya no entrega los archivos protegidos
+        self.assertEqual(APIClient().get(self.appointment.payment_proof.url).status_code, 404)
+
+    def test_other_clients_are_rejected(self):
+        other = User.objects.create_user(
+            email='other@example.com', username='other@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.api.force_authenticate(user=other)
+        self.assertIn(self.api.get(self.url).status_code, (403, 404))
+        response = self.api.get(f'/api/appointments/{self.appointment.pk}/payment-proof-url/')
+        self.assertIn(response.status_code, (403, 404))
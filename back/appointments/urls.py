@@ -1,4 +1,5 @@
 from django.urls import path, include
+from rest_framework.permissions import AllowAny
 from rest_framework.routers import DefaultRouter
 from .views import AppointmentViewSet
 
@@ -26,6 +27,9 @@ urlpatterns = [
     path('available-slots/', AppointmentViewSet.as_view({
         'get': 'available_slots',
     }), name='available-slots'),
+    path('batch-available-slots/', AppointmentViewSet.as_view({
+        'get': 'batch_available_slots',
+    }, permission_classes=[AllowAny]), name='batch-available-slots'),
     path('create/', AppointmentViewSet.as_view({
         'post': 'create_with_payment',
     }), name='create-with-payment'),
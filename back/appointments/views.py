@@ -1,20 +1,24 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Appointment
 from .serializers import AppointmentSerializer, AppointmentCreateSerializer
+from .availability import AvailabilityEngine
+from .booking import book_appointment, claim_slot
+from .stats import get_client_stats, get_psychologist_stats
 from payments.models import PaymentDetail  # Import from payments app
 from payments.serializers import PaymentDetailSerializer  # Import from payments app
 from profiles.models import PsychologistProfile, ClientProfile
+from profiles.filters import public_psychologists
+from profiles.images import image_sizes
 from pricing.models import PsychologistPrice  # Add this import
-from schedules.models import Schedule
 from authentication.permissions import IsClient, IsPsychologist, IsAdminUser
 from rest_framework import serializers
 import os
-from django.http import HttpResponse
 from backend.email_utils import (
     send_appointment_created_client_email,
     send_appointment_created_psychologist_email,
@@ -24,6 +28,35 @@ from backend.email_utils import (
     send_review_opportunity_email
 )
 from django.conf import settings
+from backend.file_delivery import protected_file_response
+from backend.pagination import KeysetPagination
+from backend.signed_urls import max_age, signed_file_url
+from backend.storage import release_files
+from backend.streaming import EXPORT_FORMATS, csv_response, iterate, ndjson_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Límites del endpoint de disponibilidad en lote
+BATCH_MAX_PSYCHOLOGISTS = 50
+BATCH_MAX_DAYS = 60
+BATCH_MAX_SLOTS = 10
+
+# Columnas de la exportación CSV de admin_payment_verification
+ADMIN_EXPORT_COLUMNS = [
+    ('id', lambda appt: appt.id),
+    ('created_at', lambda appt: appt.created_at.isoformat()),
+    ('date', lambda appt: appt.date.isoformat()),
+    ('start_time', lambda appt: appt.start_time.strftime('%H:%M')),
+    ('end_time', lambda appt: appt.end_time.strftime('%H:%M')),
+    ('status', lambda appt: appt.status),
+    ('client_name', lambda appt: appt.client.user.get_full_name()),
+    ('client_email', lambda appt: appt.client.user.email),
+    ('psychologist_name', lambda appt: appt.psychologist.user.get_full_name()),
+    ('payment_amount', lambda appt: appt.payment_amount),
+    ('payment_method', lambda appt: getattr(getattr(appt, 'payment_detail', None), 'payment_method', None) or ''),
+    ('payment_verified_by', lambda appt: appt.payment_verified_by.get_full_name() if appt.payment_verified_by else ''),
+]
 
 class AppointmentViewSet(viewsets.ModelViewSet):
     """API endpoint para gestión de citas"""
@@ -32,23 +65,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Appointment.objects.none()
         
         if user.user_type == 'admin':
-            return Appointment.objects.all()
+            queryset = Appointment.objects.all()
         elif user.user_type == 'psychologist':
             try:
                 psychologist = PsychologistProfile.objects.get(user=user)
-                return Appointment.objects.filter(psychologist=psychologist)
+                queryset = Appointment.objects.filter(psychologist=psychologist)
             except PsychologistProfile.DoesNotExist:
-                return Appointment.objects.none()
+                pass
         elif user.user_type == 'client':
             try:
                 client = ClientProfile.objects.get(user=user)
-                return Appointment.objects.filter(client=client)
+                queryset = Appointment.objects.filter(client=client)
             except ClientProfile.DoesNotExist:
-                return Appointment.objects.none()
+                pass
         
-        return Appointment.objects.none()
+        return AppointmentSerializer.setup_queryset(queryset)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -84,7 +118,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 # Fallback to default price if no approved price exists
                 price = 0
         except Exception as e:
-            print(f"Error getting price: {str(e)}")
+            logger.warning("Error getting price: %s", e)
             price = 0
         
         # Extract payment_method if it exists in the validated data
@@ -97,7 +131,9 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         date = serializer.validated_data.get('date')
         
         # Save the appointment with the client and price
-        appointment = serializer.save(
+        # (bloqueando el día del psicólogo para que dos reservas no se crucen)
+        appointment = book_appointment(
+            serializer,
             client=client,
             payment_amount=price,
             status='PENDING_PAYMENT'
@@ -111,7 +147,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     payment_method=payment_method
                 )
             except Exception as e:
-                print(f"Error creating payment detail: {str(e)}")
+                logger.warning("Error creating payment detail: %s", e)
                 # Don't fail the appointment creation if payment detail creation fails
         
         # Determinar si es primera cita
@@ -123,16 +159,14 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Enviar correo al cliente con instrucciones de pago
         try:
             send_appointment_created_client_email(appointment)
-            print(f"✅ Correo de cita agendada enviado al cliente: {client.user.email}")
-        except Exception as e:
-            print(f"❌ Error al enviar correo al cliente: {str(e)}")
+        except Exception:
+            logger.exception("Error al enviar correo de cita agendada al cliente (cita %s)", appointment.id)
         
         # Enviar correo al psicólogo
         try:
             send_appointment_created_psychologist_email(appointment, is_first_appointment)
-            print(f"✅ Correo de cita agendada enviado al psicólogo: {psychologist.user.email}")
-        except Exception as e:
-            print(f"❌ Error al enviar correo al psicólogo: {str(e)}")
+        except Exception:
+            logger.exception("Error al enviar correo de cita agendada al psicólogo (cita %s)", appointment.id)
         
         return appointment
     
@@ -150,7 +184,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            psychologist = PsychologistProfile.objects.get(id=psychologist_id)
+            psychologist = PsychologistProfile.objects.select_related('user').get(id=psychologist_id)
             
             # Parse dates or use defaults (current week)
             today = timezone.now().date()
@@ -163,62 +197,9 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get the psychologist's schedule
-            schedules = Schedule.objects.filter(psychologist=psychologist)
-            
-            # Get existing appointments
-            existing_appointments = Appointment.objects.filter(
-                psychologist=psychologist,
-                date__gte=start_date,
-                date__lte=end_date,
-                status__in=['PAYMENT_VERIFIED', 'CONFIRMED', 'PAYMENT_UPLOADED']
-            )
-            
-            # Generate available slots
-            available_slots = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                day_name = current_date.strftime('%A').upper()
-                day_schedules = schedules.filter(day_of_week=day_name)
-                
-                day_slots = []
-                for schedule in day_schedules:
-                    # Generate hourly slots within this schedule
-                    slot_start = schedule.start_time
-                    while slot_start < schedule.end_time:
-                        slot_end = (
-                            datetime.combine(today, slot_start) + timedelta(hours=1)
-                        ).time()
-                        
-                        # Check if this slot overlaps with any existing appointment
-                        is_available = True
-                        for appointment in existing_appointments:
-                            if (
-                                appointment.date == current_date and
-                                appointment.start_time < slot_end and
-                                appointment.end_time > slot_start
-                            ):
-                                is_available = False
-                                break
-                        
-                        if is_available:
-                            day_slots.append({
-                                "start_time": slot_start.strftime('%H:%M'),
-                                "end_time": slot_end.strftime('%H:%M')
-                            })
-                        
-                        # Move to next slot
-                        slot_start = slot_end
-                
-                if day_slots:
-                    available_slots.append({
-                        "date": current_date.strftime('%Y-%m-%d'),
-                        "day_name": current_date.strftime('%A'),
-                        "slots": day_slots
-                    })
-                
-                current_date += timedelta(days=1)
+            # Cargar horarios y citas una sola vez y generar los horarios libres
+            engine = AvailabilityEngine.for_psychologist(psychologist, start_date, end_date)
+            available_slots = engine.available_slots(start_date, end_date)
             
             return Response({
                 "psychologist_id": psychologist.id,
@@ -231,7 +212,73 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 {"detail": "No se encontró el perfil del psicólogo."},
                 status=status.HTTP_404_NOT_FOUND
             )
-    
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def batch_available_slots(self, request):
+        """
+        Próximos horarios libres de varios psicólogos para el directorio.
+        Acepta `psychologist_ids` (separados por coma) o los mismos filtros del
+        directorio público, y devuelve los primeros `limit` horarios de cada uno.
+        """
+        ids_param = request.query_params.get('psychologist_ids')
+        start_date_str = request.query_params.get('start_date')
+        end_date_str = request.query_params.get('end_date')
+
+        now = timezone.now()
+        today = now.date()
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else today
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else (start_date + timedelta(days=14))
+        except ValueError:
+            return Response(
+                {"detail": "Formato de fecha inválido. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if end_date < start_date or (end_date - start_date).days > BATCH_MAX_DAYS:
+            return Response(
+                {"detail": f"El rango de fechas debe ser de máximo {BATCH_MAX_DAYS} días."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', 3)), BATCH_MAX_SLOTS)
+            if ids_param:
+                psychologist_ids = list(dict.fromkeys(
+                    int(value) for value in ids_param.split(',') if value.strip()
+                ))
+            else:
+                psychologist_ids = list(
+                    public_psychologists(request.query_params).order_by('id').values_list('id', flat=True)[:BATCH_MAX_PSYCHOLOGISTS]
+                )
+        except ValueError:
+            return Response(
+                {"detail": "Los parámetros psychologist_ids y limit deben ser números enteros."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(psychologist_ids) > BATCH_MAX_PSYCHOLOGISTS:
+            return Response(
+                {"detail": f"Se pueden consultar como máximo {BATCH_MAX_PSYCHOLOGISTS} psicólogos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Dos consultas para todos los psicólogos y un barrido en memoria por cada uno
+        engines = AvailabilityEngine.for_psychologists(psychologist_ids, start_date, end_date)
+        results = []
+        for psychologist_id in psychologist_ids:
+            engine = engines.get(psychologist_id)
+            results.append({
+                "psychologist_id": psychologist_id,
+                "next_slots": engine.next_slots(start_date, end_date, max(limit, 0), not_before=now) if engine else []
+            })
+
+        return Response({
+            "start_date": start_date.strftime('%Y-%m-%d'),
+            "end_date": end_date.strftime('%Y-%m-%d'),
+            "results": results
+        })
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsClient])
     def upload_payment(self, request, pk=None):
         """Endpoint para que el cliente suba el comprobante de pago"""
@@ -272,20 +319,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Create a custom upload path for the payment proof
-            # Format: client_payment_proofs/client_id/appointment_id/filename
-            original_filename = payment_proof.name
-            file_extension = original_filename.split('.')[-1] if '.' in original_filename else ''
-            new_filename = f"comprobante_{appointment.id}.{file_extension}" if file_extension else f"comprobante_{appointment.id}"
+            # El storage nombra el archivo con el sha256 de su contenido
+            # (cas/<ab>/<sha256>.<ext>); la descarga lo entrega como comprobante_<id>.
+            previous_proof = appointment.payment_proof.name
             
-            # Set the new path and filename
-            upload_path = f"client_payment_proofs/{client.id}/{appointment.id}/{new_filename}"
-            payment_proof.name = upload_path
-            
-            # Update appointment
-            appointment.payment_proof = payment_proof
-            appointment.status = 'PAYMENT_UPLOADED'
-            appointment.save()
+            # Update appointment. Con el comprobante la cita pasa a ocupar agenda:
+            # se bloquea el día y se verifica que nadie haya tomado el horario.
+            try:
+                with transaction.atomic():
+                    claim_slot(appointment)
+                    appointment.payment_proof = payment_proof
+                    appointment.status = 'PAYMENT_UPLOADED'
+                    appointment.save()
+                    release_files([previous_proof])
+            except serializers.ValidationError as e:
+                return Response(
+                    {"detail": e.detail[0]},
+                    status=status.HTTP_409_CONFLICT
+                )
             
             # Update payment details
             payment_detail, created = PaymentDetail.objects.get_or_create(appointment=appointment)
@@ -306,9 +357,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 frontend_url = getattr(settings, 'FRONTEND_URL', 'https://emindapp.cl')
                 
                 send_payment_verification_needed_email(appointment, frontend_url)
-                print(f"✅ Correo de verificación de pago enviado al psicólogo: {appointment.psychologist.user.email}")
-            except Exception as e:
-                print(f"❌ Error al enviar correo de verificación al psicólogo: {str(e)}")
+            except Exception:
+                logger.exception("Error al enviar correo de verificación de pago (cita %s)", appointment.id)
             
             return Response({
                 "detail": "Comprobante de pago subido correctamente. Un administrador verificará el pago pronto."
@@ -379,7 +429,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 payment_method = serializer.validated_data.pop('payment_method', None)
                 
                 # Save the appointment with the client and price
-                appointment = serializer.save(
+                appointment = book_appointment(
+                    serializer,
                     client=client,
                     payment_amount=price,
                     status='PENDING_PAYMENT'
@@ -393,7 +444,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 
                 # Return the created appointment
                 return Response(
-                    AppointmentSerializer(appointment).data,
+                    AppointmentSerializer(appointment, context={'request': request}).data,
                     status=status.HTTP_201_CREATED
                 )
                 
@@ -413,11 +464,11 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             psychologist = PsychologistProfile.objects.get(id=psychologist_id)
             
             # Get appointments for this psychologist
-            appointments = Appointment.objects.filter(
+            appointments = AppointmentSerializer.setup_queryset(Appointment.objects.filter(
                 psychologist=psychologist,
                 # Filter by status to only include active appointments
                 status__in=['PENDING_PAYMENT', 'PAYMENT_UPLOADED', 'PAYMENT_VERIFIED', 'CONFIRMED']
-            )
+            ))
             
             serializer = self.get_serializer(appointments, many=True)
             return Response(serializer.data)
@@ -446,7 +497,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             status_filter = request.query_params.get('status')
             
             # Iniciar con todas las citas del psicólogo
-            queryset = Appointment.objects.filter(psychologist=psychologist)
+            queryset = AppointmentSerializer.setup_queryset(Appointment.objects.filter(psychologist=psychologist))
             
             # Aplicar filtros si se proporcionan
             if start_date_str:
@@ -541,9 +592,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 try:
                     frontend_url = getattr(settings, 'FRONTEND_URL', 'https://emindapp.cl')
                     send_review_opportunity_email(appointment, frontend_url)
-                    print(f"✅ Correo de oportunidad de comentario enviado al cliente: {appointment.client.user.email}")
-                except Exception as e:
-                    print(f"❌ Error al enviar correo de oportunidad de comentario: {str(e)}")
+                except Exception:
+                    logger.exception("Error al enviar correo de oportunidad de comentario (cita %s)", appointment.id)
 
             
             return Response({
@@ -614,7 +664,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             )
         
         # Obtener todas las citas del cliente
-        appointments = Appointment.objects.filter(client=client)
+        appointments = AppointmentSerializer.setup_queryset(Appointment.objects.filter(client=client))
         
         # Fecha actual para comparar
         today = timezone.now().date()
@@ -740,7 +790,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             
             return Response({
                 "detail": "Cita cancelada correctamente.",
-                "appointment": AppointmentSerializer(appointment).data
+                "appointment": AppointmentSerializer(appointment, context={'request': request}).data
             })
             
         except Appointment.DoesNotExist:
@@ -751,9 +801,15 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsAdminUser], url_path='admin-payment-verification')
     def admin_payment_verification(self, request):
-        """Endpoint para que los administradores vean todas las citas"""
+        """
+        Endpoint para que los administradores vean todas las citas, de la más
+        reciente a la más antigua, paginadas por cursor sobre (created_at, id):
+        la respuesta es ``{"next": url | null, "results": [...]}``.
+        Con ``?export=ndjson`` o ``?export=csv`` devuelve todas las citas
+        filtradas en streaming.
+        """
         # Obtener todas las citas sin filtrar por estado por defecto
-        appointments = Appointment.objects.all().order_by('-created_at')
+        appointments = AppointmentSerializer.setup_queryset(Appointment.objects.all())
         
         # Opción de filtrado por psicólogo
         psychologist_id = request.query_params.get('psychologist_id')
@@ -795,8 +851,22 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        serializer = self.get_serializer(appointments, many=True)
-        return Response(serializer.data)
+        export = request.query_params.get('export')
+        if export:
+            if export not in EXPORT_FORMATS:
+                return Response(
+                    {"detail": f"Formato de exportación inválido. Use: {', '.join(EXPORT_FORMATS)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = iterate(appointments.order_by(*KeysetPagination.ordering))
+            if export == 'csv':
+                return csv_response(rows, ADMIN_EXPORT_COLUMNS, 'citas')
+            return ndjson_response((self.get_serializer(appt).data for appt in rows), 'citas')
+        
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(appointments, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsPsychologist])
     def psychologist_pending_payments(self, request):
@@ -806,10 +876,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             psychologist = PsychologistProfile.objects.get(user=user)
             
             # Filtrar citas del psicólogo con pagos subidos pero no verificados
-            appointments = Appointment.objects.filter(
+            appointments = AppointmentSerializer.setup_queryset(Appointment.objects.filter(
                 psychologist=psychologist,
                 status__in=['PAYMENT_UPLOADED', 'PAYMENT_VERIFIED', 'CONFIRMED']
-            ).order_by('-created_at')
+            )).order_by('-created_at')
             
             # Opción de filtrado por estado
             status_filter = request.query_params.get('status')
@@ -928,95 +998,74 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 
                 # Enviar correo de confirmación al cliente con enlace a Google Calendar
                 send_appointment_confirmed_client_email(appointment, frontend_url)
-                print(f"✅ Correo de confirmación enviado al cliente: {appointment.client.user.email}")
                 
                 # Enviar correo de confirmación al psicólogo
                 send_appointment_confirmed_psychologist_email(appointment, frontend_url)
-                print(f"✅ Correo de confirmación enviado al psicólogo: {appointment.psychologist.user.email}")
-            except Exception as e:
-                print(f"❌ Error al enviar correos de confirmación: {str(e)}")
+            except Exception:
+                logger.exception("Error al enviar correos de confirmación (cita %s)", appointment.id)
         
         return Response({
             "detail": f"Estado actualizado a '{appointment.get_status_display()}'.",
-            "appointment": AppointmentSerializer(appointment).data
+            "appointment": AppointmentSerializer(appointment, context={'request': request}).data
         })
 
-    @action(detail=True, methods=['get'], url_path='download-payment-proof')
-    def download_payment_proof(self, request, pk=None):
-        """Endpoint para descargar el comprobante de pago"""
-        try:
-            # Verificar si se recibió un token explícito en la URL (para visualizaciones en nueva pestaña)
-            token_param = request.query_params.get('token')
-            view_mode = request.query_params.get('view', 'false').lower() == 'true'
-            
-            # Si hay un token en los parámetros, usarlo para la autenticación
-            if token_param:
-                from rest_framework_simplejwt.tokens import AccessToken
-                from rest_framework_simplejwt.exceptions import TokenError
-                try:
-                    # Validar el token y obtener el usuario
-                    token = AccessToken(token_param)
-                    user_id = token.payload.get('user_id')
-                    
-                    from django.contrib.auth import get_user_model
-                    User = get_user_model()
-                    
-                    user = User.objects.get(id=user_id)
-                    request.user = user
-                except (TokenError, User.DoesNotExist) as e:
-                    return Response(
-                        {"detail": "Token inválido o expirado."},
-                        status=status.HTTP_401_UNAUTHORIZED
-                    )
-                
-            appointment = self.get_object()
-            
-            # Verificar permisos según el rol
-            user = request.user
-            
-            if user.user_type == 'admin':
-                # Los administradores pueden descargar cualquier comprobante
-                pass
-            elif user.user_type == 'psychologist':
-                # Los psicólogos solo pueden descargar comprobantes de sus propias citas
-                try:
-                    psychologist = PsychologistProfile.objects.get(user=user)
-                    if appointment.psychologist != psychologist:
-                        return Response(
-                            {"detail": "No tiene permiso para acceder a este comprobante."},
-                            status=status.HTTP_403_FORBIDDEN
-                        )
-                except PsychologistProfile.DoesNotExist:
-                    return Response(
-                        {"detail": "No se encontró el perfil de psicólogo."},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-            elif user.user_type == 'client':
-                # Los clientes solo pueden descargar comprobantes de sus propias citas
-                try:
-                    client = ClientProfile.objects.get(user=user)
-                    if appointment.client != client:
-                        return Response(
-                            {"detail": "No tiene permiso para acceder a este comprobante."},
-                            status=status.HTTP_403_FORBIDDEN
-                        )
-                except ClientProfile.DoesNotExist:
+    def _payment_proof_error(self, user, appointment):
+        """Respuesta de error si ``user`` no puede ver el comprobante de ``appointment``"""
+        if user.user_type == 'admin':
+            # Los administradores pueden descargar cualquier comprobante
+            pass
+        elif user.user_type == 'psychologist':
+            # Los psicólogos solo pueden descargar comprobantes de sus propias citas
+            try:
+                psychologist = PsychologistProfile.objects.get(user=user)
+                if appointment.psychologist != psychologist:
                     return Response(
-                        {"detail": "No se encontró el perfil de cliente."},
-                        status=status.HTTP_404_NOT_FOUND
+                        {"detail": "No tiene permiso para acceder a este comprobante."},
+                        status=status.HTTP_403_FORBIDDEN
                     )
-            else:
+            except PsychologistProfile.DoesNotExist:
                 return Response(
-                    {"detail": "No tiene permiso para acceder a este comprobante."},
-                    status=status.HTTP_403_FORBIDDEN
+                    {"detail": "No se encontró el perfil de psicólogo."},
+                    status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Verificar que exista el comprobante
-            if not appointment.payment_proof:
+        elif user.user_type == 'client':
+            # Los clientes solo pueden descargar comprobantes de sus propias citas
+            try:
+                client = ClientProfile.objects.get(user=user)
+                if appointment.client != client:
+                    return Response(
+                        {"detail": "No tiene permiso para acceder a este comprobante."},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+            except ClientProfile.DoesNotExist:
                 return Response(
-                    {"detail": "Esta cita no tiene comprobante de pago."},
+                    {"detail": "No se encontró el perfil de cliente."},
                     status=status.HTTP_404_NOT_FOUND
                 )
+        else:
+            return Response(
+                {"detail": "No tiene permiso para acceder a este comprobante."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Verificar que exista el comprobante
+        if not appointment.payment_proof:
+            return Response(
+                {"detail": "Esta cita no tiene comprobante de pago."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return None
+
+    @action(detail=True, methods=['get'], url_path='download-payment-proof')
+    def download_payment_proof(self, request, pk=None):
+        """Endpoint para descargar el comprobante de pago"""
+        try:
+            view_mode = request.query_params.get('view', 'false').lower() == 'true'
+            appointment = self.get_object()
+            
+            error = self._payment_proof_error(request.user, appointment)
+            if error is not None:
+                return error
             
             # Obtener la ruta del archivo
             file_path = appointment.payment_proof.path
@@ -1027,28 +1076,9 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Determinar el tipo de contenido basado en la extensión del archivo
-            import mimetypes
-            content_type, encoding = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
-            
-            # Obtener el nombre original del archivo
-            filename = os.path.basename(file_path)
-            
-            # Abrir y leer el archivo
-            with open(file_path, 'rb') as file:
-                response = HttpResponse(file.read(), content_type=content_type)
-            
-            # Establecer el encabezado Content-Disposition según el modo
-            if view_mode:
-                # Para visualización en el navegador
-                response['Content-Disposition'] = f'inline; filename="{filename}"'
-            else:
-                # Para descarga
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
+            # Sin cargar el archivo en memoria; en modo vista se muestra en el navegador
+            filename = f"comprobante_{appointment.id}{os.path.splitext(file_path)[1]}"
+            return protected_file_response(request, file_path, as_attachment=not view_mode, filename=filename)
             
         except Appointment.DoesNotExist:
             return Response(
@@ -1056,6 +1086,26 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @action(detail=True, methods=['get'], url_path='payment-proof-url')
+    def payment_proof_url(self, request, pk=None):
+        """
+        URL firmada del comprobante para abrirlo en otra pestaña sin el JWT
+        (ver backend/signed_urls.py)
+        """
+        view_mode = request.query_params.get('view', 'false').lower() == 'true'
+        appointment = self.get_object()
+        
+        error = self._payment_proof_error(request.user, appointment)
+        if error is not None:
+            return error
+        
+        return Response({
+            "url": signed_file_url(
+                request, 'payment_proof', appointment.payment_proof, as_attachment=not view_mode
+            ),
+            "expires_in": max_age('payment_proof'),
+        })
+
     @action(detail=True, methods=['get'], url_path='is-first-appointment', permission_classes=[permissions.IsAuthenticated])
     def is_first_appointment(self, request, pk=None):
         """
@@ -1129,6 +1179,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                             'is_active': appointment.client.user.is_active
                         },
                         'profile_image': appointment.client.profile_image.url if appointment.client.profile_image else None,
+                        'profile_image_sizes': image_sizes(appointment.client),
                         'rut': appointment.client.rut,
                         'region': appointment.client.region,
                         'appointments': [],
@@ -1172,9 +1223,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return Response(result)
                 
         except Exception as e:
-            import traceback
-            print(f"Error al obtener pacientes: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error al obtener pacientes")
             return Response(
                 {"detail": f"Error al obtener pacientes: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1185,45 +1234,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """Endpoint para obtener estadísticas del cliente para el dashboard"""
         user = request.user
         try:
-            client = ClientProfile.objects.get(user=user)
+            client_id = ClientProfile.objects.values_list('id', flat=True).get(user=user)
             
-            # Fecha actual para comparar
-            today = timezone.now().date()
-            current_time = timezone.now().time()
-            
-            # Obtener todas las citas del cliente
-            all_appointments = Appointment.objects.filter(client=client)
-            
-            # Citas totales
-            total_appointments = all_appointments.count()
-            
-            # Citas pendientes (próximas)
-            upcoming_appointments = all_appointments.filter(
-                Q(date__gt=today) | 
-                (Q(date=today) & Q(start_time__gt=current_time))
-            ).exclude(
-                status__in=['COMPLETED', 'CANCELLED', 'NO_SHOW']
-            ).count()
-            
-            # Citas completadas
-            completed_appointments = all_appointments.filter(
-                status='COMPLETED'
-            ).count()
-            
-            # Última sesión (la cita completada más reciente)
-            last_session = all_appointments.filter(
-                status='COMPLETED'
-            ).order_by('-date', '-start_time').first()
-            
-            # Construir respuesta
-            response_data = {
-                "totalAppointments": total_appointments,
-                "upcomingAppointments": upcoming_appointments,
-                "completedAppointments": completed_appointments,
-                "lastSessionDate": last_session.date if last_session else None
-            }
-            
-            return Response(response_data)
+            # Los cuatro contadores salen de una sola consulta (con cache corta)
+            return Response(get_client_stats(client_id))
             
         except ClientProfile.DoesNotExist:
             # Si no existe el perfil del cliente, devolver estadísticas vacías
@@ -1259,33 +1273,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Si el usuario es cliente, también devolvemos estadísticas
         if request.user.is_authenticated and hasattr(request.user, 'user_type') and request.user.user_type == 'client':
             try:
-                client = ClientProfile.objects.get(user=request.user)
-                
-                # Fecha actual para comparar
-                today = timezone.now().date()
-                current_time = timezone.now().time()
-                
-                # Obtener todas las citas del cliente
-                all_appointments = Appointment.objects.filter(client=client)
+                client_id = ClientProfile.objects.values_list('id', flat=True).get(user=request.user)
                 
                 # Añadir estadísticas a la respuesta
-                result.update({
-                    "totalAppointments": all_appointments.count(),
-                    "upcomingAppointments": all_appointments.filter(
-                        Q(date__gt=today) | 
-                        (Q(date=today) & Q(start_time__gt=current_time))
-                    ).exclude(
-                        status__in=['COMPLETED', 'CANCELLED', 'NO_SHOW']
-                    ).count(),
-                    "completedAppointments": all_appointments.filter(
-                        status='COMPLETED'
-                    ).count(),
-                    "lastSessionDate": all_appointments.filter(
-                        status='COMPLETED'
-                    ).order_by('-date', '-start_time').first().date if all_appointments.filter(
-                        status='COMPLETED'
-                    ).exists() else None
-                })
+                result.update(get_client_stats(client_id))
             except ClientProfile.DoesNotExist:
                 # Si no existe el perfil del cliente, devolver estadísticas vacías
                 result.update({
@@ -1312,60 +1303,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """Endpoint para obtener estadísticas del psicólogo para el dashboard"""
         user = request.user
         try:
-            psychologist = PsychologistProfile.objects.get(user=user)
+            psychologist_id = PsychologistProfile.objects.values_list('id', flat=True).get(user=user)
             
-            # Fecha actual para comparar
-            today = timezone.now().date()
-            current_time = timezone.now().time()
-            
-            # Obtener todas las citas del psicólogo
-            all_appointments = Appointment.objects.filter(psychologist=psychologist)
-            
-            # Citas totales
-            total_appointments = all_appointments.count()
-            
-            # Citas completadas
-            completed_appointments = all_appointments.filter(status='COMPLETED').count()
-            
-            # Citas con pago pendiente
-            pending_payment_appointments = all_appointments.filter(status='PENDING_PAYMENT').count()
-            
-            # Clientes activos (clientes con citas confirmadas o completadas en los últimos 30 días)
-            thirty_days_ago = today - timedelta(days=30)
-            active_clients = ClientProfile.objects.filter(
-                appointments__psychologist=psychologist,
-                appointments__date__gte=thirty_days_ago,
-                appointments__status__in=['CONFIRMED', 'COMPLETED']
-            ).distinct().count()
-            
-            # Próximas citas (hoy o futuras, no canceladas, ordenadas por fecha y hora)
-            upcoming_appointments_qs = all_appointments.filter(
-                Q(date__gt=today) | (Q(date=today) & Q(start_time__gt=current_time))
-            ).exclude(
-                status__in=['CANCELLED', 'NO_SHOW']
-            ).order_by('date', 'start_time')[:5]  # Limitar a las 5 más próximas
-            
-            upcoming_appointments = [
-                {
-                    "id": appt.id,
-                    "client_name": f"{appt.client.user.first_name} {appt.client.user.last_name}",
-                    "date": appt.date,
-                    "time": appt.start_time,
-                    "status": appt.status
-                }
-                for appt in upcoming_appointments_qs
-            ]
-            
-            # Construir respuesta
-            response_data = {
-                "totalAppointments": total_appointments,
-                "completedAppointments": completed_appointments,
-                "pendingPaymentAppointments": pending_payment_appointments,
-                "activeClients": active_clients,
-                "upcomingAppointments": upcoming_appointments,
-            }
-            
-            return Response(response_data)
+            # Contadores en una sola consulta y próximas citas en otra (con cache corta)
+            return Response(get_psychologist_stats(psychologist_id))
             
         except PsychologistProfile.DoesNotExist:
             return Response({
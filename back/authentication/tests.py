@@ -1,4 +1,6 @@
+import io
 import logging
+from contextlib import redirect_stdout
 from django.test import TestCase
 from rest_framework.test import APIClient
 from django.urls import reverse
@@ -47,4 +49,12 @@ class AuthenticationTests(TestCase):
         logger.debug(f'Login response: {response.data}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('access' in response.data)
-        logger.info('Login test completed successfully')
\ No newline at end of file
+        logger.info('Login test completed successfully')
+
+    def test_registration_does_not_print_or_log_body(self):
+        output = io.StringIO()
+        with redirect_stdout(output), self.assertLogs('authentication.views', 'DEBUG') as logs:
+            response = self.client.post(self.register_url, self.user_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(output.getvalue(), '')
+        self.assertNotIn(self.user_data['password'], '\n'.join(logs.output))
@@ -12,6 +12,9 @@ from .permissions import IsAdminUser
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from backend.email_utils import send_welcome_email, send_password_reset_email
+import logging
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -29,8 +32,8 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
     def post(self, request, *args, **kwargs):
-        # Imprime los datos recibidos para debugging
-        print(f"Register request data: {request.data}")
+        # Solo los nombres de los campos: el cuerpo trae la contraseña
+        logger.debug("Registro: campos recibidos %s", sorted(request.data.keys()))
         
         # Verificar si el usuario está intentando registrarse como administrador
         user_type = request.data.get('user_type', 'client').lower()
@@ -60,9 +63,6 @@ class RegisterView(generics.CreateAPIView):
             'last_name': last_name
         }
         
-        # Imprimir los datos procesados para debugging
-        print(f"Processed data for serializer: {data}")
-        
         serializer = self.get_serializer(data=data)
         if serializer.is_valid():
             user = serializer.save()
@@ -81,7 +81,7 @@ class RegisterView(generics.CreateAPIView):
                     profile = user.clientprofile_profile
                     profile.phone_number = phone_number
                     profile.save()
-                    print(f"Updated client profile for {user.email}")
+                    logger.debug("Perfil de cliente actualizado para el usuario %s", user.id)
             elif user.user_type.lower() == 'psychologist':
                 if hasattr(user, 'psychologistprofile_profile'):
                     profile = user.psychologistprofile_profile
@@ -89,14 +89,13 @@ class RegisterView(generics.CreateAPIView):
                     if 'professional_title' in request.data:
                         profile.professional_title = request.data.get('professional_title')
                     profile.save()
-                    print(f"Updated psychologist profile for {user.email}")
+                    logger.debug("Perfil de psicólogo actualizado para el usuario %s", user.id)
             
             # Enviar correo de bienvenida
             try:
                 send_welcome_email(user)
-                print(f"Welcome email sent to {user.email}")
-            except Exception as e:
-                print(f"Error sending welcome email to {user.email}: {str(e)}")
+            except Exception:
+                logger.exception("Error al enviar el correo de bienvenida al usuario %s", user.id)
             
             refresh = RefreshToken.for_user(user)
             user_serializer = UserSerializer(user)
@@ -107,8 +106,7 @@ class RegisterView(generics.CreateAPIView):
                 'access': str(refresh.access_token),
             }, status=status.HTTP_201_CREATED)
         
-        # En caso de error, imprimir para debugging
-        print(f"Validation errors: {serializer.errors}")
+        logger.info("Registro rechazado, campos con error: %s", sorted(serializer.errors))
         
         return Response({
             'detail': 'Error de validación',
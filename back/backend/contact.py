@@ -63,7 +63,7 @@ def contact_form(request):
         # Validación antispam simple: verificar que el mensaje no contenga demasiados URLs
         url_count = len(re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', mensaje))
         if url_count > 3:
-            logger.warning(f"Posible spam detectado: {correo}, {request.META.get('REMOTE_ADDR')}")
+            logger.warning("Posible spam detectado: %s, %s", correo, request.META.get('REMOTE_ADDR'))
             return Response(
                 {"error": "Su mensaje ha sido identificado como posible spam."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -83,7 +83,7 @@ def contact_form(request):
         admin_email = os.getenv("ADMIN_EMAIL", "contacto@emindapp.cl")
         # Verificar correo de administrador
         if not admin_email or not re.match(email_regex, admin_email):
-            logger.warning(f"Correo de administrador inválido o no configurado: {admin_email}, usando contacto@emindapp.cl")
+            logger.warning("Correo de administrador inválido o no configurado: %s, usando contacto@emindapp.cl", admin_email)
             admin_email = "contacto@emindapp.cl"
         
         subject = f"Nuevo mensaje de contacto de {nombre}"
@@ -125,9 +125,10 @@ def contact_form(request):
         """
         
         # Imprimir información de depuración
-        logger.debug(f"Intentando enviar correo a administrador: {admin_email}")
-        logger.debug(f"Mailgun Domain: {settings.MAILGUN_DOMAIN}")
-        logger.debug(f"Mailgun API Key presente: {'Sí' if settings.MAILGUN_API_KEY else 'No'}")
+        logger.debug(
+            "Intentando enviar correo a administrador: %s (dominio Mailgun: %s, API key presente: %s)",
+            admin_email, settings.MAILGUN_DOMAIN, bool(settings.MAILGUN_API_KEY)
+        )
         
         # Enviar el correo utilizando la función existente en email_utils.py
         admin_email_sent = send_email(
@@ -138,7 +139,7 @@ def contact_form(request):
         )
         
         if not admin_email_sent:
-            logger.error(f"No se pudo enviar el correo al administrador para: {correo}")
+            logger.error("No se pudo enviar el correo al administrador para: %s", correo)
             return Response(
                 {"error": "Error al procesar el formulario. Por favor, intenta más tarde."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -183,17 +184,17 @@ def contact_form(request):
                 is_html_template=True
             )
             if not sender_email_sent:
-                logger.warning(f"No se pudo enviar el correo de confirmación a {correo}")
+                logger.warning("No se pudo enviar el correo de confirmación a %s", correo)
         except Exception as e:
-            logger.warning(f"No se pudo enviar el correo de confirmación a {correo}: {str(e)}")
+            logger.warning("No se pudo enviar el correo de confirmación a %s: %s", correo, e)
         
         # Registrar el éxito
-        logger.info(f"Formulario de contacto procesado correctamente: {correo}")
+        logger.info("Formulario de contacto procesado correctamente: %s", correo)
         return Response({"message": "Mensaje enviado correctamente"}, status=status.HTTP_200_OK)
         
     except Exception as e:
         # Registrar el error para depuración
-        logger.error(f"Error al procesar el formulario de contacto: {str(e)}")
+        logger.exception("Error al procesar el formulario de contacto: %s", e)
         return Response(
             {"error": "Ocurrió un error al procesar tu solicitud. Por favor, intenta más tarde."},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -0,0 +1,331 @@
+"""
+Renderizado de las plantillas de correo (``templates/emails/*.html``).
+
+Cada plantilla se lee una sola vez, se le pasa el CSS del bloque ``<style>`` a
+atributos ``style`` en línea (muchos clientes de correo ignoran ``<style>`` y
+las variables CSS) y se compila; los envíos posteriores solo ejecutan
+``render`` sobre la plantilla ya compilada. Se registran la cantidad de
+renderizados y los tiempos por plantilla.
+"""
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIR = 'emails'
+
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+_SKIP_TAGS = {'head', 'style', 'script', 'title'}
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][a-zA-Z0-9]*|\*)?(?P<rest>(?:[.#][\w-]+)*)$')
+_VAR = re.compile(r'var\(\s*(--[\w-]+)\s*(?:,\s*([^)]*))?\)')
+
+
+# ---------------------------------------------------------------------------
+# CSS en línea
+# ---------------------------------------------------------------------------
+
+def _parse_selector(selector):
+    """
+    Convierte ``'.contact-info a'`` en una lista de selectores simples
+    ``(tag, ids, classes)``. Devuelve ``None`` si usa algo no soportado
+    (pseudo-clases, combinadores ``>``/``+``/``~``, atributos).
+    """
+    parts = []
+    for token in selector.split():
+        match = _SIMPLE_SELECTOR.match(token)
+        if not match:
+            return None
+        rest = match.group('rest')
+        parts.append((
+            None if match.group('tag') in (None, '*') else match.group('tag').lower(),
+            set(re.findall(r'#([\w-]+)', rest)),
+            set(re.findall(r'\.([\w-]+)', rest)),
+        ))
+    return parts or None
+
+
+def _specificity(parts):
+    return (
+        sum(len(ids) for _, ids, _ in parts),
+        sum(len(classes) for _, _, classes in parts),
+        sum(1 for tag, _, _ in parts if tag),
+    )
+
+
+def _split_blocks(css):
+    """Genera ``(prelude, body)`` de las reglas de primer nivel, respetando llaves anidadas."""
+    depth = 0
+    start = 0
+    prelude = ''
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude = css[start:index].strip()
+                start = index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield prelude, css[start:index]
+                start = index + 1
+
+
+def _parse_declarations(body):
+    declarations = []
+    for item in body.split(';'):
+        if ':' in item:
+            name, value = item.split(':', 1)
+            if name.strip() and value.strip():
+                declarations.append((name.strip().lower(), value.strip()))
+    return declarations
+
+
+def _resolve_vars(value, variables):
+    return _VAR.sub(lambda m: variables.get(m.group(1), (m.group(2) or '').strip()), value)
+
+
+def _parse_stylesheet(css):
+    """
+    Separa la hoja de estilos en reglas aplicables en línea y el CSS que debe
+    quedarse en ``<style>`` (``@media``, pseudo-clases y selectores no soportados).
+    Devuelve también las variables de ``:root``, que se descartan de la salida.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    blocks = list(_split_blocks(css))
+
+    variables = {}
+    for prelude, body in blocks:
+        if prelude == ':root':
+            variables.update((name, value) for name, value in _parse_declarations(body) if name.startswith('--'))
+
+    rules = []
+    leftover = []
+    for order, (prelude, body) in enumerate(blocks):
+        if prelude == ':root':
+            continue
+        if prelude.startswith('@'):
+            leftover.append(f"{prelude} {{{_resolve_vars(body, variables)}}}")
+            continue
+
+        declarations = [(name, _resolve_vars(value, variables)) for name, value in _parse_declarations(body)]
+        kept = []
+        for selector in prelude.split(','):
+            parts = _parse_selector(selector.strip())
+            if parts is None:
+                kept.append(selector.strip())
+            else:
+                rules.append((_specificity(parts), order, parts, declarations))
+        if kept:
+            text = '; '.join(f"{name}: {value}" for name, value in declarations)
+            leftover.append(f"{', '.join(kept)} {{ {text} }}")
+
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    return rules, '\n'.join(leftover), variables
+
+
+def _matches(parts, stack):
+    """Selector descendente: la última parte es el elemento y el resto, ancestros en orden."""
+    def simple(part, element):
+        tag, ids, classes = part
+        return (tag is None or tag == element[0]) and ids <= element[1] and classes <= element[2]
+
+    if not stack or not simple(parts[-1], stack[-1]):
+        return False
+    position = len(stack) - 2
+    for part in reversed(parts[:-1]):
+        while position >= 0 and not simple(part, stack[position]):
+            position -= 1
+        if position < 0:
+            return False
+        position -= 1
+    return True
+
+
+class _InlineParser(HTMLParser):
+    """Recorre el HTML y anota, por posición, el nuevo texto de cada etiqueta de apertura."""
+
+    def __init__(self, rules, variables):
+        super().__init__(convert_charrefs=False)
+        self.rules = rules
+        self.variables = variables
+        self.stack = []
+        self.skip_depth = 0
+        self.replacements = []
+
+    def handle_starttag(self, tag, attrs):
+        self._visit(tag, attrs, void=tag in _VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._visit(tag, attrs, void=True)
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                break
+
+    def _visit(self, tag, attrs, void):
+        attrs = dict(attrs)
+        element = (tag, set((attrs.get('id') or '').split()), set((attrs.get('class') or '').split()))
+        self.stack.append(element)
+
+        if tag in _SKIP_TAGS and not void:
+            self.skip_depth += 1
+        elif not self.skip_depth:
+            declarations = {}
+            for _, _, parts, rule_declarations in self.rules:
+                if _matches(parts, self.stack):
+                    declarations.update(rule_declarations)
+            # Un style="" escrito a mano también puede usar var(--...)
+            if declarations or _VAR.search(attrs.get('style') or ''):
+                self.replacements.append((self.getpos(), self.get_starttag_text(), declarations))
+
+        if void:
+            self.stack.pop()
+
+
+def _with_style(tag_text, declarations, variables):
+    """
+    Agrega las declaraciones al atributo ``style``; lo que ya estaba en línea
+    tiene prioridad y sus ``var(--...)`` se reemplazan por su valor.
+    """
+    # Comillas dobles dentro del valor (font-family: "Segoe UI") cerrarían el atributo
+    style = '; '.join(f"{name}: {value}" for name, value in declarations.items()).replace('"', "'")
+    match = re.search(r'\sstyle\s*=\s*(["\'])(.*?)\1', tag_text, flags=re.S | re.I)
+    if match:
+        existing = _resolve_vars(match.group(2), variables).strip().rstrip(';').replace('"', "'")
+        merged = '; '.join(part for part in (style, existing) if part)
+        return f'{tag_text[:match.start()]} style="{merged}"{tag_text[match.end():]}'
+    closing = '/>' if tag_text.endswith('/>') else '>'
+    return f'{tag_text[:-len(closing)].rstrip()} style="{style}"{closing}'
+
+
+def inline_css(source):
+    """
+    Pasa las reglas del ``<style>`` de ``source`` a atributos ``style``.
+    Las etiquetas de plantilla de Django se tratan como texto, así que se puede
+    aplicar sobre el código fuente de la plantilla antes de compilarla.
+    """
+    style_match = re.search(r'<style[^>]*>(.*?)</style>', source, flags=re.S | re.I)
+    if not style_match:
+        return source
+
+    rules, leftover, variables = _parse_stylesheet(style_match.group(1))
+    parser = _InlineParser(rules, variables)
+    parser.feed(source)
+    parser.close()
+
+    line_offsets = [0]
+    for line in source.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    # Reemplazar de atrás hacia adelante para no mover las posiciones pendientes
+    result = source
+    for (line, column), tag_text, declarations in reversed(parser.replacements):
+        start = line_offsets[line - 1] + column
+        result = result[:start] + _with_style(tag_text, declarations, variables) + result[start + len(tag_text):]
+
+    # El <style> conserva solo lo que no se pudo poner en línea (@media, :hover...)
+    # (la etiqueta <head> está antes que cualquier reemplazo, así que su posición no cambió)
+    if leftover:
+        style_start, style_end = style_match.span(1)
+        return result[:style_start] + f"\n{leftover}\n  " + result[style_end:]
+    return result[:style_match.start()] + result[style_match.end():]
+
+
+# ---------------------------------------------------------------------------
+# Plantillas compiladas y métricas
+# ---------------------------------------------------------------------------
+
+class EmailRenderer:
+    """Cache de plantillas de correo compiladas con métricas de renderizado."""
+
+    def __init__(self):
+        self._templates = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def compile(self, template_name):
+        """Carga, pasa el CSS a línea y compila una plantilla (una sola vez)."""
+        template = self._templates.get(template_name)
+        if template is not None:
+            return template
+
+        started = time.perf_counter()
+        source = get_template(template_name).template.source
+        if getattr(settings, 'EMAIL_INLINE_CSS', True):
+            source = inline_css(source)
+        template = engines['django'].from_string(source)
+        with self._lock:
+            self._templates.setdefault(template_name, template)
+            self._stat(template_name)['compile_ms'] = (time.perf_counter() - started) * 1000
+        return self._templates[template_name]
+
+    def preload(self):
+        """Compila todas las plantillas de ``templates/emails``."""
+        names = []
+        for directory in settings.TEMPLATES[0].get('DIRS', []):
+            pattern = os.path.join(directory, EMAIL_TEMPLATE_DIR, '*.html')
+            names.extend(f"{EMAIL_TEMPLATE_DIR}/{os.path.basename(path)}" for path in sorted(glob.glob(pattern)))
+        for name in names:
+            try:
+                self.compile(name)
+            except Exception:
+                logger.exception("❌ Error al compilar la plantilla %s", name)
+        return names
+
+    def render(self, template_name, context):
+        template = self.compile(template_name)
+        started = time.perf_counter()
+        html = template.render(context)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            stat = self._stat(template_name)
+            stat['count'] += 1
+            stat['total_ms'] += elapsed
+            stat['max_ms'] = max(stat['max_ms'], elapsed)
+        return html
+
+    def _stat(self, template_name):
+        return self._stats.setdefault(template_name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'compile_ms': 0.0})
+
+    def stats(self):
+        """Métricas por plantilla: renderizados, tiempo total, promedio, máximo y compilación."""
+        with self._lock:
+            return {
+                name: {
+                    **stat,
+                    'avg_ms': stat['total_ms'] / stat['count'] if stat['count'] else 0.0,
+                }
+                for name, stat in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            for stat in self._stats.values():
+                stat.update(count=0, total_ms=0.0, max_ms=0.0)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._stats.clear()
+
+
+renderer = EmailRenderer()
+
+
+def render_email(template_name, context):
+    """Renderiza una plantilla de correo usando la versión compilada en cache."""
+    return renderer.render(template_name, context)
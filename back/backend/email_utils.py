@@ -1,7 +1,5 @@
 import os
-import requests
 import logging
-from django.template.loader import render_to_string
 from django.conf import settings
 from datetime import datetime
 import datetime as dt
@@ -12,6 +10,8 @@ import uuid
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.mail import EmailMessage
+from backend.mailgun import EmailDeliveryError, get_transport
+from backend.email_rendering import render_email
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -21,9 +21,60 @@ MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
 MAILGUN_DOMAIN = os.getenv("MAILGUN_DOMAIN")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "info@emindapp.cl")
 
+def mailgun_configured():
+    """
+    Indica si están las credenciales de Mailgun. Solo las necesita quien entrega
+    los correos (el worker del outbox o el envío directo), no quien los encola.
+    """
+    if not MAILGUN_API_KEY or not MAILGUN_DOMAIN:
+        logger.error("❌ Error: MAILGUN_API_KEY o MAILGUN_DOMAIN no están configuradas")
+        return False
+    return True
+
+
+def deliver_email(to_email, subject, html_content, attachments=None):
+    """
+    Entrega un correo ya renderizado a la API de Mailgun usando el transporte
+    compartido (conexiones keep-alive) y devuelve el id del mensaje. Lanza
+    ``EmailDeliveryError`` si Mailgun no lo acepta.
+
+    Args:
+        attachments: Lista de tuplas (filename, content, content_type)
+    """
+    transport = get_transport(MAILGUN_API_KEY, MAILGUN_DOMAIN)
+    return transport.send(f"E-Mind <{DEFAULT_FROM_EMAIL}>", to_email, subject, html_content, attachments)
+
+
+def send_batch_email(recipients, subject, html_content):
+    """
+    Envía un mismo correo a muchos destinatarios (recordatorios, anuncios) en
+    pocas peticiones usando las recipient-variables de Mailgun.
+
+    Args:
+        recipients: Lista de tuplas (email, dict de variables); en el asunto y
+            el HTML se usan como %recipient.variable%
+    """
+    if not mailgun_configured():
+        return False
+
+    try:
+        transport = get_transport(MAILGUN_API_KEY, MAILGUN_DOMAIN)
+        transport.send_batch(f"E-Mind <{DEFAULT_FROM_EMAIL}>", recipients, subject, html_content)
+        logger.info("✅ Correo masivo enviado a %s destinatarios vía Mailgun API", len(recipients))
+        return True
+    except EmailDeliveryError as e:
+        logger.error("❌ Fallo al enviar correo masivo: %s", e)
+        return False
+
+
 def send_email(to_email, subject, template_name=None, context=None, template_content=None, is_html_template=False, attachments=None):
     """
-    Envía un correo electrónico usando la API de Mailgun
+    Envía un correo electrónico usando la API de Mailgun.
+
+    Con ``EMAIL_OUTBOX_ENABLED`` (por defecto) el correo se guarda en la tabla
+    ``notifications.OutgoingEmail``, dentro de la transacción en curso, y lo
+    entrega el comando ``process_email_outbox``; así el request no espera a
+    Mailgun. Sin outbox se entrega de inmediato.
     
     Args:
         to_email (str): Email del destinatario
@@ -34,21 +85,12 @@ def send_email(to_email, subject, template_name=None, context=None, template_con
         is_html_template (bool, optional): Indica si el template_content es HTML
         attachments: Lista de tuplas (filename, content, content_type) para adjuntos
     """
-    # Verificar que tengamos las credenciales necesarias
-    if not MAILGUN_API_KEY:
-        logger.error("❌ Error: MAILGUN_API_KEY no está configurada")
-        return False
-        
-    if not MAILGUN_DOMAIN:
-        logger.error("❌ Error: MAILGUN_DOMAIN no está configurada")
-        return False
-    
     # Renderiza el HTML usando la plantilla y el contexto o usa el contenido proporcionado
     if template_name and context:
         try:
-            html_content = render_to_string(template_name, context)
+            html_content = render_email(template_name, context)
         except Exception as e:
-            logger.error(f"❌ Error al renderizar la plantilla {template_name}: {str(e)}")
+            logger.error("❌ Error al renderizar la plantilla %s: %s", template_name, e)
             return False
     elif template_content and is_html_template:
         html_content = template_content
@@ -60,61 +102,35 @@ def send_email(to_email, subject, template_name=None, context=None, template_con
         logger.error("❌ Error: Debe proporcionar una plantilla y contexto, o el contenido directo")
         return False
     
-    # URL de la API de Mailgun
-    url = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
-    
     # Validar el correo destinatario
     if not to_email or '@' not in to_email:
-        logger.error(f"❌ Error: Dirección de correo destinatario inválida: {to_email}")
+        logger.error("❌ Error: Dirección de correo destinatario inválida: %s", to_email)
         return False
-    
-    # Prepara los datos del mensaje
-    data = {
-        "from": f"E-Mind <{DEFAULT_FROM_EMAIL}>",
-        "to": [to_email],
-        "subject": subject,
-        "html": html_content
-    }
-    
-    # Imprimir lo que se va a enviar (para debug)
-    logger.debug(f"\n===== ENVIANDO CORREO REAL =====")
-    logger.debug(f"Para: {to_email}")
-    logger.debug(f"Asunto: {subject}")
-    logger.debug(f"Dominio Mailgun: {MAILGUN_DOMAIN}")
-    logger.debug(f"API Key presente: {'Sí' if MAILGUN_API_KEY else 'No'}")
-    logger.debug(f"===========================\n")
-    
-    # Envía el mensaje usando la API de Mailgun
-    try:
-        response = requests.post(
-            url,
-            auth=("api", MAILGUN_API_KEY),
-            data=data,
-            files=attachments,
-            timeout=10  # Añadir timeout para evitar que se quede esperando indefinidamente
+
+    if getattr(settings, 'EMAIL_OUTBOX_ENABLED', True):
+        from notifications.models import OutgoingEmail
+        email = OutgoingEmail.objects.create(
+            to_email=to_email,
+            subject=subject,
+            html=html_content,
+            attachments=OutgoingEmail.encode_attachments(attachments)
         )
-        
-        # Verifica la respuesta
-        if response.status_code == 200:
-            logger.info(f"✅ Correo enviado correctamente a {to_email} vía Mailgun API")
-            return True
-        else:
-            logger.error(f"❌ Fallo al enviar correo a {to_email}: Código {response.status_code} - {response.text}")
-            # Intentar decodificar el mensaje de error para más información
-            try:
-                error_data = response.json()
-                logger.error(f"Detalles del error: {error_data}")
-            except:
-                pass
-            return False
-    except requests.exceptions.Timeout:
-        logger.error(f"❌ Timeout al enviar correo a {to_email}: La petición a Mailgun tardó demasiado")
+        logger.debug("📥 Correo %s para %s encolado", email.id, to_email)
+        return True
+
+    # Las credenciales solo hacen falta para entregar; encolar no las requiere
+    if not mailgun_configured():
         return False
-    except requests.exceptions.ConnectionError:
-        logger.error(f"❌ Error de conexión al enviar correo a {to_email}: No se pudo conectar con Mailgun")
+
+    try:
+        deliver_email(to_email, subject, html_content, attachments)
+        logger.info("✅ Correo enviado correctamente a %s vía Mailgun API", to_email)
+        return True
+    except EmailDeliveryError as e:
+        logger.error("❌ Fallo al enviar correo a %s: %s", to_email, e)
         return False
     except Exception as e:
-        logger.error(f"❌ Error al enviar correo a {to_email}: {str(e)}")
+        logger.error("❌ Error al enviar correo a %s: %s", to_email, e)
         return False
 
 def send_welcome_email(user):
@@ -516,70 +532,13 @@ END:VCALENDAR
     # Nombre del archivo adjunto
     file_name = f"Cita-EMind-{fecha_cita}.ics"
     
-    # Verificar que tengamos las credenciales necesarias
-    if not MAILGUN_API_KEY:
-        logger.error("❌ Error: MAILGUN_API_KEY no está configurada")
-        return False
-        
-    if not MAILGUN_DOMAIN:
-        logger.error("❌ Error: MAILGUN_DOMAIN no está configurada")
-        return False
-    
-    # Renderizar la plantilla HTML
-    try:
-        html_content = render_to_string(template_name, context)
-    except Exception as e:
-        logger.error(f"❌ Error al renderizar la plantilla {template_name}: {str(e)}")
-        return False
-    
-    # URL de la API de Mailgun
-    url = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
-    
-    # Preparar los datos del mensaje con archivo adjunto
-    data = {
-        "from": f"E-Mind <{DEFAULT_FROM_EMAIL}>",
-        "to": [user.email],
-        "subject": subject,
-        "html": html_content
-    }
-    
-    # Crear archivo adjunto
-    files = [
-        ("attachment", (file_name, ics_content, "text/calendar"))
-    ]
-    
-    # Enviar el correo usando la API de Mailgun
-    try:
-        response = requests.post(
-            url,
-            auth=("api", MAILGUN_API_KEY),
-            data=data,
-            files=files,
-            timeout=10
-        )
-        
-        # Verificar la respuesta
-        if response.status_code == 200:
-            logger.info(f"✅ Correo con archivo .ics enviado correctamente a {user.email} vía Mailgun API")
-            return True
-        else:
-            logger.error(f"❌ Fallo al enviar correo a {user.email}: Código {response.status_code} - {response.text}")
-            # Intentar decodificar el mensaje de error para más información
-            try:
-                error_data = response.json()
-                logger.error(f"Detalles del error: {error_data}")
-            except:
-                pass
-            return False
-    except requests.exceptions.Timeout:
-        logger.error(f"❌ Timeout al enviar correo a {user.email}: La petición a Mailgun tardó demasiado")
-        return False
-    except requests.exceptions.ConnectionError:
-        logger.error(f"❌ Error de conexión al enviar correo a {user.email}: No se pudo conectar con Mailgun")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Error al enviar correo con archivo .ics a {user.email}: {str(e)}")
-        return False
+    return send_email(
+        user.email,
+        subject,
+        template_name,
+        context,
+        attachments=[(file_name, ics_content, "text/calendar")]
+    )
 
 def send_appointment_confirmed_psychologist_email(appointment, frontend_url=None):
     """
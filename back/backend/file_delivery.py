@@ -0,0 +1,165 @@
+"""
+Entrega de archivos protegidos (comprobantes, documentos y videos).
+
+La vista decide si el usuario puede ver el archivo y ``protected_file_response``
+lo entrega sin cargarlo en memoria, según ``PROTECTED_MEDIA_MODE``:
+
+- ``django`` (por defecto): ``FileResponse`` sobre el archivo abierto. Con
+  gunicorn el servidor lo envía con ``os.sendfile`` (``wsgi.file_wrapper``);
+  en otros servidores se lee en bloques de ``block_size``.
+- ``x-accel-redirect``: respuesta vacía con ``X-Accel-Redirect`` hacia
+  ``PROTECTED_MEDIA_INTERNAL_URL`` y nginx entrega los bytes. Ejemplo::
+
+      location /protected-media/ {
+          internal;
+          alias /ruta/a/MEDIA_ROOT/;
+      }
+
+- ``x-sendfile``: cabecera ``X-Sendfile`` con la ruta absoluta (Apache con
+  mod_xsendfile).
+
+En modo ``django`` se atienden peticiones ``Range`` de un solo intervalo (para
+adelantar un video sin descargarlo de nuevo), ``If-Range`` e ``If-None-Match``
+con un ETag calculado del tamaño y la fecha de modificación.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+# Bloques de lectura cuando el servidor no usa sendfile (FileResponse usa 4 KiB)
+BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileRange:
+    """
+    Archivo abierto en ``start`` que solo deja leer ``length`` bytes.
+
+    Expone ``fileno`` para que gunicorn use ``sendfile`` desde la posición
+    actual hasta ``Content-Length``; no expone ``tell`` ni ``name`` para que
+    ``FileResponse`` no calcule el largo del archivo completo.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self._file = file
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size) if size else b''
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(header, etag):
+    # Comparación débil, como pide RFC 9110 para If-None-Match
+    etags = parse_etags(header)
+    return '*' in etags or etag in (value.removeprefix('W/') for value in etags)
+
+
+def parse_range(header, size):
+    """
+    ``(inicio, fin)`` inclusivos de un ``Range`` de un solo intervalo, ``None``
+    si no aplica (se entrega completo) o ``False`` si no se puede satisfacer.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: los últimos N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _internal_url(path):
+    """Ruta interna de nginx para ``path`` o ``None`` si está fuera de ``MEDIA_ROOT``."""
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([media_root, real_path]) != media_root:
+        return None
+    relative = os.path.relpath(real_path, media_root).replace(os.sep, '/')
+    return quote(settings.PROTECTED_MEDIA_INTERNAL_URL.rstrip('/') + '/' + relative)
+
+
+def protected_file_response(request, path, *, as_attachment=True, filename=None, content_type=None):
+    """
+    Respuesta para un archivo local ya autorizado. Lanza ``FileNotFoundError``
+    si el archivo no existe.
+    """
+    stat = os.stat(path)
+    filename = filename or os.path.basename(path)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = file_etag(stat)
+
+    if _etag_matches(request.headers.get('If-None-Match', ''), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    mode = settings.PROTECTED_MEDIA_MODE
+    internal_url = _internal_url(path) if mode == 'x-accel-redirect' else None
+    if internal_url or mode == 'x-sendfile':
+        # El proxy entrega los bytes (y atiende Range) después de esta respuesta
+        response = HttpResponse(content_type=content_type)
+        if internal_url:
+            response['X-Accel-Redirect'] = internal_url
+        else:
+            response['X-Sendfile'] = os.path.realpath(path)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range.strip() == etag:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            _FileRange(file, start, end - start + 1), status=206,
+            content_type=content_type, as_attachment=as_attachment, filename=filename
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(file, content_type=content_type, as_attachment=as_attachment, filename=filename)
+
+    response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Archivos privados: el navegador puede guardarlos pero debe revalidar
+    response['Cache-Control'] = 'private, no-cache'
+    return response
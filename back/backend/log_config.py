@@ -0,0 +1,137 @@
+"""
+Configuración de logging del backend.
+
+Los niveles se fijan por entorno: ``LOG_LEVEL`` para la aplicación (INFO por
+defecto) y ``DJANGO_LOG_LEVEL`` para los loggers de Django (WARNING). Con
+``LOG_FORMAT=json`` cada línea es un objeto JSON; con ``text`` (por defecto)
+una línea compacta.
+
+Los handlers no escriben en el hilo de la petición: ``QueueStreamHandler``
+deja el registro en una cola y un ``QueueListener`` en segundo plano lo
+formatea y escribe. Usar siempre formato diferido
+(``logger.debug("cita %s", cita_id)``) para que los mensajes de niveles
+desactivados no se construyan.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Atributos propios de LogRecord; el resto llega por ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en ``extra``."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Encola los registros y los escribe en ``stream`` desde un hilo aparte.
+
+    El listener se arranca en el primer registro de cada proceso, así los
+    workers creados con fork (gunicorn --preload) tienen su propio hilo.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # El formato se aplica en el listener, fuera del hilo de la petición
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Solo se resuelve el mensaje (los args pueden cambiar después) y la traza
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+            self.listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Vacía la cola y detiene el listener de este proceso."""
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
+
+
+def build_logging(level=None, django_level=None, log_format=None):
+    """Diccionario para ``settings.LOGGING`` a partir de las variables de entorno."""
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    django_level = (django_level or os.getenv('DJANGO_LOG_LEVEL', 'WARNING')).upper()
+    log_format = (log_format or os.getenv('LOG_FORMAT', 'text')).lower()
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'text': {'format': TEXT_FORMAT},
+            'json': {'()': 'backend.log_config.JsonFormatter'},
+        },
+        'handlers': {
+            'console': {
+                '()': 'backend.log_config.QueueStreamHandler',
+                'formatter': 'json' if log_format == 'json' else 'text',
+            },
+        },
+        'root': {
+            'handlers': ['console'],
+            'level': level,
+        },
+        'loggers': {
+            'django': {
+                'level': django_level,
+            },
+        },
+    }
@@ -0,0 +1,153 @@
+"""
+Cliente HTTP compartido para la API de mensajes de Mailgun.
+
+Un ``requests.Session`` con pool de conexiones keep-alive evita pagar un
+handshake TCP+TLS por cada correo. ``get_transport`` devuelve una instancia por
+configuración, reutilizada por todos los hilos del proceso.
+"""
+import json
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Mailgun acepta hasta 1000 destinatarios por mensaje con recipient-variables
+BATCH_MAX_RECIPIENTS = 1000
+
+
+class EmailDeliveryError(Exception):
+    """Fallo al entregar un correo a Mailgun. ``retryable`` indica si vale la pena reintentar."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class MailgunTransport:
+    """
+    Envía mensajes a Mailgun reutilizando conexiones.
+
+    - ``pool_size``: conexiones keep-alive que se mantienen abiertas; conviene
+      que no sea menor que la cantidad de hilos que envían a la vez.
+    - ``max_retries``: reintentos ante errores de conexión, respuestas 429 y
+      503 con ``Retry-After``, con espera exponencial (``backoff_factor``).
+      Un 502/504 puede llegar cuando Mailgun ya aceptó el mensaje: no se
+      reintenta aquí y queda para la espera del outbox.
+    """
+
+    def __init__(self, api_key, domain, base_url='https://api.mailgun.net/v3', pool_size=10,
+                 max_retries=2, backoff_factor=0.5, timeout=10):
+        self.domain = domain
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,  # si Mailgun ya leyó el mensaje, reintentar podría duplicarlo
+            status=max_retries,
+            # 429 siempre; 503 solo con Retry-After (RETRY_AFTER_STATUS_CODES de urllib3)
+            status_forcelist=(429,),
+            allowed_methods=frozenset({'POST'}),
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.auth = ("api", api_key)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def messages_url(self):
+        return f"{self.base_url}/{self.domain}/messages"
+
+    def _post(self, data, files=None):
+        try:
+            response = self.session.post(self.messages_url, data=data, files=files or None, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            raise EmailDeliveryError("Timeout: la petición a Mailgun tardó demasiado")
+        except requests.exceptions.ConnectionError:
+            raise EmailDeliveryError("Error de conexión: no se pudo conectar con Mailgun")
+
+        if response.status_code == 200:
+            try:
+                return response.json().get('id', '')
+            except ValueError:
+                return ''
+
+        # 429 y 5xx son transitorios; el resto de 4xx no se arregla reintentando
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise EmailDeliveryError(f"Código {response.status_code} - {response.text[:500]}", retryable=retryable)
+
+    def send(self, from_email, to_email, subject, html, attachments=None):
+        """
+        Envía un correo y devuelve el id asignado por Mailgun.
+
+        Args:
+            attachments: Lista de tuplas (filename, content, content_type)
+        """
+        data = {"from": from_email, "to": [to_email], "subject": subject, "html": html}
+        files = [
+            ("attachment", (filename, content, content_type))
+            for filename, content, content_type in attachments or []
+        ]
+        return self._post(data, files)
+
+    def send_batch(self, from_email, recipients, subject, html):
+        """
+        Envía un mismo mensaje plantilla a muchos destinatarios con
+        ``recipient-variables``: una petición por cada 1000 destinatarios.
+        ``subject`` y ``html`` pueden usar ``%recipient.<variable>%``; cada
+        destinatario recibe solo su copia.
+
+        Args:
+            recipients: Lista de tuplas (email, dict de variables)
+
+        Returns:
+            Lista con el id de mensaje de cada petición.
+        """
+        message_ids = []
+        for offset in range(0, len(recipients), BATCH_MAX_RECIPIENTS):
+            chunk = recipients[offset:offset + BATCH_MAX_RECIPIENTS]
+            data = {
+                "from": from_email,
+                "to": [email for email, _ in chunk],
+                "subject": subject,
+                "html": html,
+                "recipient-variables": json.dumps({email: variables or {} for email, variables in chunk}),
+            }
+            message_ids.append(self._post(data))
+        return message_ids
+
+    def close(self):
+        self.session.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(api_key, domain):
+    """Transporte compartido para la configuración actual (uno por proceso)."""
+    key = (
+        api_key, domain,
+        getattr(settings, 'MAILGUN_API_BASE_URL', 'https://api.mailgun.net/v3'),
+        getattr(settings, 'MAILGUN_POOL_SIZE', 10),
+        getattr(settings, 'MAILGUN_MAX_RETRIES', 2),
+        getattr(settings, 'MAILGUN_TIMEOUT', 10),
+    )
+    transport = _transports.get(key)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                transport = _transports[key] = MailgunTransport(
+                    api_key, domain, base_url=key[2], pool_size=key[3],
+                    max_retries=key[4], timeout=key[5]
+                )
+    return transport
@@ -0,0 +1,96 @@
+import contextlib
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.log_config import TEXT_FORMAT, QueueStreamHandler
+
+# Cuerpo de un registro típico (lo que antes se imprimía completo)
+PAYLOAD = {
+    'email': 'cliente@example.com',
+    'password': 'una-clave-segura',
+    'password2': 'una-clave-segura',
+    'user_type': 'client',
+    'first_name': 'Cliente',
+    'last_name': 'De Prueba',
+    'phone_number': '+56911111111',
+}
+
+
+def _legacy_request(logger, index):
+    """Lo que hacía una petición de registro: prints del cuerpo y debug con f-strings."""
+    print(f"Register request data: {PAYLOAD}")
+    print(f"Processed data for serializer: {PAYLOAD}")
+    print(f"Updated client profile for {PAYLOAD['email']}")
+    for step in range(5):
+        logger.debug(f"Preparando correo de bienvenida ({step}) para {PAYLOAD['email']}: {PAYLOAD}")
+    logger.info(f"Correo {index} para {PAYLOAD['email']} encolado")
+
+
+def _current_request(logger, index):
+    """La misma petición con logging diferido y filtrado por nivel."""
+    logger.debug("Registro: campos recibidos %s", PAYLOAD.keys())
+    logger.debug("Perfil de cliente actualizado para el usuario %s", index)
+    logger.debug("📥 Correo %s para %s encolado", index, PAYLOAD['email'])
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo por petición del logging: la configuración anterior (DEBUG "
+        "global, print del cuerpo y f-strings) frente a backend.log_config (nivel "
+        "por entorno, formato diferido y escritura desde un hilo con QueueHandler)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help="Peticiones simuladas por modo")
+        parser.add_argument('--level', default=os.getenv('LOG_LEVEL', 'INFO'), help="Nivel del modo actual")
+
+    def _measure(self, request, logger, count):
+        samples = []
+        for index in range(count):
+            started = time.perf_counter()
+            request(logger, index)
+            samples.append((time.perf_counter() - started) * 1_000_000)
+        samples.sort()
+        return statistics.mean(samples), samples[int(len(samples) * 0.99)]
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            # Antes: basicConfig(level=DEBUG) escribiendo en el hilo de la petición
+            with open(os.path.join(directory, 'legacy.log'), 'w') as output:
+                logger = logging.getLogger('benchmark_logging.legacy')
+                handler = logging.StreamHandler(output)
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+                logger.addHandler(handler)
+                logger.setLevel(logging.DEBUG)
+                logger.propagate = False
+                with contextlib.redirect_stdout(output):
+                    results.append(('anterior (DEBUG + print)', *self._measure(_legacy_request, logger, count)))
+                logger.removeHandler(handler)
+                output.flush()
+                results[-1] += (os.path.getsize(output.name),)
+
+            # Ahora: nivel por entorno y QueueHandler
+            with open(os.path.join(directory, 'current.log'), 'w') as output:
+                logger = logging.getLogger('benchmark_logging.current')
+                handler = QueueStreamHandler(output)
+                handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+                logger.addHandler(handler)
+                logger.setLevel(options['level'].upper())
+                logger.propagate = False
+                results.append((f"actual ({options['level'].upper()} + cola)", *self._measure(_current_request, logger, count)))
+                # El listener escribe lo pendiente antes de medir el archivo
+                handler.stop()
+                logger.removeHandler(handler)
+                output.flush()
+                results[-1] += (os.path.getsize(output.name),)
+
+        self.stdout.write(f"{'modo':<28} {'µs/petición':>12} {'p99 µs':>9} {'bytes escritos':>15}")
+        for name, mean, p99, size in results:
+            self.stdout.write(f"{name:<28} {mean:>12.2f} {p99:>9.2f} {size:>15,}")
@@ -0,0 +1,140 @@
+"""
+Métricas por endpoint: consultas SQL, tiempo en base de datos, tiempo de
+renderizado de la respuesta y latencia total.
+
+``RequestMetricsMiddleware`` (``backend/middleware/metrics.py``) mide cada
+petición y la agrega aquí bajo el nombre de la vista y la acción
+(``AppointmentViewSet.available_slots``). Los acumulados se consultan en
+``/api/metrics/requests/`` (solo administradores) y son por proceso.
+
+El archivo ``QUERY_BUDGETS_FILE`` fija el máximo de consultas permitido por
+endpoint; superarlo se registra como warning y, con ``QUERY_BUDGETS_STRICT``
+(CI), hace fallar la petición.
+"""
+import json
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from authentication.permissions import IsAdminUser
+
+# Latencias recientes por endpoint usadas para los percentiles
+RECENT_SAMPLES = 1000
+
+_MEASURES = ('queries', 'db_ms', 'render_ms', 'total_ms')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un endpoint hizo más consultas que las permitidas en el archivo de presupuestos."""
+
+
+def view_key(request):
+    """``Vista.acción`` de la petición ya resuelta, o ``None`` si no hubo vista (404)."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    func = match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return f"{func.__module__}.{func.__name__}"
+    method = request.method.lower()
+    # Los ViewSets guardan el mapeo método -> acción en la función de la URL
+    action = (getattr(func, 'actions', None) or {}).get(method, method)
+    return f"{cls.__name__}.{action}"
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, metrics):
+        with self._lock:
+            entry = self._endpoints.get(key)
+            if entry is None:
+                entry = self._endpoints[key] = {
+                    'requests': 0,
+                    **{f'{name}_total': 0 for name in _MEASURES},
+                    **{f'{name}_max': 0 for name in _MEASURES},
+                    'recent_ms': deque(maxlen=RECENT_SAMPLES),
+                }
+            entry['requests'] += 1
+            for name in _MEASURES:
+                entry[f'{name}_total'] += metrics[name]
+                entry[f'{name}_max'] = max(entry[f'{name}_max'], metrics[name])
+            entry['recent_ms'].append(metrics['total_ms'])
+
+    def snapshot(self):
+        """Promedios, máximos y percentiles de latencia por endpoint."""
+        with self._lock:
+            result = {}
+            for key, entry in sorted(self._endpoints.items()):
+                count = entry['requests']
+                data = {'requests': count}
+                for name in _MEASURES:
+                    data[f'{name}_avg'] = round(entry[f'{name}_total'] / count, 2)
+                    data[f'{name}_max'] = round(entry[f'{name}_max'], 2)
+                recent = list(entry['recent_ms'])
+                data['total_ms_p50'] = round(_percentile(recent, 0.5), 2)
+                data['total_ms_p95'] = round(_percentile(recent, 0.95), 2)
+                result[key] = data
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+_budgets_cache = {}
+
+
+def load_budgets():
+    """Presupuestos de ``QUERY_BUDGETS_FILE``; se relee solo si el archivo cambió."""
+    path = getattr(settings, 'QUERY_BUDGETS_FILE', None)
+    if not path or not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    cached = _budgets_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding='utf-8') as budget_file:
+            budgets = {key: value for key, value in json.load(budget_file).items() if not key.startswith('_')}
+        cached = _budgets_cache[path] = (mtime, budgets)
+    return cached[1]
+
+
+def budget_for(key):
+    return load_budgets().get(key)
+
+
+def budget_error(key, metrics):
+    """Mensaje si ``metrics`` supera el presupuesto de ``key``; ``None`` si está dentro."""
+    budget = budget_for(key)
+    if budget and 'queries' in budget and metrics['queries'] > budget['queries']:
+        return f"{key} hizo {metrics['queries']} consultas (presupuesto: {budget['queries']})"
+    return None
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def request_metrics(request):
+    """GET: métricas acumuladas por endpoint en este proceso. DELETE: las reinicia."""
+    if request.method == 'DELETE':
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'endpoints': registry.snapshot(),
+        'budgets': load_budgets(),
+    })
@@ -0,0 +1,93 @@
+# middleware/metrics.py
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from backend.metrics import QueryBudgetExceeded, budget_error, registry, view_key
+
+logger = logging.getLogger('backend.metrics')
+
+
+class _QueryCounter:
+    """``execute_wrapper`` que cuenta las consultas y acumula su duración."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide cada petición: consultas SQL, tiempo en base de datos, tiempo de
+    renderizado (la serialización a JSON de la respuesta de DRF) y latencia
+    total, y las agrega por vista y acción en ``backend.metrics.registry``.
+    La respuesta lleva las medidas en ``response.request_metrics`` y, con
+    DEBUG, en la cabecera ``Server-Timing``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        request._metrics_view_done = None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        key = view_key(request)
+        if key is None:
+            return response
+
+        view_done = request._metrics_view_done or finished
+        metrics = {
+            'view': key,
+            'queries': counter.queries,
+            'db_ms': counter.seconds * 1000,
+            'render_ms': (finished - view_done) * 1000,
+            'total_ms': (finished - started) * 1000,
+        }
+        registry.record(key, metrics)
+        response.request_metrics = metrics
+
+        if getattr(settings, 'REQUEST_METRICS_LOG', False):
+            logger.info(
+                "%s %s %s queries=%d db=%.1fms render=%.1fms total=%.1fms",
+                key, request.method, response.status_code, metrics['queries'],
+                metrics['db_ms'], metrics['render_ms'], metrics['total_ms']
+            )
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f"db;dur={metrics['db_ms']:.1f};desc=\"{metrics['queries']} queries\", "
+                f"render;dur={metrics['render_ms']:.1f}, total;dur={metrics['total_ms']:.1f}"
+            )
+
+        error = budget_error(key, metrics)
+        if error:
+            logger.warning(error)
+            if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+                raise QueryBudgetExceeded(error)
+        return response
+
+    def process_template_response(self, request, response):
+        # La vista ya terminó; lo que sigue hasta la respuesta es el renderizado
+        request._metrics_view_done = time.perf_counter()
+        return response
@@ -0,0 +1,105 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+En lugar de ``OFFSET``, cada página continúa desde los valores de orden de la
+última fila devuelta (p. ej. ``created_at`` e ``id``), así que el costo de
+pedir una página no crece con la cantidad de páginas anteriores y las filas
+nuevas no desplazan a las que ya se vieron.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    ``ordering`` son los campos del orden, todos en la misma dirección; el último
+    debe ser único (normalmente ``id``) para que el cursor no sea ambiguo.
+    La respuesta tiene la forma ``{"next": url | null, "results": [...]}``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, instance):
+        values = [getattr(instance, field) for field in self.fields]
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            model = queryset.model
+            return [model._meta.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except (ValueError, TypeError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values):
+        """Condición "viene después de ``values``" según el orden: (a, b) < (x, y)."""
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            step = Q(**{f"{field}__{lookup}": values[position]})
+            for previous, value in zip(self.fields[:position], values[:position]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(queryset, cursor)))
+
+        # Una fila extra indica si hay página siguiente sin hacer COUNT
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -2,6 +2,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from backend.log_config import build_logging
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,13 +23,26 @@ DATABASES = {
     }
 }
 
-# Email configuration
-import logging
+# Cache compartida por todos los procesos: las señales la invalidan (dashboards,
+# facetas del directorio) y una cache en memoria solo se limpiaría en el proceso
+# que recibió la escritura. Con REDIS_URL se usa Redis; si no, la tabla de la
+# base de datos creada con ``manage.py createcachetable``.
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', (
+            'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+            else 'django.core.cache.backends.db.DatabaseCache'
+        )),
+        'LOCATION': os.getenv('CACHE_LOCATION', REDIS_URL or 'django_cache'),
+    }
+}
+
+# Segundos que se reutilizan las estadísticas de los dashboards
+DASHBOARD_STATS_CACHE_TTL = int(os.getenv('DASHBOARD_STATS_CACHE_TTL', '60'))
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s %(message)s",
-)
+# Segundos que se reutilizan los conteos por faceta del directorio
+DIRECTORY_FACETS_CACHE_TTL = int(os.getenv('DIRECTORY_FACETS_CACHE_TTL', '300'))
 
 # Email (SMTP) configuration — no se usará en modo API
 # EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
@@ -42,6 +57,19 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@emindapp.cl')
 # Configuración de Mailgun API
 MAILGUN_API_KEY = os.getenv('MAILGUN_API_KEY')
 MAILGUN_DOMAIN = os.getenv('MAILGUN_DOMAIN')
+MAILGUN_API_BASE_URL = os.getenv('MAILGUN_API_BASE_URL', 'https://api.mailgun.net/v3')
+# Conexiones keep-alive y reintentos del cliente compartido (backend/mailgun.py)
+MAILGUN_POOL_SIZE = int(os.getenv('MAILGUN_POOL_SIZE', '10'))
+MAILGUN_MAX_RETRIES = int(os.getenv('MAILGUN_MAX_RETRIES', '2'))
+MAILGUN_TIMEOUT = float(os.getenv('MAILGUN_TIMEOUT', '10'))
+
+# Outbox de correos: send_email encola y process_email_outbox entrega
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'True') == 'True'
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+
+# Plantillas de correo: compilar al iniciar y pasar el CSS a estilos en línea
+EMAIL_TEMPLATES_PRELOAD = os.getenv('EMAIL_TEMPLATES_PRELOAD', 'True') == 'True'
+EMAIL_INLINE_CSS = os.getenv('EMAIL_INLINE_CSS', 'True') == 'True'
 
 # Application definition
 
@@ -52,6 +80,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party apps
     'rest_framework',
     'corsheaders',
@@ -65,9 +94,13 @@ INSTALLED_APPS = [
     'schedules',  
     'pricing',
     'comments',
+    'notifications',
+    # Comandos de administración del proyecto (backend/management/commands)
+    'backend',
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -78,6 +111,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Métricas por endpoint (consultas, tiempo en BD, renderizado y latencia)
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True') == 'True'
+REQUEST_METRICS_LOG = os.getenv('REQUEST_METRICS_LOG', 'False') == 'True'
+# Máximo de consultas por endpoint; en CI, QUERY_BUDGETS_STRICT=True hace
+# fallar cualquier petición que lo supere
+QUERY_BUDGETS_FILE = os.path.join(BASE_DIR, 'query_budgets.json')
+QUERY_BUDGETS_STRICT = os.getenv('QUERY_BUDGETS_STRICT', 'False') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -93,6 +134,31 @@ REST_FRAMEWORK = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de archivos protegidos (backend/file_delivery.py): 'django' los envía
+# con FileResponse; 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache) delegan
+# los bytes al proxy después de autorizar
+PROTECTED_MEDIA_MODE = os.getenv('PROTECTED_MEDIA_MODE', 'django')
+PROTECTED_MEDIA_INTERNAL_URL = os.getenv('PROTECTED_MEDIA_INTERNAL_URL', '/protected-media/')
+
+# Segundos que duran las URLs firmadas de archivos (backend/signed_urls.py);
+# los videos de presentación duran más porque el navegador los pide por partes
+SIGNED_FILE_URL_MAX_AGE = int(os.getenv('SIGNED_FILE_URL_MAX_AGE', '300'))
+SIGNED_VIDEO_URL_MAX_AGE = int(os.getenv('SIGNED_VIDEO_URL_MAX_AGE', '3600'))
+
+# Segundos sin modificarse antes de que un archivo de media sin referencias se
+# pueda borrar (backend/storage.py); cubre las subidas aún no confirmadas
+MEDIA_DELETE_GRACE_SECONDS = int(os.getenv('MEDIA_DELETE_GRACE_SECONDS', '3600'))
+
+# Binarios para los metadatos y la portada de los videos (profiles/video.py)
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+
+# Hilos que generan las variantes de las imágenes de perfil (profiles/images.py);
+# 0 las procesa al confirmar la transacción, dentro de la misma petición
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', '2'))
+# Hilos que procesan los videos de presentación (profiles/video.py); 0 igual que arriba
+VIDEO_PROCESSING_WORKERS = int(os.getenv('VIDEO_PROCESSING_WORKERS', '1'))
+
 # Static files configuration
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -190,22 +256,9 @@ TEMPLATES = [
 
 
 # Añade esto al final del archivo
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-    },
-    'loggers': {
-        'django.request': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
-    },
-}
+# Niveles por entorno: LOG_LEVEL (aplicación), DJANGO_LOG_LEVEL y LOG_FORMAT=text|json.
+# La escritura se hace en un hilo aparte (ver backend/log_config.py)
+LOGGING = build_logging()
 
 # Configuración para emails de citas
 PAYMENT_INFO = {
@@ -0,0 +1,80 @@
+"""
+URLs firmadas y con vencimiento para archivos protegidos.
+
+Un endpoint autenticado decide si el usuario puede ver el archivo y emite la
+URL con ``signed_file_url``; ``signed_file`` la verifica sin consultar la base
+de datos (solo el HMAC y la fecha de la firma) y entrega el archivo con
+``backend.file_delivery``. Así abrir un comprobante en otra pestaña no necesita
+el JWT ni repetir las consultas de permisos.
+
+Cada tipo de archivo firma con su propio ``salt`` (una URL de documento no
+sirve como comprobante) y tiene su propia duración. La firma incluye el nombre
+del archivo en el storage y si se descarga o se muestra en el navegador.
+
+El token es al portador: quien tenga la URL puede descargar el archivo hasta
+que vence, sin importar quién la pidió. Por eso las URLs duran poco y solo se
+emiten después de verificar los permisos; los archivos protegidos no se
+sirven por ninguna otra ruta pública.
+"""
+import logging
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseForbidden
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+
+from .file_delivery import protected_file_response
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('payment_proof', 'document', 'video')
+
+_SALT = 'backend.signed-urls'
+
+
+def max_age(kind):
+    """Segundos que dura una URL del tipo ``kind``."""
+    if kind == 'video':
+        return settings.SIGNED_VIDEO_URL_MAX_AGE
+    return settings.SIGNED_FILE_URL_MAX_AGE
+
+
+def _signer(kind):
+    return signing.TimestampSigner(salt=f'{_SALT}:{kind}')
+
+
+def sign_file(kind, name, as_attachment=False):
+    """Token al portador para el archivo ``name`` del storage."""
+    return _signer(kind).sign_object({'n': name, 'a': int(as_attachment)}, compress=True)
+
+
+def signed_file_url(request, kind, field_file, as_attachment=False):
+    """URL absoluta (o relativa sin ``request``) que entrega ``field_file`` hasta que vence."""
+    token = sign_file(kind, field_file.name, as_attachment=as_attachment)
+    url = reverse('signed-file', kwargs={'kind': kind, 'token': token})
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def unsign_file(kind, token):
+    """Contenido firmado del token. Lanza ``BadSignature`` o ``SignatureExpired``."""
+    if kind not in KINDS:
+        raise signing.BadSignature(f"Tipo de archivo desconocido: {kind}")
+    return _signer(kind).unsign_object(token, max_age=max_age(kind))
+
+
+@require_safe
+def signed_file(request, kind, token):
+    try:
+        payload = unsign_file(kind, token)
+    except signing.SignatureExpired:
+        return HttpResponseForbidden("El enlace venció.")
+    except signing.BadSignature:
+        return HttpResponseForbidden("Enlace inválido.")
+
+    logger.debug("Archivo firmado %s entregado: %s", kind, payload['n'])
+    try:
+        return protected_file_response(request, default_storage.path(payload['n']), as_attachment=bool(payload['a']))
+    except FileNotFoundError:
+        raise Http404("El archivo no existe.")
@@ -0,0 +1,166 @@
+"""
+Almacenamiento por contenido de los archivos subidos.
+
+``ContentAddressedStorage`` guarda cada archivo en ``<carpeta>/<ab>/<sha256><ext>``,
+con el nombre calculado del contenido. Dos subidas iguales quedan en un solo
+archivo y un archivo nunca se sobrescribe, así que su URL se puede cachear sin
+vencimiento. Comprobantes, documentos y portadas van a ``cas/``, que solo se
+entrega con URLs firmadas (``backend.signed_urls``); las imágenes de perfil,
+públicas, van a ``profile_images/cas/``.
+
+Como un archivo puede estar referenciado por varias filas, no se borra al
+reemplazarlo: ``release_files`` lo borra al confirmar la transacción solo si ya
+no lo referencia ningún campo de ``MEDIA_REFERENCES``. Reutilizar un archivo
+actualiza su fecha de modificación y solo se borran los que no se tocaron en
+``MEDIA_DELETE_GRACE_SECONDS``: así no se borra un archivo que otra petición
+acaba de reutilizar y todavía no guardó en su fila. El comando ``gc_media``
+recorre el árbol de media y borra lo que quedó sin referencias, incluidas las
+miniaturas.
+"""
+import hashlib
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+CAS_DIR = 'cas'
+# Bajo profile_images/, la única carpeta de media que se sirve sin firma
+PUBLIC_CAS_DIR = 'profile_images/cas'
+
+# (modelo, campo) que guardan nombres de archivos de media
+MEDIA_REFERENCES = (
+    ('appointments.Appointment', 'payment_proof'),
+    ('profiles.ProfessionalDocument', 'file'),
+    ('profiles.ProfessionalDocument', 'poster'),
+    ('profiles.ClientProfile', 'profile_image'),
+    ('profiles.PsychologistProfile', 'profile_image'),
+    ('profiles.AdminProfile', 'profile_image'),
+)
+# (modelo, campo JSON) con nombres de miniaturas {lado: {formato: nombre}}; como
+# no se pueden filtrar por nombre, gc_media las lee todas una vez por ejecución
+VARIANTS_DIR = 'profile_images/variants'
+VARIANT_REFERENCES = (
+    ('profiles.ClientProfile', 'profile_image_variants'),
+    ('profiles.PsychologistProfile', 'profile_image_variants'),
+    ('profiles.AdminProfile', 'profile_image_variants'),
+)
+# Archivos que nunca se borran aunque no los referencie ninguna fila
+PROTECTED_NAMES = ('default-profile.png',)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage`` que nombra cada archivo con el sha256 de su contenido."""
+
+    def __init__(self, directory=CAS_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        extension = os.path.splitext(name)[1].lower()
+        sha = digest.hexdigest()
+        return f"{self.directory}/{sha[:2]}/{sha}{extension}"
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Mismo contenido ya guardado: se reutiliza y se marca como recién
+            # usado para que no lo borre una liberación en curso
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+# Solo lectura: un archivo con nombre de contenido nunca se modifica
+_storage = SimpleLazyObject(lambda: ContentAddressedStorage(CAS_DIR, file_permissions_mode=0o444))
+_public_storage = SimpleLazyObject(lambda: ContentAddressedStorage(PUBLIC_CAS_DIR, file_permissions_mode=0o444))
+
+
+def content_addressed_storage():
+    """Storage de los archivos protegidos (callable para los modelos y migraciones)."""
+    return _storage
+
+
+def public_content_addressed_storage():
+    """Storage de las imágenes de perfil, que se sirven sin firma desde /media/."""
+    return _public_storage
+
+
+def is_protected(name):
+    return os.path.basename(name) in PROTECTED_NAMES
+
+
+def referenced_variant_names():
+    """
+    Nombres de todas las miniaturas referenciadas, en una sola pasada por los
+    perfiles. Lo calcula ``gc_media`` una vez por ejecución.
+    """
+    found = set()
+    for label, field in VARIANT_REFERENCES:
+        model = apps.get_model(label)
+        rows = model.objects.exclude(**{field: {}}).values_list(field, flat=True)
+        for variants in rows.iterator(chunk_size=500):
+            for formats in (variants or {}).values():
+                found.update(formats.values())
+    return found
+
+
+def referenced_names(names, variant_names=None):
+    """
+    Subconjunto de ``names`` que referencia algún campo de media. Las miniaturas
+    se comparan con ``variant_names`` (``referenced_variant_names``); sin él se
+    dan por referenciadas y quedan para ``gc_media``.
+    """
+    names = set(names)
+    found = set()
+    for label, field in MEDIA_REFERENCES:
+        model = apps.get_model(label)
+        found.update(model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    variants = {name for name in names if name.startswith(f'{VARIANTS_DIR}/')}
+    found.update(variants if variant_names is None else variants & variant_names)
+    return found
+
+
+def unreferenced_names(names, variant_names=None):
+    """Subconjunto de ``names`` que no referencia ninguna fila (sin los protegidos)."""
+    names = {name for name in names if name and not is_protected(name)}
+    return names - referenced_names(names, variant_names) if names else set()
+
+
+def delete_unreferenced(names, min_age=None, variant_names=None):
+    """
+    Borra los archivos de ``names`` que no referencia ninguna fila y que no se
+    modificaron (ni reutilizaron) en los últimos ``min_age`` segundos, por
+    defecto ``MEDIA_DELETE_GRACE_SECONDS``; devuelve los borrados.
+    """
+    if min_age is None:
+        min_age = settings.MEDIA_DELETE_GRACE_SECONDS
+    cutoff = time.time() - min_age
+    storage = content_addressed_storage()
+    deleted = set()
+    for name in unreferenced_names(names, variant_names):
+        try:
+            # La fecha se revisa justo antes de borrar: pudo reutilizarse después de la consulta
+            if os.path.getmtime(storage.path(name)) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        storage.delete(name)
+        deleted.add(name)
+    return deleted
+
+
+def release_files(names):
+    """
+    Borra al confirmar la transacción los archivos de ``names`` que ya nadie
+    referencia. Se llama después de guardar la fila que dejó de usarlos.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: delete_unreferenced(names))
@@ -0,0 +1,53 @@
+"""
+Exportación de listados como respuestas en streaming (NDJSON o CSV).
+
+Las filas se leen con ``QuerySet.iterator(chunk_size=...)`` y se escriben a
+medida que se generan, así que la memoria del proceso no depende de la
+cantidad de filas exportadas.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CHUNK_SIZE = 500
+
+
+class _Echo:
+    """Pseudo-archivo para ``csv.writer``: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def iterate(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def ndjson_response(rows, filename):
+    """Una línea JSON por cada fila (dicts ya serializados)."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    response = StreamingHttpResponse(
+        (encoder.encode(row) + '\n' for row in rows),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
+
+
+def csv_response(rows, columns, filename):
+    """
+    CSV con una columna por cada ``(encabezado, función)`` de ``columns``;
+    cada función recibe la fila y devuelve el valor de la celda.
+    """
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow([header for header, _ in columns])
+        for row in rows:
+            yield writer.writerow([getter(row) for _, getter in columns])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
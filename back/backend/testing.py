@@ -0,0 +1,24 @@
+"""Utilidades para tests."""
+from .metrics import budget_for
+
+# Para tests que cuentan consultas: sin REDIS_URL la cache vive en la base de
+# datos y cada lectura de la cache también sería una consulta.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class QueryBudgetMixin:
+    """
+    Mixin para ``TestCase``: ``assertWithinBudget(response)`` verifica que la
+    petición no haya superado las consultas permitidas para su endpoint en
+    ``QUERY_BUDGETS_FILE``.
+    """
+
+    def assertWithinBudget(self, response):
+        metrics = getattr(response, 'request_metrics', None)
+        self.assertIsNotNone(metrics, "La respuesta no pasó por RequestMetricsMiddleware")
+        budget = budget_for(metrics['view'])
+        self.assertIsNotNone(budget, f"{metrics['view']} no tiene presupuesto en QUERY_BUDGETS_FILE")
+        self.assertLessEqual(
+            metrics['queries'], budget['queries'],
+            f"{metrics['view']} hizo {metrics['queries']} consultas (presupuesto: {budget['queries']})"
+        )
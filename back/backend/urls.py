@@ -1,8 +1,14 @@
+import os
+
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from .contact import contact_form
+from .metrics import request_metrics
+from .signed_urls import signed_file
+
+PUBLIC_MEDIA_DIR = 'profile_images'
 
 urlpatterns = [
     path('djadmin/', admin.site.urls),
@@ -14,13 +20,18 @@ urlpatterns = [
     path('api/payments/', include('payments.urls')),  # Added trailing slash
     path('api/comments/', include('comments.urls')),
     path('api/contacto/', contact_form, name='contact_form'),
+    path('api/metrics/requests/', request_metrics, name='request-metrics'),
+    path('api/files/<str:kind>/<str:token>/', signed_file, name='signed-file'),
     # path('api/', include('settlements.urls')),
 ]
 
-# Serve media files in all environments (including production)
-# For better performance in production, configure nginx/apache instead
-if True:  # Always serve media files through Django
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Solo las imágenes de perfil son públicas. Comprobantes, documentos y videos
+# (cas/, payment_proofs/, psychologist_documents/...) se entregan únicamente con
+# URLs firmadas (api/files/...); nginx tampoco debe exponer más que
+# /media/profile_images/.
+urlpatterns += static(
+    f'{settings.MEDIA_URL}{PUBLIC_MEDIA_DIR}/', document_root=os.path.join(settings.MEDIA_ROOT, PUBLIC_MEDIA_DIR)
+)
 
 # Error handlers
 handler404 = 'django.views.defaults.page_not_found'
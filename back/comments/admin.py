@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Comment
+from .ratings import rebuild_rating_summaries
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -33,8 +34,11 @@ class CommentAdmin(admin.ModelAdmin):
     
     def approve_comments(self, request, queryset):
         queryset.update(status='APPROVED')
+        # update() no dispara señales: recalcular los resúmenes afectados
+        rebuild_rating_summaries(set(queryset.values_list('psychologist_id', flat=True)))
     approve_comments.short_description = "Aprobar comentarios seleccionados"
     
     def reject_comments(self, request, queryset):
         queryset.update(status='REJECTED')
+        rebuild_rating_summaries(set(queryset.values_list('psychologist_id', flat=True)))
     reject_comments.short_description = "Rechazar comentarios seleccionados"
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from comments.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero el resumen de valoraciones aprobadas de cada "
+        "psicólogo. Las señales lo mantienen al día; este comando sirve para "
+        "corregir cambios hechos fuera del ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--psychologist', type=int, action='append', help="Solo estos psicólogos")
+
+    def handle(self, *args, **options):
+        total = rebuild_rating_summaries(options['psychologist'])
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes recalculados: {total}"))
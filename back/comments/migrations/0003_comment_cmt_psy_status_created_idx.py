@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("comments", "0002_alter_comment_options_remove_comment_approved_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["psychologist", "status", "created_at"],
+                name="cmt_psy_status_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    """Resumen inicial a partir de las valoraciones aprobadas existentes."""
+    Comment = apps.get_model("comments", "Comment")
+    PsychologistRatingSummary = apps.get_model("comments", "PsychologistRatingSummary")
+    rows = (
+        Comment.objects.filter(status="APPROVED")
+        .values("psychologist_id")
+        .annotate(
+            count=models.Count("id"),
+            total=models.Sum("rating"),
+            **{
+                f"rating_{rating}": models.Count("id", filter=models.Q(rating=rating))
+                for rating in range(1, 6)
+            },
+        )
+        .order_by()
+    )
+    PsychologistRatingSummary.objects.bulk_create(
+        PsychologistRatingSummary(**row, average=row["total"] / row["count"])
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0019_psychologistprofile_buffer_minutes_and_more"),
+        ("comments", "0003_comment_cmt_psy_status_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PsychologistRatingSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Valoraciones aprobadas"
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Suma de las calificaciones aprobadas"
+                    ),
+                ),
+                (
+                    "average",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Calificación promedio, vacía sin valoraciones",
+                        null=True,
+                    ),
+                ),
+                ("rating_1", models.PositiveIntegerField(default=0)),
+                ("rating_2", models.PositiveIntegerField(default=0)),
+                ("rating_3", models.PositiveIntegerField(default=0)),
+                ("rating_4", models.PositiveIntegerField(default=0)),
+                ("rating_5", models.PositiveIntegerField(default=0)),
+                (
+                    "psychologist",
+                    models.OneToOneField(
+                        help_text="Psicólogo al que pertenece el resumen",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rating_summary",
+                        to="profiles.psychologistprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de valoraciones",
+                "verbose_name_plural": "Resúmenes de valoraciones",
+                "indexes": [
+                    models.Index(
+                        fields=["-average", "-count"], name="rating_summary_avg_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -58,6 +58,10 @@ class Comment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Valoración'
         verbose_name_plural = 'Valoraciones'
+        indexes = [
+            # Reseñas aprobadas de un psicólogo, de la más reciente a la más antigua
+            models.Index(fields=['psychologist', 'status', 'created_at'], name='cmt_psy_status_created_idx'),
+        ]
     
     def __str__(self):
         return f'Valoración de {self.patient.user.get_full_name()} para {self.psychologist.user.get_full_name()}'
@@ -71,3 +75,40 @@ class Comment(models.Model):
         completed_date = self.appointment.date
         now = timezone.now().date()
         return (now - completed_date) <= timedelta(days=3)
+
+
+class PsychologistRatingSummary(models.Model):
+    """
+    Resumen precalculado de las valoraciones aprobadas de un psicólogo.
+    Se mantiene desde las señales de ``Comment`` (ver comments.ratings) y
+    permite mostrar y ordenar el directorio por calificación sin agregar
+    las valoraciones en cada petición.
+    """
+    psychologist = models.OneToOneField(
+        'profiles.PsychologistProfile',
+        on_delete=models.CASCADE,
+        related_name='rating_summary',
+        help_text='Psicólogo al que pertenece el resumen'
+    )
+    count = models.PositiveIntegerField(default=0, help_text='Valoraciones aprobadas')
+    total = models.PositiveIntegerField(default=0, help_text='Suma de las calificaciones aprobadas')
+    average = models.FloatField(null=True, blank=True, help_text='Calificación promedio, vacía sin valoraciones')
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen de valoraciones'
+        verbose_name_plural = 'Resúmenes de valoraciones'
+        indexes = [
+            models.Index(fields=['-average', '-count'], name='rating_summary_avg_idx'),
+        ]
+
+    def __str__(self):
+        return f'Valoraciones del psicólogo {self.psychologist_id}: {self.average} ({self.count})'
+
+    def distribution(self):
+        """Cantidad de valoraciones aprobadas por calificación (1 a 5)."""
+        return {rating: getattr(self, f'rating_{rating}') for rating in range(1, 6)}
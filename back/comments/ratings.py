@@ -0,0 +1,81 @@
+"""
+Mantenimiento de ``PsychologistRatingSummary``.
+
+Solo cuentan las valoraciones ``APPROVED``. Las señales de ``Comment`` aplican
+la diferencia de cada escritura (sumar o restar una calificación) con
+``UPDATE ... SET count = count + 1`` dentro de la transacción en curso, así dos
+valoraciones simultáneas no se pisan. ``rebuild_rating_summaries`` recalcula
+desde cero; lo usan el comando ``refresh_rating_summaries`` y las acciones
+masivas del admin, que escriben con ``QuerySet.update`` sin disparar señales.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Q, When
+from django.db.models.functions import Cast
+
+from profiles.models import PsychologistProfile
+from .models import Comment, PsychologistRatingSummary
+
+COUNTED_STATUS = 'APPROVED'
+RATINGS = range(1, 6)
+
+
+def _average():
+    return Case(
+        When(count=0, then=None),
+        default=Cast('total', FloatField()) / F('count'),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating(psychologist_id, rating, delta):
+    """Suma (``delta=1``) o resta (``delta=-1``) una calificación aprobada al resumen."""
+    if rating not in RATINGS:
+        return
+    with transaction.atomic():
+        # Al restar no se crea el resumen: puede estar borrándose junto con el psicólogo
+        if delta > 0:
+            PsychologistRatingSummary.objects.get_or_create(psychologist_id=psychologist_id)
+        summaries = PsychologistRatingSummary.objects.filter(psychologist_id=psychologist_id)
+        summaries.update(**{
+            'count': F('count') + delta,
+            'total': F('total') + delta * rating,
+            f'rating_{rating}': F(f'rating_{rating}') + delta,
+        })
+        summaries.update(average=_average())
+
+
+def rebuild_rating_summaries(psychologist_ids=None):
+    """
+    Recalcula los resúmenes de los psicólogos indicados (todos los que tienen
+    valoraciones o resumen si es ``None``) con una consulta agrupada.
+    """
+    comments = Comment.objects.filter(status=COUNTED_STATUS)
+    if psychologist_ids is None:
+        psychologist_ids = set(Comment.objects.values_list('psychologist_id', flat=True)) | set(
+            PsychologistRatingSummary.objects.values_list('psychologist_id', flat=True)
+        )
+    else:
+        # Ignorar psicólogos eliminados en la misma transacción
+        psychologist_ids = set(PsychologistProfile.objects.filter(
+            id__in=list(psychologist_ids)
+        ).values_list('id', flat=True))
+        comments = comments.filter(psychologist_id__in=psychologist_ids)
+
+    rows = {
+        row.pop('psychologist_id'): row
+        for row in comments.values('psychologist_id').annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in RATINGS},
+        ).order_by()
+    }
+
+    empty = {'count': 0, 'total': 0, **{f'rating_{rating}': 0 for rating in RATINGS}}
+    with transaction.atomic():
+        for psychologist_id in psychologist_ids:
+            values = rows.get(psychologist_id, empty)
+            PsychologistRatingSummary.objects.update_or_create(
+                psychologist_id=psychologist_id,
+                defaults={**values, 'average': values['total'] / values['count'] if values['count'] else None},
+            )
+    return len(psychologist_ids)
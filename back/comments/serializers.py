@@ -23,17 +23,17 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'psychologist', 'patient', 'created_at', 'status']
     
     def validate(self, data):
-        logger.info(f"Validating data for CommentSerializer: {data}")
+        logger.debug("Validating data for CommentSerializer: %s", data)
 
         if self.instance is None:
-            logger.info("Validation for creation.")
+            logger.debug("Validation for creation.")
             appointment = data.get('appointment')
 
             if not appointment:
                 logger.error("Validation failed (creation): Appointment is required.")
                 raise serializers.ValidationError({"appointment": "La cita es requerida para crear una valoración."})
 
-            logger.info(f"Validating appointment: {appointment.id} with status {appointment.status}")
+            logger.debug("Validating appointment: %s with status %s", appointment.id, appointment.status)
             
             request = self.context.get('request')
             if request and request.user.is_authenticated:
@@ -56,7 +56,7 @@ class CommentSerializer(serializers.ModelSerializer):
                 )
             
             if appointment.status != 'COMPLETED':
-                logger.error(f"Validation failed (creation): Appointment status is not COMPLETED ({appointment.status}).")
+                logger.error("Validation failed (creation): Appointment status is not COMPLETED (%s).", appointment.status)
                 raise serializers.ValidationError(
                     {"appointment": "Solo se puede valorar una cita que haya sido completada."}
                 )
@@ -64,21 +64,21 @@ class CommentSerializer(serializers.ModelSerializer):
             completed_date = appointment.date
             now = timezone.now().date()
             if (now - completed_date) > timedelta(days=3):
-                logger.error(f"Validation failed (creation): Comment period expired. Completed date: {completed_date}, today: {now}")
+                logger.error("Validation failed (creation): Comment period expired. Completed date: %s, today: %s", completed_date, now)
                 raise serializers.ValidationError(
                     {"appointment": f"Solo puedes valorar dentro de los 3 días posteriores a la cita completada (hasta {completed_date + timedelta(days=3)})."}
                 )
             
             if Comment.objects.filter(appointment=appointment).exists():
-                logger.error(f"Validation failed (creation): Comment already exists for appointment {appointment.id}.")
+                logger.error("Validation failed (creation): Comment already exists for appointment %s.", appointment.id)
                 raise serializers.ValidationError(
                     {"appointment": "Ya existe una valoración para esta cita."}
                 )
 
         else:
-            logger.info("Validation for update.")
+            logger.debug("Validation for update.")
             if 'status' in data and data['status'] not in ['APPROVED', 'REJECTED']:
-                logger.error(f"Validation failed (update): Invalid status {data['status']}.")
+                logger.error("Validation failed (update): Invalid status %s.", data['status'])
                 raise serializers.ValidationError({"status": "Estado no válido."})
 
         return data
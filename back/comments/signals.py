@@ -1,18 +1,53 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
-from .models import Comment
+from .models import Comment, PsychologistRatingSummary
+from .ratings import COUNTED_STATUS, apply_rating, rebuild_rating_summaries
+
+# Campos de la valoración que afectan el resumen de calificaciones
+_TRACKED_FIELDS = ('psychologist_id', 'rating', 'status')
+
+
+def _counted(values):
+    return values is not None and values['status'] == COUNTED_STATUS
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_state(sender, instance, **kwargs):
+    # Con .only()/.defer() algunos campos no están cargados y no se registran
+    instance._rating_snapshot = (
+        {field: instance.__dict__[field] for field in _TRACKED_FIELDS}
+        if all(field in instance.__dict__ for field in _TRACKED_FIELDS) else None
+    )
+
 
 @receiver(post_save, sender=Comment)
 def handle_comment_status_change(sender, instance, created, **kwargs):
     """
     Manejador de señal para cuando se crea o actualiza una valoración.
-    Puede ser extendido para enviar notificaciones o realizar otras acciones.
+    Mantiene el resumen de calificaciones del psicólogo, que solo cuenta las
+    valoraciones aprobadas.
     """
-    if created:
-        # Aquí puedes agregar lógica para cuando se crea una nueva valoración
-        # Por ejemplo, enviar notificaciones al psicólogo
-        pass
-    else:
-        # Aquí puedes agregar lógica para cuando se actualiza una valoración
-        # Por ejemplo, notificar al cliente cuando su valoración es aprobada/rechazada
-        pass 
\ No newline at end of file
+    previous = None if created else instance._rating_snapshot
+    current = {field: getattr(instance, field) for field in _TRACKED_FIELDS}
+
+    if previous is None and not created:
+        # Estado anterior desconocido: recalcular el resumen completo
+        rebuild_rating_summaries([instance.psychologist_id])
+    elif previous != current:
+        if _counted(previous):
+            apply_rating(previous['psychologist_id'], previous['rating'], -1)
+        if _counted(current):
+            apply_rating(current['psychologist_id'], current['rating'], 1)
+
+    instance._rating_snapshot = current
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    snapshot = instance._rating_snapshot
+    if snapshot is None:
+        # Si el resumen ya no existe (borrado en cascada del psicólogo) no se recrea
+        if PsychologistRatingSummary.objects.filter(psychologist_id=instance.psychologist_id).exists():
+            rebuild_rating_summaries([instance.psychologist_id])
+    elif _counted(snapshot):
+        apply_rating(snapshot['psychologist_id'], snapshot['rating'], -1)
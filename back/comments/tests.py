@@ -1,3 +1,129 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from profiles.models import ClientProfile, PsychologistProfile
+from .models import Comment, PsychologistRatingSummary
+from .ratings import rebuild_rating_summaries
+
+User = get_user_model()
+
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        self.psychologists = []
+        for index in range(2):
+            user = User.objects.create_user(
+                email=f'psy{index}@example.com', username=f'psy{index}@example.com',
+                password='testpass123', user_type='psychologist', first_name=f'Psy{index}'
+            )
+            profile = PsychologistProfile.objects.get(user=user)
+            profile.verification_status = 'VERIFIED'
+            profile.save()
+            self.psychologists.append(profile)
+        self.client_profile = ClientProfile.objects.get(user=User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        ))
+        self.created = 0
+
+    def review(self, rating, status='APPROVED', psychologist=None):
+        self.created += 1
+        appointment = Appointment.objects.create(
+            psychologist=psychologist or self.psychologists[0], client=self.client_profile,
+            date=date(2030, 1, 1) + timedelta(days=self.created), start_time=time(10), end_time=time(11),
+            status='COMPLETED', payment_amount=Decimal('100')
+        )
+        return Comment.objects.create(
+            psychologist=appointment.psychologist, patient=self.client_profile,
+            appointment=appointment, rating=rating, status=status
+        )
+
+    def summary(self, psychologist=None):
+        return PsychologistRatingSummary.objects.get(psychologist=psychologist or self.psychologists[0])
+
+    def assertMatchesRebuild(self):
+        live = {row.psychologist_id: row for row in PsychologistRatingSummary.objects.all()}
+        rebuild_rating_summaries()
+        for summary in PsychologistRatingSummary.objects.all():
+            current = live[summary.psychologist_id]
+            self.assertEqual(
+                (current.count, current.total, current.average, current.distribution()),
+                (summary.count, summary.total, summary.average, summary.distribution())
+            )
+
+    def test_only_approved_comments_count(self):
+        self.review(5)
+        self.review(4)
+        pending = self.review(1, status='PENDING')
+        summary = self.summary()
+        self.assertEqual((summary.count, summary.total, summary.average), (2, 9, 4.5))
+        self.assertEqual(summary.distribution(), {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        pending.status = 'APPROVED'
+        pending.save()
+        self.assertEqual((self.summary().count, self.summary().rating_1), (3, 1))
+
+        pending.status = 'REJECTED'
+        pending.save()
+        self.assertEqual((self.summary().count, self.summary().rating_1), (2, 0))
+        self.assertMatchesRebuild()
+
+    def test_rating_change_and_delete(self):
+        comment = self.review(2)
+        self.review(3, status='REJECTED').delete()
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.rating = 5
+        comment.save()
+        self.assertEqual((self.summary().total, self.summary().rating_2, self.summary().rating_5), (5, 0, 1))
+
+        comment.delete()
+        summary = self.summary()
+        self.assertEqual((summary.count, summary.total, summary.average), (0, 0, None))
+        self.assertMatchesRebuild()
+
+    def test_psychologist_deletion_cascades(self):
+        self.review(4)
+        self.psychologists[0].delete()
+        self.assertFalse(PsychologistRatingSummary.objects.exists())
+
+    def test_directory_sorts_by_rating(self):
+        self.review(3)
+        self.review(5, psychologist=self.psychologists[1])
+        self.review(4, psychologist=self.psychologists[1])
+        unrated = PsychologistProfile.objects.get(user=User.objects.create_user(
+            email='psy-new@example.com', username='psy-new@example.com',
+            password='testpass123', user_type='psychologist'
+        ))
+        unrated.verification_status = 'VERIFIED'
+        unrated.save()
+
+        response = APIClient().get('/api/profiles/public/psychologists/', {'ordering': 'rating'})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(
+            [(row['id'], row['rating'], row['rating_count']) for row in results],
+            [
+                (self.psychologists[1].user_id, 4.5, 2),
+                (self.psychologists[0].user_id, 3.0, 1),
+                (unrated.user_id, None, 0),
+            ]
+        )
 
-# Create your tests here.
+    def test_reviews_view_reads_summary(self):
+        self.review(5)
+        self.review(3)
+        self.review(1, status='PENDING')
+        api = APIClient()
+        api.force_authenticate(user=self.psychologists[0].user)
+        response = api.get('/api/comments/psychologist/reviews/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats'], {
+            'total_reviews': 2,
+            'average_rating': 4.0,
+            'rating_distribution': {1: 0, 2: 0, 3: 1, 4: 0, 5: 1},
+        })
@@ -1,10 +1,9 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, generics, permissions, status
 from rest_framework.response import Response
-from django.db.models import Avg, Count
 from django.utils import timezone
 from datetime import timedelta
-from .models import Comment
+from .models import Comment, PsychologistRatingSummary
 from .serializers import CommentSerializer, CommentReadSerializer
 from profiles.models import ClientProfile, PsychologistProfile
 from appointments.models import Appointment
@@ -18,7 +17,6 @@ class IsClientOwner(permissions.BasePermission):
     Permiso personalizado que solo permite a los usuarios pacientes comentar sus propias citas.
     """
     def has_permission(self, request, view):
-        print(f"Checking client permission for user: {request.user}, type: {request.user.user_type}")
         return request.user.is_authenticated and request.user.user_type == 'client'
     
     def has_object_permission(self, request, view, obj):
@@ -53,14 +51,14 @@ class PsychologistReviewsView(generics.ListAPIView):
         queryset = self.get_queryset()
         reviews = self.get_serializer(queryset, many=True).data
         
-        # Calcular estadísticas
+        # Estadísticas de las valoraciones aprobadas, precalculadas (comments.ratings)
+        summary = PsychologistRatingSummary.objects.filter(
+            psychologist__user=self.request.user
+        ).first() or PsychologistRatingSummary()
         stats = {
-            'total_reviews': queryset.count(),
-            'average_rating': queryset.aggregate(Avg('rating'))['rating__avg'] or 0.0,
-            'rating_distribution': {
-                rating: queryset.filter(rating=rating).count()
-                for rating in range(1, 6)
-            }
+            'total_reviews': summary.count,
+            'average_rating': summary.average or 0.0,
+            'rating_distribution': summary.distribution()
         }
         
         return Response({
@@ -76,18 +74,18 @@ class PendingAppointmentsView(generics.ListAPIView):
     permission_classes = [IsClientOwner]
     
     def get_queryset(self):
-        print(f"Getting pending appointments for user: {self.request.user}")
+        logger.debug("Citas pendientes de valorar para el usuario %s", self.request.user.id)
         client_profile = get_object_or_404(ClientProfile, user=self.request.user)
         three_days_ago = timezone.now() - timedelta(days=3)
         
         # Obtener citas completadas en los últimos 3 días que no tienen valoración
-        return Appointment.objects.filter(
+        return AppointmentSerializer.setup_queryset(Appointment.objects.filter(
             client=client_profile,
             status='COMPLETED',
             date__gte=three_days_ago
         ).exclude(
             id__in=Comment.objects.values_list('appointment_id', flat=True)
-        )
+        ))
 
 class CommentCreateView(generics.CreateAPIView):
     """
@@ -97,14 +95,14 @@ class CommentCreateView(generics.CreateAPIView):
     permission_classes = [IsClientOwner]
     
     def post(self, request, *args, **kwargs):
-        logger.info(f"Received data for CommentCreateView: {request.data}")
+        logger.debug("CommentCreateView: datos recibidos %s", request.data)
         return super().post(request, *args, **kwargs) # Esto llama a perform_create si es válido
 
     def perform_create(self, serializer):
-        logger.info("Serializer is valid. Performing create.")
+        logger.debug("Serializer is valid. Performing create.")
         try:
             client_profile = get_object_or_404(ClientProfile, user=self.request.user)
-            logger.info(f"Found client profile: {client_profile.id}")
+            logger.debug("Found client profile: %s", client_profile.id)
 
             # Obtener el objeto Appointment completo desde los datos validados
             appointment = serializer.validated_data['appointment']
@@ -113,9 +111,9 @@ class CommentCreateView(generics.CreateAPIView):
 
             # Guardar el comentario, pasando tanto el paciente como el psicólogo
             serializer.save(patient=client_profile, psychologist=psychologist_profile)
-            logger.info("Comment saved successfully.")
+            logger.debug("Comment saved successfully.")
         except Exception as e:
-            logger.error(f"Error during perform_create: {e}", exc_info=True)
+            logger.error("Error during perform_create: %s", e, exc_info=True)
             # Relanzar la excepción para que DRF la maneje (resultará en un 500)
             raise e
 
@@ -127,7 +125,7 @@ class ClientCommentListView(generics.ListAPIView):
     permission_classes = [IsClientOwner]
     
     def get_queryset(self):
-        print(f"Getting reviews for client: {self.request.user}")
+        logger.debug("Valoraciones del usuario %s", self.request.user.id)
         client_profile = get_object_or_404(ClientProfile, user=self.request.user)
         return Comment.objects.filter(patient=client_profile).order_by('-created_at')
 
@@ -163,7 +161,7 @@ class CommentAdminViewSet(viewsets.ModelViewSet):
         Administradores pueden actualizar cualquier campo, incluido 'status'.
         """
         # Log para ver qué datos llegan en la solicitud PATCH/PUT
-        logger.info(f"Received data for CommentAdminViewSet update: {self.request.data}")
+        logger.debug("CommentAdminViewSet update: datos recibidos %s", self.request.data)
         serializer.save()
     
     def perform_destroy(self, instance):
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'to_email', 'subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'provider_message_id', 'last_error')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='SENT').update(
+            status='PENDING', next_attempt_at=timezone.now(), locked_at=None
+        )
+        self.message_user(request, f"{updated} correos reprogramados.")
+    retry_now.short_description = "Reintentar envío ahora"
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "notifications"
+    verbose_name = 'Notificaciones'
+
+    def ready(self):
+        # Compilar las plantillas de correo una vez al iniciar el proceso
+        if getattr(settings, 'EMAIL_TEMPLATES_PRELOAD', True):
+            from backend.email_rendering import renderer
+            renderer.preload()
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template, render_to_string
+
+from backend.email_rendering import inline_css, renderer
+
+
+def _context(index):
+    """Contexto sintético con las variables que usan las plantillas de citas."""
+    return {
+        'nombre': f"Cliente {index}",
+        'nombre_paciente': f"Cliente {index}",
+        'nombre_psicologo': f"Psicólogo {index % 50}",
+        'fecha_cita': '15/03/2030',
+        'hora_inicio': '10:00',
+        'hora_fin': '11:00',
+        'monto': '35000',
+        'google_calendar_url': f"https://calendar.google.com/?cita={index}",
+        'outlook_calendar_url': f"https://outlook.live.com/?cita={index}",
+        'yahoo_calendar_url': f"https://calendar.yahoo.com/?cita={index}",
+        'es_primera_cita': index % 2 == 0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de renderizar correos en lote: render_to_string por envío "
+        "frente a las plantillas compiladas con CSS en línea de backend.email_rendering."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000, help="Correos a renderizar por plantilla")
+        parser.add_argument('--template', action='append', help="Plantilla a medir (por defecto todas las de emails/)")
+
+    def handle(self, *args, **options):
+        renderer.clear()
+        names = options['template'] or renderer.preload()
+        contexts = [_context(index) for index in range(options['count'])]
+
+        self.stdout.write(
+            f"{'plantilla':<40} {'compilar ms':>11} {'inline por envío ms':>20} "
+            f"{'render_to_string ms':>20} {'compilada ms':>13}"
+        )
+        for name in names:
+            started = time.perf_counter()
+            for context in contexts:
+                render_to_string(name, context)
+            baseline = (time.perf_counter() - started) * 1000 / len(contexts)
+
+            # Lo que costaría pasar el CSS a línea en cada envío
+            source = get_template(name).template.source
+            sample = contexts[:200]
+            started = time.perf_counter()
+            for context in sample:
+                engines['django'].from_string(inline_css(source)).render(context)
+            per_send = (time.perf_counter() - started) * 1000 / len(sample)
+
+            renderer.compile(name)
+            for context in contexts:
+                renderer.render(name, context)
+
+            stat = renderer.stats()[name]
+            self.stdout.write(
+                f"{name:<40} {stat['compile_ms']:>11.2f} {per_send:>20.3f} "
+                f"{baseline:>20.3f} {stat['avg_ms']:>13.3f}"
+            )
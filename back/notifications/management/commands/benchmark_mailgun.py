@@ -0,0 +1,72 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from backend.mailgun import MailgunTransport
+from notifications.fake_mailgun import FakeMailgunServer
+
+FROM_EMAIL = "E-Mind <bench@example.com>"
+HTML = "<html><body><p>Hola %recipient.name%, recuerda tu cita de mañana.</p></body></html>"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara contra un Mailgun simulado local: requests.post por correo, "
+        "el transporte con pool keep-alive y el envío por lotes con recipient-variables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--latency-ms', type=int, default=5, help="Demora simulada por petición en el servidor")
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        recipients = [(f"cliente{i}@example.com", {"name": f"Cliente {i}"}) for i in range(count)]
+
+        self.stdout.write(f"{'modo':<14} {'peticiones':>10} {'conexiones':>11} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        with FakeMailgunServer(latency=options['latency_ms'] / 1000) as server:
+            url = f"{server.base_url}/bench.example.com/messages"
+
+            def fresh(recipient):
+                requests.post(url, auth=("api", "key"), timeout=10, data={
+                    "from": FROM_EMAIL, "to": [recipient[0]], "subject": "Recordatorio", "html": HTML
+                }).raise_for_status()
+
+            transport = MailgunTransport("key", "bench.example.com", base_url=server.base_url,
+                                         pool_size=options['threads'])
+
+            def pooled(recipient):
+                transport.send(FROM_EMAIL, recipient[0], "Recordatorio", HTML)
+
+            self._run(server, 'requests.post', lambda: self._timed_map(fresh, recipients, options['threads']))
+            self._run(server, 'pool', lambda: self._timed_map(pooled, recipients, options['threads']))
+            self._run(server, 'lote', lambda: self._timed_map(
+                lambda _: transport.send_batch(FROM_EMAIL, recipients, "Recordatorio", HTML), [None], 1
+            ))
+            transport.close()
+
+    def _timed_map(self, func, items, threads):
+        def timed(item):
+            started = time.perf_counter()
+            func(item)
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return sorted(pool.map(timed, items))
+
+    def _run(self, server, label, run):
+        server.messages.clear()
+        server.requests_received = 0
+        started = time.perf_counter()
+        latencies = run()
+        total = time.perf_counter() - started
+        connections = len({message['connection'] for message in server.messages})
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{label:<14} {server.requests_received:>10} {connections:>11} {total:>8.2f} "
+            f"{statistics.median(latencies):>8.1f} {p95:>8.1f}"
+        )
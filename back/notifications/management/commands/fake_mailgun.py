@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.fake_mailgun import FakeMailgunServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Levanta un servidor local que imita la API de mensajes de Mailgun. "
+        "Apunte MAILGUN_API_BASE_URL a la URL que se imprime."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency-ms', type=int, default=0, help="Demora simulada por petición")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Proporción de respuestas 503 simuladas")
+
+    def handle(self, *args, **options):
+        server = FakeMailgunServer(
+            port=options['port'],
+            latency=options['latency_ms'] / 1000,
+            error_rate=options['error_rate']
+        ).start()
+        self.stdout.write(f"Mailgun simulado en {server.base_url} (Ctrl+C para terminar)")
+        try:
+            while True:
+                time.sleep(5)
+                self.stdout.write(f"Mensajes recibidos: {len(server.messages)}")
+        except KeyboardInterrupt:
+            server.stop()
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import process_outbox, release_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega los correos encolados en OutgoingEmail. Por defecto queda "
+        "escuchando la cola; con --once la vacía una vez y termina."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Hilos que envían a Mailgun en paralelo")
+        parser.add_argument('--batch-size', type=int, default=50, help="Correos tomados por lote")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Segundos entre revisiones de la cola vacía")
+        parser.add_argument('--stale-after', type=int, default=300, help="Segundos tras los que un envío sin terminar vuelve a la cola")
+        parser.add_argument('--once', action='store_true', help="Vaciar la cola una vez y salir")
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_stale(options['stale_after'])
+            if released:
+                self.stdout.write(f"{released} correos devueltos a la cola")
+
+            counts = process_outbox(workers=options['workers'], batch_size=options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Enviados: {counts['SENT']}, reintentos: {counts['RETRY']}, fallidos: {counts['FAILED']}"
+                )
+
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,68 @@
+import base64
+import datetime
+
+from django.db import models
+
+
+class OutgoingEmail(models.Model):
+    """
+    Correo pendiente de envío. Los handlers lo encolan con send_email y el
+    comando process_email_outbox lo entrega a Mailgun fuera del request.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('SENDING', 'Enviando'),
+        ('SENT', 'Enviado'),
+        ('FAILED', 'Fallido'),
+    ]
+
+    to_email = models.EmailField(help_text="Destinatario")
+    subject = models.CharField(max_length=255)
+    html = models.TextField(help_text="Cuerpo HTML ya renderizado")
+    attachments = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Adjuntos: lista de {filename, content_type, content (base64)}"
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=datetime.datetime.now)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="Momento en que un worker tomó el correo")
+    last_error = models.TextField(blank=True)
+    provider_message_id = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(default=datetime.datetime.now, editable=False)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+    @staticmethod
+    def encode_attachments(attachments):
+        """Convierte tuplas (filename, content, content_type) al formato guardado."""
+        encoded = []
+        for filename, content, content_type in attachments or []:
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            encoded.append({
+                'filename': filename,
+                'content_type': content_type,
+                'content': base64.b64encode(content).decode('ascii'),
+            })
+        return encoded
+
+    def decoded_attachments(self):
+        """Adjuntos como tuplas (filename, bytes, content_type)."""
+        return [
+            (item['filename'], base64.b64decode(item['content']), item['content_type'])
+            for item in self.attachments
+        ]
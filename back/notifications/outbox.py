@@ -0,0 +1,113 @@
+"""
+Entrega de los correos encolados en ``OutgoingEmail``.
+
+El hilo principal toma lotes con ``select_for_update(skip_locked=True)``, de
+modo que varios workers pueden correr a la vez sin repartirse el mismo correo.
+Las llamadas HTTP a Mailgun se hacen en un pool de hilos y el resultado de cada
+una se registra de vuelta desde el hilo principal.
+"""
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from backend.email_utils import EmailDeliveryError, deliver_email, mailgun_configured
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+
+
+def backoff_delay(attempts):
+    """Espera antes del siguiente intento: exponencial con tope y algo de azar."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def release_stale(stale_after):
+    """Devuelve a la cola los correos de un worker que murió mientras enviaba."""
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    return OutgoingEmail.objects.filter(status='SENDING', locked_at__lt=limit).update(
+        status='PENDING', locked_at=None
+    )
+
+
+def claim_batch(limit):
+    """Marca como SENDING hasta ``limit`` correos vencidos y los devuelve."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            OutgoingEmail.objects.filter(id__in=ids).update(
+                status='SENDING', locked_at=now, attempts=F('attempts') + 1
+            )
+    return list(OutgoingEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def _deliver(email):
+    """Se ejecuta en el pool: solo HTTP, sin tocar la base de datos."""
+    try:
+        message_id = deliver_email(email.to_email, email.subject, email.html, email.decoded_attachments())
+        return email, message_id, None
+    except EmailDeliveryError as e:
+        return email, None, e
+    except Exception as e:
+        return email, None, EmailDeliveryError(str(e))
+
+
+def record_result(email, message_id, error, max_attempts):
+    now = timezone.now()
+    if error is None:
+        OutgoingEmail.objects.filter(id=email.id).update(
+            status='SENT', sent_at=now, locked_at=None,
+            provider_message_id=message_id or '', last_error=''
+        )
+        return 'SENT'
+
+    if not error.retryable or email.attempts >= max_attempts:
+        OutgoingEmail.objects.filter(id=email.id).update(
+            status='FAILED', locked_at=None, last_error=str(error)
+        )
+        logger.error("Correo %s descartado tras %s intentos: %s", email.id, email.attempts, error)
+        return 'FAILED'
+
+    OutgoingEmail.objects.filter(id=email.id).update(
+        status='PENDING', locked_at=None, last_error=str(error),
+        next_attempt_at=now + backoff_delay(email.attempts)
+    )
+    logger.warning("Correo %s falló (intento %s), se reintentará: %s", email.id, email.attempts, error)
+    return 'RETRY'
+
+
+def process_outbox(workers=4, batch_size=50, max_attempts=None):
+    """
+    Entrega todos los correos vencidos y devuelve un conteo por resultado
+    (``SENT``, ``RETRY``, ``FAILED``).
+    """
+    max_attempts = max_attempts or getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    counts = {'SENT': 0, 'RETRY': 0, 'FAILED': 0}
+    if not mailgun_configured():
+        # Sin credenciales no se toma nada: los correos esperan en la cola
+        return counts
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+            for email, message_id, error in pool.map(_deliver, batch):
+                counts[record_result(email, message_id, error, max_attempts)] += 1
+
+    return counts
@@ -0,0 +1,160 @@
+import json
+from unittest import mock
+
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+
+from backend import email_utils
+from backend.email_rendering import EmailRenderer, inline_css
+from backend.mailgun import EmailDeliveryError, MailgunTransport
+from .fake_mailgun import FakeMailgunServer
+from .models import OutgoingEmail
+from .outbox import process_outbox
+
+
+@mock.patch.object(email_utils, 'MAILGUN_API_KEY', 'test-key')
+@mock.patch.object(email_utils, 'MAILGUN_DOMAIN', 'mg.example.com')
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.server = FakeMailgunServer().start()
+        self.addCleanup(self.server.stop)
+        override = override_settings(
+            MAILGUN_API_BASE_URL=self.server.base_url, MAILGUN_MAX_RETRIES=0, EMAIL_OUTBOX_ENABLED=True
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def enqueue(self, **kwargs):
+        return email_utils.send_email(
+            'paciente@example.com', 'Asunto',
+            template_content='<p>Hola</p>', is_html_template=True, **kwargs
+        )
+
+    def test_send_email_only_enqueues(self):
+        self.assertTrue(self.enqueue())
+        self.assertEqual(OutgoingEmail.objects.get().status, 'PENDING')
+        self.assertEqual(self.server.requests_received, 0)
+
+    def test_enqueue_does_not_need_mailgun_credentials(self):
+        with mock.patch.object(email_utils, 'MAILGUN_API_KEY', None):
+            self.assertTrue(self.enqueue())
+            # El worker sin credenciales deja el correo en la cola
+            self.assertEqual(process_outbox(), {'SENT': 0, 'RETRY': 0, 'FAILED': 0})
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('PENDING', 0))
+
+        self.assertEqual(process_outbox()['SENT'], 1)
+
+    def test_worker_delivers_with_attachments(self):
+        self.enqueue(attachments=[('cita.ics', 'BEGIN:VCALENDAR', 'text/calendar')])
+        counts = process_outbox(workers=2)
+
+        self.assertEqual(counts['SENT'], 1)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, 'SENT')
+        self.assertTrue(email.provider_message_id)
+        fields = self.server.messages[0]['fields']
+        self.assertEqual(fields['to'], ['paciente@example.com'])
+        self.assertEqual(fields['attachment'], [('cita.ics', b'BEGIN:VCALENDAR')])
+
+    def test_transient_error_is_retried_later(self):
+        self.server.failures = [503]
+        self.enqueue()
+        counts = process_outbox()
+
+        self.assertEqual(counts['RETRY'], 1)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('PENDING', 1))
+        self.assertGreater(email.next_attempt_at, email.created_at)
+        # Aún no vence el siguiente intento
+        self.assertEqual(process_outbox()['SENT'], 0)
+
+    def test_client_error_fails_without_retry(self):
+        self.server.failures = [400]
+        self.enqueue()
+        self.assertEqual(process_outbox()['FAILED'], 1)
+        self.assertEqual(OutgoingEmail.objects.get().status, 'FAILED')
+
+
+class MailgunTransportTests(TestCase):
+    def setUp(self):
+        self.server = FakeMailgunServer().start()
+        self.addCleanup(self.server.stop)
+        self.transport = MailgunTransport('test-key', 'mg.example.com', base_url=self.server.base_url, pool_size=2)
+        self.addCleanup(self.transport.close)
+
+    def test_connections_are_reused(self):
+        for index in range(5):
+            self.transport.send('E-Mind <info@example.com>', f'c{index}@example.com', 'Asunto', '<p>Hola</p>')
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(len({message['connection'] for message in self.server.messages}), 1)
+
+    def test_batch_uses_recipient_variables_in_chunks(self):
+        recipients = [(f'c{index}@example.com', {'name': f'C{index}'}) for index in range(1001)]
+        ids = self.transport.send_batch('E-Mind <info@example.com>', recipients, 'Hola %recipient.name%', '<p>Hola</p>')
+
+        self.assertEqual(len(ids), 2)
+        first, second = (message['fields'] for message in self.server.messages)
+        self.assertEqual(len(first['to']), 1000)
+        self.assertEqual(second['to'], ['c1000@example.com'])
+        self.assertEqual(json.loads(second['recipient-variables'][0]), {'c1000@example.com': {'name': 'C1000'}})
+
+    def test_retries_rate_limit_and_unavailable_with_retry_after(self):
+        self.server.failures = [429]
+        self.transport.send('E-Mind <info@example.com>', 'c@example.com', 'Asunto', '<p>Hola</p>')
+        self.assertEqual(self.server.requests_received, 2)
+
+        self.server.failures = [503]
+        self.server.retry_after = 0
+        self.transport.send('E-Mind <info@example.com>', 'c@example.com', 'Asunto', '<p>Hola</p>')
+        self.assertEqual(self.server.requests_received, 4)
+
+    def test_gateway_errors_are_left_to_the_outbox(self):
+        # Mailgun pudo haber aceptado el mensaje: reenviarlo aquí lo duplicaría
+        for code in (502, 503, 504):
+            self.server.failures = [code]
+            with self.assertRaises(EmailDeliveryError) as raised:
+                self.transport.send('E-Mind <info@example.com>', 'c@example.com', 'Asunto', '<p>Hola</p>')
+            self.assertTrue(raised.exception.retryable)
+        self.assertEqual(self.server.requests_received, 3)
+        self.assertEqual(self.server.messages, [])
+
+
+class EmailRenderingTests(TestCase):
+    SOURCE = (
+        '<html><head><style>:root { --primary: #4a78c4; }\n'
+        '.button { color: var(--primary); padding: 4px; }\n'
+        '.footer a { color: gray; }\n'
+        '.button:hover { color: red; }</style></head>'
+        '<body><a class="button" href="{{ url }}" style="padding: 8px">Ir</a>'
+        '<div class="footer"><a href="#">{{ nombre }}</a><br/></div>'
+        '<p style="color: var(--primary)">Hola</p></body></html>'
+    )
+
+    def test_inline_css(self):
+        html = inline_css(self.SOURCE)
+        self.assertIn('<a class="button" href="{{ url }}" style="color: #4a78c4; padding: 4px; padding: 8px">', html)
+        self.assertIn('<a href="#" style="color: gray">{{ nombre }}</a>', html)
+        # Lo que no se puede poner en línea queda en <style>
+        self.assertIn('.button:hover { color: red }', html)
+        # También en los style="" escritos en la plantilla
+        self.assertIn('<p style="color: #4a78c4">Hola</p>', html)
+        self.assertNotIn('var(', html)
+
+    def test_no_css_variables_left_in_templates(self):
+        renderer = EmailRenderer()
+        for name in renderer.preload():
+            with self.subTest(template=name):
+                self.assertNotIn('var(--', inline_css(get_template(name).template.source))
+
+    def test_templates_compile_once_and_record_metrics(self):
+        renderer = EmailRenderer()
+        names = renderer.preload()
+        self.assertIn('emails/bienvenida_paciente.html', names)
+
+        template = renderer.compile('emails/bienvenida_paciente.html')
+        for _ in range(3):
+            html = renderer.render('emails/bienvenida_paciente.html', {'nombre': 'Ana'})
+        self.assertIs(renderer.compile('emails/bienvenida_paciente.html'), template)
+        self.assertIn('Ana', html)
+        self.assertEqual(renderer.stats()['emails/bienvenida_paciente.html']['count'], 3)
@@ -1,3 +1,90 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from backend.testing import QueryBudgetMixin
+from profiles.models import ClientProfile, PsychologistProfile
+from .models import PaymentDetail
+
+User = get_user_model()
+
+
+class PaymentListingTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin@example.com',
+            password='testpass123', user_type='admin'
+        )
+        self.psychologists = [
+            PsychologistProfile.objects.get(user=User.objects.create_user(
+                email=f'psy{index}@example.com', username=f'psy{index}@example.com',
+                password='testpass123', user_type='psychologist'
+            ))
+            for index in range(2)
+        ]
+        self.clients = [
+            ClientProfile.objects.get(user=User.objects.create_user(
+                email=f'client{index}@example.com', username=f'client{index}@example.com',
+                password='testpass123', user_type='client'
+            ))
+            for index in range(2)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.admin)
+        self.created = 0
+
+    def add_appointments(self, total):
+        start = date(2030, 1, 7)
+        for index in range(self.created, total):
+            appointment = Appointment.objects.create(
+                psychologist=self.psychologists[index % 2], client=self.clients[index // 2 % 2],
+                date=start + timedelta(days=index), start_time=time(10), end_time=time(11),
+                status='PAYMENT_UPLOADED', payment_amount=Decimal('100')
+            )
+            if index % 3:
+                PaymentDetail.objects.create(appointment=appointment, payment_method='transfer')
+        self.created = total
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        return response.data, len(queries)
+
+    def test_first_appointment_flags(self):
+        self.add_appointments(8)
+        data, _ = self.get('/api/payments/admin/all-payments/')
+        first = {
+            appointment.id: not Appointment.objects.filter(
+                client=appointment.client, psychologist=appointment.psychologist, date__lt=appointment.date
+            ).exists()
+            for appointment in Appointment.objects.all()
+        }
+        self.assertEqual({row['appointment_id']: row['is_first_appointment'] for row in data}, first)
+        self.assertEqual(sum(first.values()), 4)
+
+        details = dict(PaymentDetail.objects.values_list('appointment_id', 'id'))
+        for row in data:
+            self.assertEqual(row['id'], details.get(row['appointment_id']))
+            self.assertEqual(row['payment_detail'] is None, row['appointment_id'] not in details)
 
-# Create your tests here.
+    def test_query_count_does_not_grow_with_rows(self):
+        urls = [
+            '/api/payments/admin/all-payments/',
+            '/api/payments/filtered_payments/?status=PAYMENT_UPLOADED',
+            '/api/payments/admin/pending-payments/',
+        ]
+        self.add_appointments(1)
+        expected = [self.get(url)[1] for url in urls]
+        self.add_appointments(12)
+        for url, count in zip(urls, expected):
+            data, queries = self.get(url)
+            self.assertEqual(len(data), 12)
+            self.assertEqual(queries, count, url)
@@ -6,9 +6,58 @@ from .serializers import PaymentDetailSerializer
 from appointments.models import Appointment
 from authentication.permissions import IsClient, IsPsychologist, IsAdminUser
 from profiles.models import PsychologistProfile  # Añadir esta importación
-from django.http import FileResponse
+from django.db.models import Exists, OuterRef
+from backend.file_delivery import protected_file_response
+from backend.signed_urls import signed_file_url
 import os
 
+
+def payment_listing_queryset(appointments):
+    """
+    Prepara las citas de un listado de pagos: cliente, psicólogo y detalle de
+    pago en la misma consulta, y ``has_earlier_appointment`` calculado con una
+    subconsulta: si el cliente tiene citas anteriores con el mismo psicólogo.
+    (El campo ``is_first_appointment`` del modelo se fija al crear la cita y no
+    siempre coincide con este criterio.)
+    """
+    earlier = Appointment.objects.filter(
+        client=OuterRef('client'),
+        psychologist=OuterRef('psychologist'),
+        date__lt=OuterRef('date')
+    )
+    return appointments.select_related(
+        'client__user', 'psychologist__user', 'payment_detail'
+    ).annotate(has_earlier_appointment=Exists(earlier))
+
+
+def payment_listing_row(request, appointment, include_proof_url=False, include_first=True):
+    """Fila del listado de pagos para una cita preparada con payment_listing_queryset."""
+    payment_data = {
+        'appointment_id': appointment.id,
+        'client_name': appointment.client.user.get_full_name(),
+        'psychologist_name': appointment.psychologist.user.get_full_name(),
+        'appointment_date': appointment.date,
+        'appointment_time': appointment.start_time,
+        'payment_amount': float(appointment.payment_amount),
+        'has_proof': bool(appointment.payment_proof),
+        'status': appointment.status,
+        'status_display': appointment.get_status_display(),
+    }
+    if include_proof_url:
+        # URL firmada y con vencimiento: los comprobantes no se sirven desde /media/
+        payment_data['payment_proof'] = (
+            signed_file_url(request, 'payment_proof', appointment.payment_proof) if appointment.payment_proof else None
+        )
+    if include_first:
+        payment_data['is_first_appointment'] = not appointment.has_earlier_appointment
+    
+    # Si la cita no tiene detalle de pago, select_related lo deja vacío sin consultar
+    payment_detail = getattr(appointment, 'payment_detail', None)
+    payment_data['payment_detail'] = PaymentDetailSerializer(payment_detail).data if payment_detail else None
+    payment_data['id'] = payment_detail.id if payment_detail else None  # ID del detalle de pago
+    return payment_data
+
+
 class PaymentDetailViewSet(viewsets.ModelViewSet):
     queryset = PaymentDetail.objects.all()
     serializer_class = PaymentDetailSerializer
@@ -83,35 +132,10 @@ class PaymentDetailViewSet(viewsets.ModelViewSet):
             )
         
         # Obtener detalles de pago para las citas
-        payment_details = []
-        for appointment in appointments:
-            # Crear un diccionario base con la información de la cita
-            payment_data = {
-                'appointment_id': appointment.id,
-                'client_name': appointment.client.user.get_full_name(),
-                'psychologist_name': appointment.psychologist.user.get_full_name(),
-                'appointment_date': appointment.date,
-                'appointment_time': appointment.start_time,
-                'payment_amount': float(appointment.payment_amount),
-                'has_proof': bool(appointment.payment_proof),
-                'status': appointment.status,
-                'status_display': appointment.get_status_display(),
-                'payment_proof': request.build_absolute_uri(appointment.payment_proof.url) if appointment.payment_proof else None
-            }
-            
-            # Intentar obtener detalles de pago si existen
-            try:
-                payment_detail = PaymentDetail.objects.get(appointment=appointment)
-                payment_detail_data = PaymentDetailSerializer(payment_detail).data
-                # Actualizar el diccionario con los datos del detalle de pago
-                payment_data['payment_detail'] = payment_detail_data
-                payment_data['id'] = payment_detail.id  # ID del detalle de pago
-            except PaymentDetail.DoesNotExist:
-                # Si no hay detalle de pago, simplemente continuamos con los datos básicos
-                payment_data['payment_detail'] = None
-                payment_data['id'] = None
-            
-            payment_details.append(payment_data)
+        payment_details = [
+            payment_listing_row(request, appointment, include_proof_url=True, include_first=False)
+            for appointment in payment_listing_queryset(appointments)
+        ]
         
         return Response(payment_details)
     
@@ -243,6 +267,16 @@ class PaymentDetailViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            # Con ?file=true se entrega el archivo en vez de sus datos
+            if request.query_params.get('file', 'false').lower() == 'true':
+                try:
+                    return protected_file_response(request, appointment.payment_proof.path, as_attachment=False)
+                except FileNotFoundError:
+                    return Response(
+                        {"detail": "El archivo no existe en el servidor."},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+            
             # Obtener información del comprobante
             payment_proof_info = {
                 "appointment_id": appointment.id,
@@ -251,8 +285,8 @@ class PaymentDetailViewSet(viewsets.ModelViewSet):
                 "payment_date": None,
                 "payment_method": None,
                 "transaction_id": None,
-                # Asegurarse de que la URL del comprobante sea accesible
-                "file_url": request.build_absolute_uri(appointment.payment_proof.url)
+                # URL firmada y con vencimiento; se abre sin el JWT
+                "file_url": signed_file_url(request, 'payment_proof', appointment.payment_proof)
             }
             
             # Añadir detalles del pago si existen
@@ -302,46 +336,11 @@ class PaymentDetailViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Obtener detalles de pago para las citas
-        payment_details = []
-        for appointment in appointments:
-            # Crear un diccionario base con la información de la cita
-            payment_data = {
-                'appointment_id': appointment.id,
-                'client_name': appointment.client.user.get_full_name(),
-                'psychologist_name': appointment.psychologist.user.get_full_name(),
-                'appointment_date': appointment.date,
-                'appointment_time': appointment.start_time,
-                'payment_amount': float(appointment.payment_amount),
-                'has_proof': bool(appointment.payment_proof),
-                'status': appointment.status,
-                'status_display': appointment.get_status_display(),
-                'is_first_appointment': False  # Por defecto, no es primera cita
-            }
-            
-            # Verificar si es la primera cita
-            previous_appointments = Appointment.objects.filter(
-                client=appointment.client,
-                psychologist=appointment.psychologist,
-                date__lt=appointment.date
-            ).count()
-            
-            if previous_appointments == 0:
-                payment_data['is_first_appointment'] = True
-            
-            # Intentar obtener detalles de pago si existen
-            try:
-                payment_detail = PaymentDetail.objects.get(appointment=appointment)
-                payment_detail_data = PaymentDetailSerializer(payment_detail).data
-                # Actualizar el diccionario con los datos del detalle de pago
-                payment_data['payment_detail'] = payment_detail_data
-                payment_data['id'] = payment_detail.id  # ID del detalle de pago
-            except PaymentDetail.DoesNotExist:
-                # Si no hay detalle de pago, simplemente continuamos con los datos básicos
-                payment_data['payment_detail'] = None
-                payment_data['id'] = None
-            
-            payment_details.append(payment_data)
+        # Obtener detalles de pago para las citas (una sola consulta)
+        payment_details = [
+            payment_listing_row(request, appointment)
+            for appointment in payment_listing_queryset(appointments)
+        ]
         
         return Response(payment_details)
     
@@ -393,45 +392,10 @@ class PaymentDetailViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Obtener detalles de pago para las citas
-        payment_details = []
-        for appointment in appointments:
-            # Crear un diccionario base con la información de la cita
-            payment_data = {
-                'appointment_id': appointment.id,
-                'client_name': appointment.client.user.get_full_name(),
-                'psychologist_name': appointment.psychologist.user.get_full_name(),
-                'appointment_date': appointment.date,
-                'appointment_time': appointment.start_time,
-                'payment_amount': float(appointment.payment_amount),
-                'has_proof': bool(appointment.payment_proof),
-                'status': appointment.status,
-                'status_display': appointment.get_status_display(),
-                'is_first_appointment': False  # Por defecto, no es primera cita
-            }
-            
-            # Verificar si es la primera cita
-            previous_appointments = Appointment.objects.filter(
-                client=appointment.client,
-                psychologist=appointment.psychologist,
-                date__lt=appointment.date
-            ).count()
-            
-            if previous_appointments == 0:
-                payment_data['is_first_appointment'] = True
-            
-            # Intentar obtener detalles de pago si existen
-            try:
-                payment_detail = PaymentDetail.objects.get(appointment=appointment)
-                payment_detail_data = PaymentDetailSerializer(payment_detail).data
-                # Actualizar el diccionario con los datos del detalle de pago
-                payment_data['payment_detail'] = payment_detail_data
-                payment_data['id'] = payment_detail.id  # ID del detalle de pago
-            except PaymentDetail.DoesNotExist:
-                # Si no hay detalle de pago, simplemente continuamos con los datos básicos
-                payment_data['payment_detail'] = None
-                payment_data['id'] = None
-            
-            payment_details.append(payment_data)
+        # Obtener detalles de pago para las citas (una sola consulta)
+        payment_details = [
+            payment_listing_row(request, appointment)
+            for appointment in payment_listing_queryset(appointments)
+        ]
         
         return Response(payment_details)
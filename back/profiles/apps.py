@@ -1,5 +1,9 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 class ProfilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profiles'
@@ -7,6 +11,5 @@ class ProfilesConfig(AppConfig):
     def ready(self):
         try:
             import profiles.signals  # Importar signals cuando la app esté lista
-            print("Profiles signals imported successfully!")
-        except ImportError as e:
-            print(f"Error importing profiles signals: {e}")
\ No newline at end of file
+        except ImportError:
+            logger.exception("Error importing profiles signals")
\ No newline at end of file
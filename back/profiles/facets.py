@@ -0,0 +1,116 @@
+"""
+Conteos por faceta del directorio público.
+
+``facet_counts`` devuelve, para el conjunto de psicólogos que cumple los
+filtros actuales (los mismos de ``public_psychologists``), cuántos hay por
+especialidad, población objetivo, región y género. En PostgreSQL es una sola
+sentencia: las listas JSON se expanden con ``jsonb_array_elements_text`` y
+cada faceta se agrupa dentro de un ``UNION ALL`` sobre el mismo CTE.
+
+El resultado se guarda en la cache compartida (``CACHES``) por combinación de
+filtros. Las claves incluyen una versión que las señales de
+``PsychologistProfile`` incrementan, así un cambio en cualquier perfil
+invalida todas las combinaciones a la vez y en todos los procesos.
+"""
+import hashlib
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .filters import public_psychologists
+
+# Facetas sobre listas JSON y sobre columnas simples
+ARRAY_FACETS = ('specialties', 'target_populations')
+SCALAR_FACETS = ('region', 'gender')
+FACETS = ARRAY_FACETS + SCALAR_FACETS
+
+# Parámetros que cambian el conjunto filtrado (y por lo tanto la clave de cache)
+FILTER_PARAMS = ('specialty', 'population', 'intervention_area', 'region', 'city', 'q', 'name')
+
+_VERSION_KEY = "profiles:facets:version"
+
+
+def _bump_version():
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 1, None)
+
+
+def invalidate_facets():
+    """Descarta los conteos de todas las combinaciones ahora y al confirmar la transacción."""
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def _cache_key(params):
+    version = cache.get_or_set(_VERSION_KEY, 1, None)
+    filters = {name: params.get(name) for name in FILTER_PARAMS if params.get(name)}
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f"profiles:facets:{version}:{digest}"
+
+
+def _facets_sql(base_sql):
+    parts = ["SELECT 'total' AS facet, NULL AS value, COUNT(*) FROM filtered"]
+    for facet in ARRAY_FACETS:
+        parts.append(
+            f"SELECT '{facet}', value, COUNT(*) FROM filtered, jsonb_array_elements_text("
+            f"CASE WHEN jsonb_typeof({facet}) = 'array' THEN {facet} ELSE '[]'::jsonb END) AS value "
+            f"GROUP BY value"
+        )
+    for facet in SCALAR_FACETS:
+        parts.append(f"SELECT '{facet}', {facet}, COUNT(*) FROM filtered WHERE {facet} <> '' GROUP BY {facet}")
+    return f"WITH filtered AS ({base_sql}) " + " UNION ALL ".join(parts)
+
+
+def _postgres_rows(queryset):
+    base_sql, base_params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(_facets_sql(base_sql), base_params)
+        return cursor.fetchall()
+
+
+def _python_rows(queryset):
+    """Mismo resultado que la consulta de PostgreSQL, contando en Python."""
+    counters = {facet: Counter() for facet in FACETS}
+    total = 0
+    for profile in queryset:
+        total += 1
+        for facet in ARRAY_FACETS:
+            values = profile[facet] if isinstance(profile[facet], list) else []
+            counters[facet].update(str(value) for value in values)
+        for facet in SCALAR_FACETS:
+            if profile[facet]:
+                counters[facet][profile[facet]] += 1
+    rows = [('total', None, total)]
+    for facet, counter in counters.items():
+        rows.extend((facet, value, count) for value, count in counter.items())
+    return rows
+
+
+def compute_facet_counts(params):
+    queryset = public_psychologists(params).values(*FACETS).order_by()
+    rows = _postgres_rows(queryset) if connection.vendor == 'postgresql' else _python_rows(queryset)
+
+    result = {'total': 0, 'facets': {facet: [] for facet in FACETS}}
+    for facet, value, count in rows:
+        if facet == 'total':
+            result['total'] = count
+        else:
+            result['facets'][facet].append({'value': value, 'count': count})
+    for values in result['facets'].values():
+        values.sort(key=lambda item: (-item['count'], item['value']))
+    return result
+
+
+def facet_counts(params):
+    """Conteos por faceta para los filtros de ``params``, desde la cache si están vigentes."""
+    key = _cache_key(params)
+    result = cache.get(key)
+    if result is None:
+        result = compute_facet_counts(params)
+        cache.set(key, result, settings.DIRECTORY_FACETS_CACHE_TTL)
+    return result
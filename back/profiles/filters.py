@@ -0,0 +1,64 @@
+"""
+Filtros del directorio público de psicólogos.
+
+Se comparten entre el listado público y los endpoints que trabajan sobre el
+mismo conjunto de psicólogos (por ejemplo, la disponibilidad en lote).
+"""
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import PsychologistProfile
+from .search import search
+
+
+def search_term(params):
+    """Texto buscado en el directorio; ``name`` se mantiene por compatibilidad"""
+    return params.get('q', None) or params.get('name', None)
+
+
+def with_rating(queryset):
+    """Anota ``rating`` y ``rating_count`` desde el resumen precalculado de valoraciones aprobadas"""
+    return queryset.annotate(
+        rating=F('rating_summary__average'),
+        rating_count=Coalesce('rating_summary__count', 0),
+    )
+
+
+def public_psychologists(params=None):
+    """Psicólogos verificados filtrados con los parámetros del directorio"""
+    # Solo mostrar psicólogos verificados
+    queryset = PsychologistProfile.objects.filter(verification_status='VERIFIED')
+    if params is None:
+        return queryset
+
+    # Filtrar por especialidad si se proporciona
+    specialty = params.get('specialty', None)
+    if specialty:
+        queryset = queryset.filter(specialties__contains=[specialty])
+
+    # Filtrar por población objetivo si se proporciona
+    population = params.get('population', None)
+    if population:
+        queryset = queryset.filter(target_populations__contains=[population])
+
+    # Filtrar por región si se proporciona
+    region = params.get('region', None)
+    if region:
+        queryset = queryset.filter(region__icontains=region)
+
+    # Filtrar por ciudad si se proporciona
+    city = params.get('city', None)
+    if city:
+        queryset = queryset.filter(city__icontains=city)
+
+    # Filtrar por área de intervención si se proporciona
+    area = params.get('intervention_area', None)
+    if area:
+        queryset = queryset.filter(intervention_areas__contains=[area])
+
+    # Búsqueda por nombre, título, universidad y temas (anota search_rank)
+    term = search_term(params)
+    if term:
+        queryset = search(queryset, term)
+
+    return queryset
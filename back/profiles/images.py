@@ -0,0 +1,208 @@
+"""
+Variantes de las imágenes de perfil.
+
+Al subir una imagen (``upload_image`` de clientes, psicólogos y
+administradores) ``clean_profile_image`` la convierte, antes de guardarla, en un
+JPEG de ``FULL_SIZE`` px como máximo con la orientación según EXIF aplicada y
+sin metadatos (incluida la ubicación GPS que traen muchas fotos de celular): la
+imagen de perfil es pública desde el primer momento.
+
+``schedule_image_variants`` encola para cuando se confirme la transacción las
+miniaturas cuadradas de ``VARIANT_SIZES`` en WebP y JPEG, que genera un hilo del
+``ThreadPoolExecutor``. Si el proceso se reinicia antes, el perfil queda sin
+miniaturas (se muestra la imagen completa) hasta que las genere el comando
+``process_profile_images``, que también normaliza las imágenes anteriores.
+
+Los nombres de los archivos son el hash de su contenido, así que nunca cambian
+para una misma imagen y se pueden cachear sin vencimiento. El resultado se guarda
+en ``profile_image_variants`` solo si la imagen no cambió mientras se procesaba.
+``image_sizes`` y ``image_srcset`` lo exponen a los serializers.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from backend.storage import VARIANTS_DIR, release_files
+
+logger = logging.getLogger(__name__)
+
+# Lados de las miniaturas cuadradas (tarjetas, listados y avatares)
+VARIANT_SIZES = (64, 160, 320, 640)
+# Lado mayor de la imagen completa que reemplaza al original
+FULL_SIZE = 1600
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix='profile-images'
+            )
+        return _executor
+
+
+def _normalized(file):
+    """Imagen RGB con la orientación aplicada y sin metadatos."""
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # JPEG no tiene transparencia: fondo blanco
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+            return background
+        return image.convert('RGB')
+
+
+# Claves de ``Image.info`` con metadatos que no deben quedar en una imagen pública
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop', 'icc_profile')
+
+
+def _encode(image, extension):
+    buffer = io.BytesIO()
+    image.save(buffer, **FORMATS[extension])
+    return buffer.getvalue()
+
+
+def clean_profile_image(upload):
+    """
+    ``ContentFile`` con la subida como JPEG de ``FULL_SIZE`` px como máximo,
+    orientada y sin metadatos. Lanza ``ValueError`` si no es una imagen válida.
+    """
+    try:
+        image = _normalized(upload)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Imagen no válida: {e}") from e
+    image.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+    name = os.path.splitext(os.path.basename(upload.name or 'imagen'))[0] + '.jpg'
+    return ContentFile(_encode(image, 'jpeg'), name=name)
+
+
+def _is_clean(image):
+    """La imagen ya es como la deja ``clean_profile_image`` (subidas nuevas)."""
+    return (
+        image.format == 'JPEG' and max(image.size) <= FULL_SIZE
+        and not image.getexif() and not any(key in image.info for key in METADATA_KEYS)
+    )
+
+
+def _store(image, extension):
+    """Guarda ``image`` con un nombre derivado de su contenido y devuelve ese nombre."""
+    content = _encode(image, extension)
+    name = f"{VARIANTS_DIR}/{hashlib.sha256(content).hexdigest()[:32]}.{extension}"
+    if default_storage.exists(name):
+        # Reutilizada: se marca como reciente para que gc_media no la borre
+        os.utime(default_storage.path(name))
+    else:
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def build_variants(image_file):
+    """
+    ``(imagen_completa, variantes)`` para el archivo: el nombre del JPEG que
+    reemplaza al original (el mismo si ya estaba normalizado) y
+    ``{lado: {formato: nombre}}`` de las miniaturas.
+    """
+    image_file.open('rb')
+    try:
+        with Image.open(image_file) as original:
+            clean = _is_clean(original)
+        image_file.seek(0)
+        image = _normalized(image_file)
+    finally:
+        image_file.close()
+
+    if clean:
+        full_name = image_file.name
+    else:
+        # Imágenes subidas antes de normalizarlas al recibirlas
+        full = image.copy()
+        full.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+        full_name = _store(full, 'jpeg')
+
+    variants = {}
+    for size in VARIANT_SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        variants[str(size)] = {extension: _store(thumbnail, extension) for extension in FORMATS}
+    return full_name, variants
+
+
+def process_profile_image(model_label, pk, image_name):
+    """Procesa la imagen ``image_name`` del perfil si sigue siendo la actual."""
+    Model = apps.get_model(model_label)
+    profile = Model.objects.filter(pk=pk, profile_image=image_name).first()
+    if profile is None:
+        return False
+
+    full_name, variants = build_variants(profile.profile_image)
+    # Si entretanto se subió otra imagen, no se pisa
+    updated = Model.objects.filter(pk=pk, profile_image=image_name).update(
+        profile_image=full_name, profile_image_variants=variants
+    )
+    if updated and full_name != image_name:
+        # El original puede estar compartido con otro perfil (misma subida)
+        release_files([image_name])
+    return bool(updated)
+
+
+def _run(model_label, pk, image_name, in_thread=True):
+    try:
+        process_profile_image(model_label, pk, image_name)
+    except Exception:
+        logger.exception("No se pudo procesar la imagen de perfil %s de %s %s", image_name, model_label, pk)
+    finally:
+        if in_thread:
+            close_old_connections()
+
+
+def schedule_image_variants(profile):
+    """Procesa la imagen recién subida fuera de la petición, al confirmar la transacción."""
+    args = (profile._meta.label, profile.pk, profile.profile_image.name)
+    if settings.IMAGE_PROCESSING_WORKERS == 0:
+        # Sin hilos (tests y entornos de un solo proceso)
+        transaction.on_commit(lambda: _run(*args, in_thread=False))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run, *args))
+
+
+def image_files(profile):
+    """Nombres de la imagen del perfil y de sus miniaturas."""
+    names = [profile.profile_image.name] if profile.profile_image else []
+    for formats in (profile.profile_image_variants or {}).values():
+        names.extend(formats.values())
+    return names
+
+
+def image_sizes(profile):
+    """``{lado: {formato: url}}`` de las miniaturas; vacío mientras se procesan."""
+    return {
+        size: {extension: default_storage.url(name) for extension, name in formats.items()}
+        for size, formats in (profile.profile_image_variants or {}).items()
+    }
+
+
+def image_srcset(profile):
+    """``{formato: "url 64w, url 160w, ..."}`` listo para ``<source srcset>``."""
+    sizes = image_sizes(profile)
+    return {
+        extension: ', '.join(f"{sizes[size][extension]} {size}w" for size in sorted(sizes, key=int))
+        for extension in FORMATS
+    } if sizes else {}
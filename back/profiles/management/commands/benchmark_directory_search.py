@@ -0,0 +1,127 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from appointments.query_plans import uses_index
+from profiles.models import PsychologistProfile
+from profiles.search import SEARCH_CONFIG, search
+
+User = get_user_model()
+
+SEED_PROFILES = 100_000
+
+FIRST_NAMES = ['José', 'María', 'Sebastián', 'Camila', 'Andrés', 'Begoña', 'Matías', 'Sofía', 'Ignacio', 'Inés']
+LAST_NAMES = ['González', 'Muñoz', 'Rodríguez', 'Pérez', 'Sepúlveda', 'Núñez', 'Fernández', 'Araya', 'Rojas', 'Díaz']
+TITLES = ['Psicólogo clínico', 'Psicóloga infanto-juvenil', 'Psicólogo organizacional', 'Neuropsicóloga']
+UNIVERSITIES = ['Universidad de Chile', 'Pontificia Universidad Católica', 'Universidad de Concepción', 'Universidad Diego Portales']
+SPECIALTIES = ['Ansiedad', 'Depresión', 'Terapia de pareja', 'Duelo', 'Trastornos alimentarios', 'Estrés laboral']
+REGIONS = ['Metropolitana', 'Valparaíso', 'Biobío', 'Araucanía', 'Los Lagos']
+
+# Términos buscados: nombre exacto, sin tildes, con error de tipeo y un tema
+TERMS = ['González', 'gonzalez', 'sepulbeda', 'duelo', 'Camila Núñez']
+
+_SEARCH_SQL = """
+UPDATE {profiles} AS p SET
+    search_text = lower(unaccent(concat_ws(' ', u.first_name, u.last_name, p.professional_title, p.university))),
+    search_vector =
+        setweight(to_tsvector(%s, concat_ws(' ', u.first_name, u.last_name)), 'A') ||
+        setweight(to_tsvector(%s, concat_ws(' ', p.professional_title, p.university)), 'B') ||
+        setweight(to_tsvector(%s, p.specialties::text), 'C')
+FROM {users} AS u
+WHERE u.id = p.user_id AND p.search_text = ''
+"""
+
+
+def seed_profiles(total):
+    """Psicólogos verificados sintéticos con sus columnas de búsqueda calculadas en SQL."""
+    prefix = f"search-{uuid.uuid4().hex[:8]}-"
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}{index}@seed.local', email=f'{prefix}{index}@seed.local', password='!',
+                user_type='psychologist', first_name=FIRST_NAMES[index % 10], last_name=LAST_NAMES[index // 10 % 10]
+            )
+            for index in range(total)
+        ], batch_size=5000)
+        # bulk_create no dispara las señales que crean el perfil y su documento
+        PsychologistProfile.objects.bulk_create([
+            PsychologistProfile(
+                user=user, verification_status='VERIFIED',
+                professional_title=TITLES[index % len(TITLES)],
+                university=UNIVERSITIES[index % len(UNIVERSITIES)],
+                region=REGIONS[index % len(REGIONS)],
+                specialties=[SPECIALTIES[index % 6], SPECIALTIES[index * 7 % 6]],
+            )
+            for index, user in enumerate(users)
+        ], batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _SEARCH_SQL.format(profiles=PsychologistProfile._meta.db_table, users=User._meta.db_table),
+                [SEARCH_CONFIG] * 3
+            )
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {PsychologistProfile._meta.db_table}")
+
+
+def legacy_search(queryset, term):
+    """Filtro anterior del directorio: dos icontains sobre el nombre unidos con OR."""
+    return queryset.filter(Q(user__first_name__icontains=term) | Q(user__last_name__icontains=term))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la búsqueda del directorio anterior (icontains sobre nombre) con "
+        "profiles.search (tsvector en español sin tildes y trigramas). Solo "
+        "PostgreSQL. Con --seed crea antes psicólogos sintéticos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, nargs='?', const=SEED_PROFILES, default=0,
+            help=f"Perfiles sintéticos a crear antes de medir (por defecto {SEED_PROFILES:,})"
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Repeticiones por término")
+        parser.add_argument('--term', action='append', help="Término a buscar (por defecto una lista de ejemplo)")
+
+    def _time(self, queryset, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset[:20])
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("La búsqueda con tsvector y trigramas solo se mide sobre PostgreSQL")
+
+        if options['seed']:
+            self.stdout.write(f"Creando {options['seed']:,} psicólogos sintéticos...")
+            seed_profiles(options['seed'])
+
+        verified = PsychologistProfile.objects.filter(verification_status='VERIFIED')
+        table = PsychologistProfile._meta.db_table
+        self.stdout.write(f"Perfiles verificados: {verified.count():,}")
+        self.stdout.write(
+            f"{'término':<16} {'antes ms':>9} {'resultados':>11} {'ahora ms':>9} {'resultados':>11} {'índice':>7}"
+        )
+        for term in options['term'] or TERMS:
+            legacy = legacy_search(verified, term).order_by('id')
+            current = search(verified, term).order_by('-search_rank', 'id')
+            indexed = uses_index(current.explain(), table, ('psy_search_vector_idx', 'psy_search_text_trgm_idx'))
+            self.stdout.write(
+                f"{term:<16} {self._time(legacy, options['repeat']):>9.2f} {legacy.count():>11,} "
+                f"{self._time(current, options['repeat']):>9.2f} {current.count():>11,} "
+                f"{'sí' if indexed else 'NO':>7}"
+            )
+
+        specialty = verified.filter(specialties__contains=[SPECIALTIES[0]])
+        self.stdout.write(
+            "specialties__contains usa índice: "
+            f"{'sí' if uses_index(specialty.explain(), table, ('psy_specialties_gin_idx',)) else 'NO'}"
+        )
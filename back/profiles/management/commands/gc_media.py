@@ -0,0 +1,87 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.storage import CAS_DIR, delete_unreferenced, referenced_variant_names, unreferenced_names
+
+# Carpetas de MEDIA_ROOT con archivos subidos o generados por la aplicación
+MANAGED_DIRS = (
+    CAS_DIR,
+    'profile_images',
+    'psychologist_documents',
+    'payment_proofs',
+    'client_payment_proofs',
+)
+
+
+def _walk(root, directory):
+    """Genera ``(nombre, tamaño, mtime)`` de los archivos bajo ``directory`` sin listar todo el árbol en memoria."""
+    try:
+        entries = os.scandir(os.path.join(root, directory))
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            name = f"{directory}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(root, name)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                yield name, stat.st_size, stat.st_mtime
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los archivos de media que ya no referencia ninguna fila "
+        "(comprobantes, documentos, portadas, imágenes de perfil y sus miniaturas). "
+        "Recorre el árbol por lotes y consulta la base de datos por cada lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help="Horas desde la última modificación para considerar un archivo (evita borrar subidas en curso)"
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Archivos por consulta a la base de datos")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa lo que se borraría")
+
+    def handle(self, *args, **options):
+        min_age = options['min_age'] * 3600
+        cutoff = time.time() - min_age
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        scanned = deleted = freed = 0
+        # Una sola pasada por los JSON de miniaturas; las que se crean o reutilizan
+        # después quedan protegidas por su fecha de modificación (min_age)
+        variant_names = referenced_variant_names()
+
+        def collect(batch):
+            nonlocal deleted, freed
+            if dry_run:
+                orphans = unreferenced_names(batch, variant_names)
+            else:
+                orphans = delete_unreferenced(batch, min_age=min_age, variant_names=variant_names)
+            for name in sorted(orphans):
+                self.stdout.write(f"{'Se borraría' if dry_run else 'Borrado'}: {name}")
+            deleted += len(orphans)
+            freed += sum(batch[name] for name in orphans)
+
+        batch = {}
+        for directory in MANAGED_DIRS:
+            for name, size, mtime in _walk(settings.MEDIA_ROOT, directory):
+                scanned += 1
+                if mtime > cutoff:
+                    continue
+                batch[name] = size
+                if len(batch) >= batch_size:
+                    collect(batch)
+                    batch = {}
+        if batch:
+            collect(batch)
+
+        verb = "Se borrarían" if dry_run else "Borrados"
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivos revisados: {scanned}. {verb}: {deleted} ({freed / 1024 / 1024:.1f} MB)"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from profiles.models import ProfessionalDocument
+from profiles.video import PRESENTATION_VIDEO, process_presentation_video
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula tamaño, duración, resolución y portada de los videos de "
+        "presentación. Las subidas nuevas se procesan al guardarlas; este "
+        "comando completa los videos anteriores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Reprocesar también los que ya tienen metadatos")
+
+    def handle(self, *args, **options):
+        videos = ProfessionalDocument.objects.filter(document_type=PRESENTATION_VIDEO).exclude(file='')
+        if not options['all']:
+            videos = videos.filter(file_size__isnull=True)
+
+        processed = missing = 0
+        for document in videos.iterator(chunk_size=100):
+            try:
+                process_presentation_video(document)
+            except FileNotFoundError:
+                missing += 1
+                self.stderr.write(f"Documento {document.pk}: no existe {document.file.name}")
+                continue
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Videos procesados: {processed}, sin archivo: {missing}"))
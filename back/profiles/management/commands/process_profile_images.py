@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from profiles.images import process_profile_image
+from profiles.models import AdminProfile, ClientProfile, PsychologistProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las miniaturas WebP/JPEG (y normaliza orientación y EXIF) de las "
+        "imágenes de perfil que aún no las tienen. Las subidas nuevas se procesan "
+        "en segundo plano; este comando completa las anteriores y las que se "
+        "perdieron si el proceso se reinició, así que conviene programarlo (cron)."
+    )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for model in (ClientProfile, PsychologistProfile, AdminProfile):
+            pending = (
+                model.objects.exclude(profile_image__isnull=True).exclude(profile_image='')
+                .filter(profile_image_variants={}).values_list('pk', 'profile_image')
+            )
+            for pk, image_name in pending.iterator(chunk_size=200):
+                try:
+                    process_profile_image(model._meta.label, pk, image_name)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {pk}: {e}")
+                    continue
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Imágenes procesadas: {processed}, con error: {failed}"))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0018_fix_experience_description"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="buffer_minutes",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Minutos libres exigidos entre una sesión y otra",
+                validators=[django.core.validators.MaxValueValidator(120)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="session_length_minutes",
+            field=models.PositiveSmallIntegerField(
+                default=60,
+                help_text="Duración de cada sesión en minutos",
+                validators=[
+                    django.core.validators.MinValueValidator(15),
+                    django.core.validators.MaxValueValidator(240),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="slot_step_minutes",
+            field=models.PositiveSmallIntegerField(
+                default=60,
+                help_text="Minutos entre el inicio de un horario ofrecido y el siguiente",
+                validators=[
+                    django.core.validators.MinValueValidator(5),
+                    django.core.validators.MaxValueValidator(240),
+                ],
+            ),
+        ),
+    ]
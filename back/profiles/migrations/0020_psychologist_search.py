@@ -0,0 +1,117 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    TrigramExtension,
+    UnaccentExtension,
+)
+from django.db import migrations, models
+
+# Español sin tildes: "psicologia" encuentra "psicología" en el tsvector
+CREATE_SEARCH_CONFIG = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
+# icontains compara UPPER(columna); estos índices de trigramas lo aceptan
+CREATE_LOCATION_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS psy_region_upper_trgm_idx "
+    "ON profiles_psychologistprofile USING gin ((UPPER(region::text)) gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS psy_city_upper_trgm_idx "
+    "ON profiles_psychologistprofile USING gin ((UPPER(city::text)) gin_trgm_ops)",
+]
+DROP_LOCATION_INDEXES = [
+    "DROP INDEX CONCURRENTLY IF EXISTS psy_region_upper_trgm_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS psy_city_upper_trgm_idx",
+]
+
+
+def backfill_search_documents(apps, schema_editor):
+    from profiles.search import search_fields
+
+    PsychologistProfile = apps.get_model("profiles", "PsychologistProfile")
+    profiles = PsychologistProfile.objects.select_related("user").only(
+        "id", "professional_title", "university", "specialties",
+        "intervention_areas", "target_populations",
+        "user__first_name", "user__last_name",
+    )
+    for profile in profiles.iterator(chunk_size=1000):
+        PsychologistProfile.objects.filter(pk=profile.pk).update(**search_fields(profile))
+
+
+class Migration(migrations.Migration):
+    # Los índices se crean con CONCURRENTLY para no bloquear las escrituras
+    atomic = False
+
+    dependencies = [
+        ("profiles", "0019_psychologistprofile_buffer_minutes_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(
+            CREATE_SEARCH_CONFIG,
+            reverse_sql="DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent",
+        ),
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="search_text",
+            field=models.TextField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Nombre, título y universidad en minúsculas y sin tildes",
+            ),
+        ),
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="psychologistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="psy_search_vector_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="psychologistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_text"],
+                name="psy_search_text_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="psychologistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["specialties"], name="psy_specialties_gin_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="psychologistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["target_populations"], name="psy_populations_gin_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="psychologistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["intervention_areas"], name="psy_areas_gin_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_LOCATION_INDEXES, reverse_sql=DROP_LOCATION_INDEXES),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0020_psychologist_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="professionaldocument",
+            name="duration_seconds",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="professionaldocument",
+            name="file_size",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="professionaldocument",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="professionaldocument",
+            name="poster",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="psychologist_documents/posters/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="professionaldocument",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0021_presentation_video_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminprofile",
+            name="profile_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="clientprofile",
+            name="profile_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="psychologistprofile",
+            name="profile_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
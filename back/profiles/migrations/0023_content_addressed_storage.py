@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:39
+
+import backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0022_profile_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="adminprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="clientprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="professionaldocument",
+            name="file",
+            field=models.FileField(
+                storage=backend.storage.content_addressed_storage,
+                upload_to="psychologist_documents/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="professionaldocument",
+            name="poster",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                storage=backend.storage.content_addressed_storage,
+                upload_to="psychologist_documents/posters/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="psychologistprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:00
+
+import backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0023_content_addressed_storage"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="adminprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.public_content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="clientprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.public_content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="psychologistprofile",
+            name="profile_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=backend.storage.public_content_addressed_storage,
+                upload_to="profile_images/",
+            ),
+        ),
+    ]
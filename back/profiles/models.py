@@ -1,7 +1,11 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from backend.storage import content_addressed_storage, public_content_addressed_storage
+
 class BaseProfile(models.Model):
     """
     Clase base para perfiles de usuario.
@@ -12,7 +16,11 @@ class BaseProfile(models.Model):
         on_delete=models.CASCADE,
         related_name="%(class)s_profile"
     )
-    profile_image = models.ImageField(upload_to='profile_images/', null=True, blank=True)
+    profile_image = models.ImageField(
+        upload_to='profile_images/', storage=public_content_addressed_storage, null=True, blank=True
+    )
+    # Miniaturas {lado: {formato: nombre}} generadas en segundo plano (profiles/images.py)
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     gender = models.CharField(
@@ -147,6 +155,42 @@ class PsychologistProfile(BaseProfile):
         default='PENDING'
     )
 
+    # Configuración de agenda
+    session_length_minutes = models.PositiveSmallIntegerField(
+        default=60,
+        validators=[MinValueValidator(15), MaxValueValidator(240)],
+        help_text="Duración de cada sesión en minutos"
+    )
+    slot_step_minutes = models.PositiveSmallIntegerField(
+        default=60,
+        validators=[MinValueValidator(5), MaxValueValidator(240)],
+        help_text="Minutos entre el inicio de un horario ofrecido y el siguiente"
+    )
+    buffer_minutes = models.PositiveSmallIntegerField(
+        default=0,
+        validators=[MaxValueValidator(120)],
+        help_text="Minutos libres exigidos entre una sesión y otra"
+    )
+
+    # Búsqueda del directorio (ver profiles.search); las señales los mantienen al día
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Nombre, título y universidad en minúsculas y sin tildes"
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='psy_search_vector_idx'),
+            GinIndex(fields=['search_text'], opclasses=['gin_trgm_ops'], name='psy_search_text_trgm_idx'),
+            # Filtros del directorio con __contains sobre listas JSON
+            GinIndex(fields=['specialties'], name='psy_specialties_gin_idx'),
+            GinIndex(fields=['target_populations'], name='psy_populations_gin_idx'),
+            GinIndex(fields=['intervention_areas'], name='psy_areas_gin_idx'),
+        ]
+
     def get_session_price(self):
         """
         Returns the approved session price for this psychologist.
@@ -185,13 +229,22 @@ class ProfessionalDocument(models.Model):
     
     psychologist = models.ForeignKey(PsychologistProfile, on_delete=models.CASCADE, related_name='verification_documents')
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPES)
-    file = models.FileField(upload_to='psychologist_documents/')
+    file = models.FileField(upload_to='psychologist_documents/', storage=content_addressed_storage)
     description = models.TextField(blank=True)
     is_verified = models.BooleanField(default=False)
     verification_status = models.CharField(max_length=20, choices=VERIFICATION_STATUS, default='pending')
     rejection_reason = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     verified_at = models.DateTimeField(null=True, blank=True)
+    # Metadatos de los videos de presentación, calculados al subirlos (profiles/video.py)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    duration_seconds = models.FloatField(null=True, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    poster = models.ImageField(
+        upload_to='psychologist_documents/posters/', storage=content_addressed_storage,
+        null=True, blank=True, editable=False
+    )
     
     class Meta:
         unique_together = ('psychologist', 'document_type')
@@ -0,0 +1,82 @@
+"""
+Búsqueda del directorio de psicólogos.
+
+Cada perfil guarda dos columnas derivadas que las señales mantienen al día:
+
+- ``search_vector``: ``tsvector`` con la configuración ``spanish_unaccent``
+  (diccionario español sin tildes, creado en la migración) y pesos por campo:
+  nombre (A), título y universidad (B), especialidades, áreas y poblaciones (C).
+- ``search_text``: nombre, título y universidad en minúsculas y sin tildes, con
+  un índice GIN de trigramas para coincidencias parciales o con errores de
+  tipeo ("gonzales" encuentra a "González").
+
+``search`` combina ambas y ordena por relevancia. En bases que no son
+PostgreSQL (los tests) cae en un ``contains`` sobre ``search_text``.
+"""
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, TextField, Value
+from django.db.models.functions import Coalesce
+
+SEARCH_CONFIG = 'spanish_unaccent'
+
+
+def normalize(text):
+    """Minúsculas, sin tildes y con espacios simples; igual para el documento y la consulta."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def _words(values):
+    return ' '.join(str(value) for value in values or [] if value)
+
+
+def search_fields(profile):
+    """Valores de ``search_text`` y ``search_vector`` para un perfil con su usuario."""
+    name = f"{profile.user.first_name} {profile.user.last_name}"
+    professional = f"{profile.professional_title} {profile.university}"
+    topics = _words([
+        *(profile.specialties or []), *(profile.intervention_areas or []), *(profile.target_populations or [])
+    ])
+
+    fields = {'search_text': normalize(f"{name} {professional}")}
+    if connection.vendor == 'postgresql':
+        fields['search_vector'] = (
+            SearchVector(Value(name, output_field=TextField()), weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Value(professional, output_field=TextField()), weight='B', config=SEARCH_CONFIG)
+            + SearchVector(Value(topics, output_field=TextField()), weight='C', config=SEARCH_CONFIG)
+        )
+    return fields
+
+
+def update_search_document(profile):
+    """Recalcula las columnas de búsqueda sin disparar señales."""
+    type(profile).objects.filter(pk=profile.pk).update(**search_fields(profile))
+
+
+def search(queryset, term):
+    """
+    Perfiles de ``queryset`` que coinciden con ``term``, anotados con
+    ``search_rank`` (mayor es más relevante).
+    """
+    normalized = normalize(term)
+    if not normalized:
+        return queryset
+
+    if connection.vendor != 'postgresql':
+        return queryset.filter(search_text__contains=normalized).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=query)
+        # Errores de tipeo y prefijos; ambos usan el índice de trigramas
+        | Q(search_text__trigram_word_similar=normalized)
+        | Q(search_text__contains=normalized)
+    ).annotate(
+        search_rank=Coalesce(SearchRank(F('search_vector'), query), Value(0.0))
+        + TrigramWordSimilarity(normalized, 'search_text')
+    )
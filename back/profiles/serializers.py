@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import ClientProfile, PsychologistProfile, ProfessionalDocument, AdminProfile, ProfessionalExperience
 from django.contrib.auth import get_user_model
 from django.db import connection
+from backend.signed_urls import signed_file_url
+from .images import image_sizes, image_srcset
 
 User = get_user_model()
 
@@ -16,17 +18,37 @@ class ProfessionalDocumentSerializer(serializers.ModelSerializer):
     """Serializer para documentos profesionales"""
     document_type_display = serializers.CharField(source='get_document_type_display', read_only=True)
     verification_status_display = serializers.CharField(source='get_verification_status_display', read_only=True)
+    signed_url = serializers.SerializerMethodField()
     
     class Meta:
         model = ProfessionalDocument
         fields = (
-            'id', 'document_type', 'document_type_display', 'file', 'description', 
+            'id', 'document_type', 'document_type_display', 'file', 'signed_url', 'description', 
             'is_verified', 'verification_status', 'verification_status_display', 
-            'rejection_reason', 'uploaded_at', 'verified_at'
+            'rejection_reason', 'uploaded_at', 'verified_at',
+            'file_size', 'duration_seconds', 'width', 'height', 'poster'
         )
         read_only_fields = (
             'id', 'is_verified', 'verification_status', 'verification_status_display', 
-            'rejection_reason', 'uploaded_at', 'verified_at'
+            'rejection_reason', 'uploaded_at', 'verified_at',
+            'file_size', 'duration_seconds', 'width', 'height', 'poster'
+        )
+
+    def get_signed_url(self, obj):
+        """URL firmada para abrir el documento sin el JWT; solo con la petición en el contexto"""
+        request = self.context.get('request')
+        if request is None or not obj.file:
+            return None
+        kind = 'video' if obj.document_type == 'presentation_video' else 'document'
+        return signed_file_url(request, kind, obj.file)
+
+class PublicProfessionalDocumentSerializer(ProfessionalDocumentSerializer):
+    """Documentos del perfil público: sin archivos ni URLs (el video se entrega con video_payload)"""
+
+    class Meta(ProfessionalDocumentSerializer.Meta):
+        fields = tuple(
+            field for field in ProfessionalDocumentSerializer.Meta.fields
+            if field not in ('file', 'signed_url', 'poster')
         )
 
 # Rest of the serializers remain unchanged
@@ -34,6 +56,8 @@ class BaseProfileSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source='user.first_name', read_only=True)
     last_name = serializers.CharField(source='user.last_name', read_only=True)
     email = serializers.CharField(source='user.email', read_only=True)
+    profile_image_sizes = serializers.SerializerMethodField()
+    profile_image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
@@ -41,8 +65,17 @@ class BaseProfileSerializer(serializers.ModelSerializer):
             'last_name',
             'email',
             'profile_image',
+            'profile_image_sizes',
+            'profile_image_srcset',
         )
 
+    def get_profile_image_sizes(self, obj):
+        """Miniaturas {lado: {webp, jpeg}}; vacío hasta que termina el procesamiento"""
+        return image_sizes(obj)
+
+    def get_profile_image_srcset(self, obj):
+        return image_srcset(obj)
+
 class ClientProfileSerializer(BaseProfileSerializer):
     phone = serializers.CharField(source='phone_number', required=False, allow_blank=True, allow_null=True)
     gender = serializers.CharField(required=False, allow_blank=True, allow_null=True)
@@ -121,13 +154,19 @@ class PsychologistProfileBasicSerializer(BaseProfileSerializer):
     university = serializers.CharField(required=False)
     specialties = serializers.ListField(child=serializers.CharField(), required=False)
     gender = serializers.CharField(read_only=True)  # Add gender field
-    rating = serializers.FloatField(read_only=True) # Añadimos el campo rating
+    # Valoraciones aprobadas anotadas por el directorio público
+    rating = serializers.FloatField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
+    # Disponibilidad anotada por el directorio público
+    next_available_slot = serializers.DateTimeField(read_only=True)
+    free_hours_this_week = serializers.DecimalField(max_digits=6, decimal_places=2, read_only=True)
     
     class Meta(BaseProfileSerializer.Meta):
         model = PsychologistProfile
         fields = BaseProfileSerializer.Meta.fields + (
             'id', 'name', 'university', 'specialties', 
-            'professional_title', 'verification_status', 'gender', 'rating'  # Incluimos 'rating' en fields
+            'professional_title', 'verification_status', 'gender', 'rating', 'rating_count',
+            'next_available_slot', 'free_hours_this_week'
         )
     
     def get_name(self, obj):
@@ -154,12 +193,13 @@ class PsychologistProfileSerializer(PsychologistProfileBasicSerializer):
     class Meta(BaseProfileSerializer.Meta):
         model = PsychologistProfile
         fields = (
-            'id', 'user', 'profile_image', 'rut', 'phone', 'gender', 'region', 'city',
+            'id', 'user', 'profile_image', 'profile_image_sizes', 'profile_image_srcset',
+            'rut', 'phone', 'gender', 'region', 'city',
             'professional_title', 'specialties', 'health_register_number', 'university',
             'graduation_year', 'target_populations', 'intervention_areas',
             'verification_status', 'verification_status_display', 'created_at', 'updated_at',
             'bank_account_number', 'bank_account_type', 'bank_account_type_display', 
             'bank_account_owner', 'bank_account_owner_rut', 'bank_account_owner_email', 'bank_name',
-            'experiences'
+            'experiences', 'session_length_minutes', 'slot_step_minutes', 'buffer_minutes'
         )
         read_only_fields = ('id', 'user', 'verification_status', 'verification_status_display', 'created_at', 'updated_at')
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import ClientProfile, PsychologistProfile, ProfessionalDocument, AdminProfile
 from django.db import transaction
+from .facets import invalidate_facets
+from .search import update_search_document
+from .stats import invalidate_admin_stats
+import logging
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -61,10 +67,10 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
                                 ["", profile.id]
                             )
                     except Exception as e:
-                        print(f"Error al actualizar experience_description: {e}")
+                        logger.warning("Error al actualizar experience_description: %s", e)
                         
                 except Exception as e:
-                    print(f"Error al crear perfil de psicólogo: {e}")
+                    logger.warning("Error al crear perfil de psicólogo: %s", e)
                     # Reintento sin experience_description
                     profile = PsychologistProfile(
                         user=instance, 
@@ -99,3 +105,42 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
                     setattr(instance.adminprofile_profile, key, value)
                 instance.adminprofile_profile.save()
 
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=ClientProfile)
+@receiver(post_delete, sender=ClientProfile)
+@receiver(post_save, sender=PsychologistProfile)
+@receiver(post_delete, sender=PsychologistProfile)
+def user_or_profile_changed(sender, instance, **kwargs):
+    # El login solo actualiza last_login, que no cambia las estadísticas
+    if _only_last_login(kwargs.get('update_fields')):
+        return
+    invalidate_admin_stats()
+
+
+def _only_last_login(update_fields):
+    return bool(update_fields) and set(update_fields) <= {'last_login'}
+
+
+@receiver(post_save, sender=PsychologistProfile)
+def psychologist_profile_saved(sender, instance, **kwargs):
+    update_search_document(instance)
+    invalidate_facets()
+
+
+@receiver(post_delete, sender=PsychologistProfile)
+def psychologist_profile_deleted(sender, instance, **kwargs):
+    invalidate_facets()
+
+
+@receiver(post_save, sender=User)
+def psychologist_user_saved(sender, instance, created, **kwargs):
+    # El nombre del psicólogo es parte del documento de búsqueda; al crear el
+    # usuario lo calcula el guardado del perfil
+    if created or instance.user_type != 'psychologist' or _only_last_login(kwargs.get('update_fields')):
+        return
+    profile = PsychologistProfile.objects.filter(user=instance).first()
+    if profile is not None:
+        profile.user = instance
+        update_search_document(profile)
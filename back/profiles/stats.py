@@ -0,0 +1,99 @@
+"""
+Estadísticas del panel de administración.
+
+Los contadores de usuarios salen de una sola consulta de agregación condicional
+sobre ``User`` (``Exists`` para el perfil de cliente y un join con el perfil
+de psicólogo para su estado de verificación) y la serie de registros por semana de otra agrupada
+con ``TruncWeek``. El resultado se guarda en la cache
+(``DASHBOARD_STATS_CACHE_TTL``); las señales de ``User`` y de los perfiles la
+invalidan.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import ClientProfile
+
+User = get_user_model()
+
+ADMIN_STATS_KEY = "profiles:admin-stats"
+PENDING_VERIFICATION_STATUSES = ['PENDING', 'DOCUMENTS_SUBMITTED', 'VERIFICATION_IN_PROGRESS']
+SIGNUP_WEEKS = 12
+
+
+def invalidate_admin_stats():
+    """Borra las estadísticas ahora y de nuevo al confirmar la transacción."""
+    cache.delete(ADMIN_STATS_KEY)
+    transaction.on_commit(lambda: cache.delete(ADMIN_STATS_KEY))
+
+
+def _signups_by_week(now):
+    """Registros de las últimas ``SIGNUP_WEEKS`` semanas (lunes a domingo), incluidas las vacías."""
+    today = now.date()
+    first_week = today - timedelta(days=today.weekday(), weeks=SIGNUP_WEEKS - 1)
+
+    rows = (
+        User.objects.filter(date_joined__gte=datetime.combine(first_week, time.min))
+        .annotate(week=TruncWeek('date_joined'))
+        .values('week')
+        .annotate(
+            total=Count('id'),
+            clients=Count('id', filter=Q(user_type='client')),
+            psychologists=Count('id', filter=Q(user_type='psychologist')),
+        )
+        .order_by('week')
+    )
+    by_week = {row['week'].date(): row for row in rows}
+
+    series = []
+    for index in range(SIGNUP_WEEKS):
+        week = first_week + timedelta(weeks=index)
+        row = by_week.get(week, {})
+        series.append({
+            "week": week,
+            "total": row.get('total', 0),
+            "clients": row.get('clients', 0),
+            "psychologists": row.get('psychologists', 0),
+        })
+    return series
+
+
+def compute_admin_stats(now=None):
+    """Contadores de usuarios activos con perfil en una consulta y la serie semanal en otra."""
+    now = now or timezone.now()
+    psychologist = Q(user_type='psychologist', psychologist_status__isnull=False)
+
+    counts = User.objects.filter(is_active=True).alias(
+        has_client_profile=Exists(ClientProfile.objects.filter(user=OuterRef('pk'))),
+        psychologist_status=F('psychologistprofile_profile__verification_status'),
+    ).aggregate(
+        clients=Count('id', filter=Q(user_type='client', has_client_profile=True)),
+        psychologists=Count('id', filter=psychologist),
+        verified=Count('id', filter=psychologist & Q(psychologist_status='VERIFIED')),
+        pending=Count('id', filter=psychologist & Q(psychologist_status__in=PENDING_VERIFICATION_STATUSES)),
+        rejected=Count('id', filter=psychologist & Q(psychologist_status='REJECTED')),
+    )
+
+    return {
+        'totalUsers': counts['clients'] + counts['psychologists'],
+        'verifiedUsers': counts['verified'],
+        'pendingUsers': counts['pending'],
+        'rejectedUsers': counts['rejected'],
+        'clientUsers': counts['clients'],
+        'signupsByWeek': _signups_by_week(now),
+    }
+
+
+def get_admin_stats():
+    """Estadísticas del panel de administración, desde la cache si están vigentes."""
+    stats = cache.get(ADMIN_STATS_KEY)
+    if stats is None:
+        stats = compute_admin_stats()
+        cache.set(ADMIN_STATS_KEY, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TTL', 60))
+    return stats
@@ -1,3 +1,536 @@
-from django.test import TestCase
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from backend.storage import MEDIA_REFERENCES, VARIANT_REFERENCES, delete_unreferenced, release_files
+from backend.testing import LOCMEM_CACHES, QueryBudgetMixin
+from .images import VARIANT_SIZES, process_profile_image
+from .models import ClientProfile, ProfessionalDocument, PsychologistProfile
+from .search import normalize
+from .stats import SIGNUP_WEEKS
+
+User = get_user_model()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AdminStatisticsTests(QueryBudgetMixin, TestCase):
+    url = '/api/profiles/admin/stats/dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin@example.com',
+            password='testpass123', user_type='admin'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.admin)
+        self.created = 0
+
+    def add_users(self, user_type, total, **profile_fields):
+        users = []
+        for _ in range(total):
+            self.created += 1
+            users.append(User.objects.create_user(
+                email=f'user{self.created}@example.com', username=f'user{self.created}@example.com',
+                password='testpass123', user_type=user_type
+            ))
+        if profile_fields:
+            PsychologistProfile.objects.filter(user__in=users).update(**profile_fields)
+        return users
+
+    def get(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        return response.data, len(queries)
+
+    def test_counts(self):
+        self.add_users('client', 3)
+        self.add_users('psychologist', 2, verification_status='VERIFIED')
+        self.add_users('psychologist', 1, verification_status='DOCUMENTS_SUBMITTED')
+        self.add_users('psychologist', 1, verification_status='REJECTED')
+        inactive = self.add_users('client', 1)[0]
+        inactive.is_active = False
+        inactive.save()
+
+        data, _ = self.get()
+        self.assertEqual(
+            {key: value for key, value in data.items() if key != 'signupsByWeek'},
+            {'totalUsers': 7, 'verifiedUsers': 2, 'pendingUsers': 1, 'rejectedUsers': 1, 'clientUsers': 3}
+        )
+
+    def test_query_count_does_not_grow_with_users(self):
+        self.add_users('client', 1)
+        _, expected = self.get()
+        self.add_users('client', 10)
+        self.add_users('psychologist', 10)
+        data, queries = self.get()
+        self.assertEqual(queries, expected)
+        self.assertEqual(data['totalUsers'], 21)
+
+    def test_signups_by_week(self):
+        users = self.add_users('client', 2) + self.add_users('psychologist', 1)
+        User.objects.filter(pk=users[0].pk).update(date_joined=datetime.now() - timedelta(weeks=2))
+
+        data, _ = self.get()
+        series = data['signupsByWeek']
+        self.assertEqual(len(series), SIGNUP_WEEKS)
+        self.assertEqual(series[-1]['week'].weekday(), 0)
+        # La semana actual incluye al administrador
+        self.assertEqual(series[-1], {**series[-1], 'total': 3, 'clients': 1, 'psychologists': 1})
+        self.assertEqual(series[-3]['clients'], 1)
+        self.assertEqual(sum(week['total'] for week in series), 4)
+
+    def test_cached_until_users_change(self):
+        self.add_users('client', 1)
+        self.get()
+        response = self.api.get(self.url)
+        self.assertEqual(response.data['clientUsers'], 1)
+
+        self.add_users('client', 1)
+        response = self.api.get(self.url)
+        self.assertEqual(response.data['clientUsers'], 2)
+
+        PsychologistProfile.objects.get(user=self.add_users('psychologist', 1)[0]).delete()
+        response = self.api.get(self.url)
+        self.assertEqual(response.data['totalUsers'], 2)
+
+
+class DirectorySearchTests(TestCase):
+    url = '/api/profiles/public/psychologists/'
+
+    def add_psychologist(self, first_name, last_name, **fields):
+        user = User.objects.create_user(
+            email=f'{first_name}.{last_name}@example.com', username=f'{first_name}.{last_name}@example.com',
+            password='testpass123', user_type='psychologist', first_name=first_name, last_name=last_name
+        )
+        profile = PsychologistProfile.objects.get(user=user)
+        for field, value in {'verification_status': 'VERIFIED', **fields}.items():
+            setattr(profile, field, value)
+        profile.save()
+        return profile
+
+    def search(self, **params):
+        response = APIClient().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [row['id'] for row in results]
+
+    def test_normalize(self):
+        self.assertEqual(normalize('  José  MUÑOZ  Pérez '), 'jose munoz perez')
+
+    def test_search_document_follows_profile_and_user(self):
+        profile = self.add_psychologist('José', 'González', professional_title='Psicólogo Clínico')
+        profile.refresh_from_db()
+        self.assertEqual(profile.search_text, 'jose gonzalez psicologo clinico')
+
+        profile.user.last_name = 'Núñez'
+        profile.user.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.search_text, 'jose nunez psicologo clinico')
+
+    def test_search_ignores_accents_and_case(self):
+        match = self.add_psychologist('María', 'Muñoz', university='Universidad de Concepción')
+        self.add_psychologist('Pedro', 'Rojas')
+        self.add_psychologist('Ana', 'Muñoz', verification_status='PENDING')
+
+        self.assertEqual(self.search(q='munoz'), [match.user_id])
+        self.assertEqual(self.search(q='CONCEPCIÓN'), [match.user_id])
+        # El parámetro anterior sigue funcionando
+        self.assertEqual(self.search(name='María'), [match.user_id])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DirectoryFacetsTests(QueryBudgetMixin, TestCase):
+    url = '/api/profiles/public/psychologists/facets/'
+
+    def setUp(self):
+        cache.clear()
+        self.add_psychologist('ana', specialties=['Ansiedad', 'Duelo'], target_populations=['Adultos'],
+                              region='Biobío', gender='FEMALE')
+        self.add_psychologist('bea', specialties=['Ansiedad'], target_populations=['Adultos', 'Adolescentes'],
+                              region='Metropolitana', gender='FEMALE')
+        self.add_psychologist('carlos', specialties=['Duelo'], region='Metropolitana', gender='MALE')
+        self.add_psychologist('dora', verification_status='PENDING', specialties=['Ansiedad'], region='Biobío')
+
+    def add_psychologist(self, name, **fields):
+        user = User.objects.create_user(
+            email=f'{name}@example.com', username=f'{name}@example.com',
+            password='testpass123', user_type='psychologist', first_name=name
+        )
+        profile = PsychologistProfile.objects.get(user=user)
+        for field, value in {'verification_status': 'VERIFIED', **fields}.items():
+            setattr(profile, field, value)
+        profile.save()
+        return profile
+
+    def facets(self, **params):
+        response = APIClient().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        return response.data
+
+    def test_counts_every_facet(self):
+        data = self.facets()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['facets'], {
+            'specialties': [{'value': 'Ansiedad', 'count': 2}, {'value': 'Duelo', 'count': 2}],
+            'target_populations': [{'value': 'Adultos', 'count': 2}, {'value': 'Adolescentes', 'count': 1}],
+            'region': [{'value': 'Metropolitana', 'count': 2}, {'value': 'Biobío', 'count': 1}],
+            'gender': [{'value': 'FEMALE', 'count': 2}, {'value': 'MALE', 'count': 1}],
+        })
+
+    def test_counts_follow_current_filters(self):
+        data = self.facets(region='metropolitana', q='carlos')
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['facets']['specialties'], [{'value': 'Duelo', 'count': 1}])
+        self.assertEqual(data['facets']['gender'], [{'value': 'MALE', 'count': 1}])
+
+    def test_cached_per_filters_until_a_profile_changes(self):
+        self.facets(region='Biobío')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.facets(region='Biobío')['total'], 1)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.facets(region='Metropolitana')['total'], 2)
+
+        self.add_psychologist('elena', region='Biobío')
+        self.assertEqual(self.facets(region='Biobío')['total'], 2)
+
+
+@override_settings(VIDEO_PROCESSING_WORKERS=0)
+class PresentationVideoTests(TestCase):
+    CONTENT = b'\x00\x00\x00\x18ftypmp42' + bytes(range(256)) * 20
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            email='psy@example.com', username='psy@example.com',
+            password='testpass123', user_type='psychologist'
+        )
+        self.profile = PsychologistProfile.objects.get(user=self.user)
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+    def upload(self, content=CONTENT):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/api/profiles/psychologist-profiles/me/upload-verification-document/', {
+                'document_type': 'presentation_video',
+                'file': SimpleUploadedFile('presentacion.mp4', content, content_type='video/mp4'),
+            }, format='multipart')
+        self.assertIn(response.status_code, (200, 201))
+        return ProfessionalDocument.objects.get(pk=response.data['id'])
+
+    def approve(self, document):
+        document.verification_status = 'approved'
+        document.save()
+        self.profile.verification_status = 'VERIFIED'
+        self.profile.save()
+
+    @override_settings(FFPROBE_BINARY='ffprobe-inexistente', FFMPEG_BINARY='ffmpeg-inexistente')
+    def test_without_ffmpeg_only_size_is_recorded(self):
+        document = self.upload()
+        self.assertEqual(document.file_size, len(self.CONTENT))
+        self.assertIsNone(document.duration_seconds)
+        self.assertFalse(document.poster)
+
+    def test_metadata_and_poster_at_upload(self):
+        probe = json.dumps({'format': {'duration': '42.517'}, 'streams': [{'width': 1920, 'height': 1080}]})
+
+        def run(command, **kwargs):
+            output = probe.encode() if 'ffprobe' in command[0] else b'\xff\xd8jpeg'
+            return subprocess.CompletedProcess(command, 0, stdout=output, stderr=b'')
+
+        with mock.patch('profiles.video.shutil.which', side_effect=lambda name: f'/usr/bin/{name}'), \
+                mock.patch('profiles.video.subprocess.run', side_effect=run):
+            document = self.upload()
+        self.assertEqual(
+            (document.file_size, document.duration_seconds, document.width, document.height),
+            (len(self.CONTENT), 42.52, 1920, 1080)
+        )
+        self.assertEqual(document.poster.read(), b'\xff\xd8jpeg')
+
+    @override_settings(FFPROBE_BINARY='ffprobe-inexistente', FFMPEG_BINARY='ffmpeg-inexistente')
+    def test_processing_runs_after_the_response(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.api.post('/api/profiles/psychologist-profiles/me/upload-verification-document/', {
+                'document_type': 'presentation_video',
+                'file': SimpleUploadedFile('presentacion.mp4', self.CONTENT, content_type='video/mp4'),
+            }, format='multipart')
+        self.assertIsNone(ProfessionalDocument.objects.get(pk=response.data['id']).file_size)
+
+        # Otro video subido antes de procesar el primero: el primero ya no se registra
+        document = self.upload(self.CONTENT + b'otro')
+        for callback in callbacks:
+            callback()
+        document.refresh_from_db()
+        self.assertEqual(document.file_size, len(self.CONTENT) + 4)
+
+    @override_settings(FFPROBE_BINARY='ffprobe-inexistente', FFMPEG_BINARY='ffmpeg-inexistente')
+    def test_public_video_is_served_by_ranges(self):
+        document = self.upload()
+        anonymous = APIClient()
+        url = f'/api/profiles/public/psychologists/{self.user.pk}/presentation-video/'
+        self.assertEqual(anonymous.get(url).status_code, 404)
+
+        self.approve(document)
+        response = anonymous.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['file_size'], len(self.CONTENT))
+        self.assertIsNone(response.data['poster_url'])
+        detail = anonymous.get(f'/api/profiles/public/psychologists/{self.user.pk}/')
+        self.assertEqual(detail.data['presentation_video']['file_size'], len(self.CONTENT))
+
+        video = anonymous.get(response.data['url'], HTTP_RANGE='bytes=4-11')
+        self.assertEqual(video.status_code, 206)
+        self.assertEqual(video['Content-Type'], 'video/mp4')
+        self.assertEqual(b''.join(video.streaming_content), b'ftypmp42')
+
+    @override_settings(FFPROBE_BINARY='ffprobe-inexistente', FFMPEG_BINARY='ffmpeg-inexistente')
+    def test_public_detail_has_no_document_urls(self):
+        video = self.upload()
+        self.approve(video)
+        ProfessionalDocument.objects.create(
+            psychologist=self.profile, document_type='professional_id', verification_status='approved',
+            file=ContentFile(b'titulo', name='titulo.pdf')
+        )
+
+        response = APIClient().get(f'/api/profiles/public/psychologists/{self.profile.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['verification_documents']), 2)
+        for document in response.data['verification_documents']:
+            self.assertFalse({'file', 'signed_url', 'poster'} & set(document))
+        # Solo la URL firmada del video
+        body = response.content.decode()
+        self.assertEqual(body.count('/api/files/'), 2)
+        self.assertNotIn('cas/', body)
+
+    def test_profile_id_takes_precedence_over_user_id(self):
+        def psychologist(email, profile_id):
+            user = User.objects.create_user(email=email, username=email, password='testpass123', user_type='client')
+            return PsychologistProfile.objects.create(user=user, id=profile_id, verification_status='VERIFIED')
+
+        # Perfiles cuyo ID no coincide con el del usuario (datos anteriores a la señal)
+        owner = psychologist('dueno@example.com', 900001)
+        ProfessionalDocument.objects.create(
+            psychologist=owner, document_type='presentation_video', verification_status='approved',
+            file=ContentFile(self.CONTENT, name='presentacion.mp4')
+        )
+        psychologist('otro@example.com', owner.user_id)
+
+        anonymous = APIClient()
+        url = '/api/profiles/public/psychologists/{}/presentation-video/'
+        self.assertEqual(anonymous.get(url.format(owner.pk)).status_code, 200)
+        # El ID pedido es el de otro perfil, que no tiene video
+        self.assertEqual(anonymous.get(url.format(owner.user_id)).status_code, 404)
+
+
+@override_settings(IMAGE_PROCESSING_WORKERS=0, MEDIA_DELETE_GRACE_SECONDS=0)
+class ProfileImageVariantsTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            email='client@example.com', username='client@example.com',
+            password='testpass123', user_type='client'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+    def photo(self):
+        """JPEG apaisado de 400x200 guardado de lado (orientación 6) y con datos de la cámara."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camara'
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post(
+                '/api/profiles/client-profiles/me/upload_image/', {'profile_image': self.photo()}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        return ClientProfile.objects.get(user=self.user)
+
+    def test_variants_are_oriented_and_stripped(self):
+        profile = self.upload()
+        self.assertEqual(sorted(profile.profile_image_variants, key=int), [str(size) for size in VARIANT_SIZES])
+        # El original con EXIF nunca se guarda: solo la versión normalizada
+        stored = [name for _, _, files in os.walk(default_storage.path('profile_images/cas')) for name in files]
+        self.assertEqual(stored, [os.path.basename(profile.profile_image.name)])
+
+        with default_storage.open(profile.profile_image.name) as file, Image.open(file) as full:
+            # Rotada según EXIF y sin metadatos
+            self.assertEqual(full.size, (200, 400))
+            self.assertFalse(full.getexif())
+        with default_storage.open(profile.profile_image_variants['160']['webp']) as file, Image.open(file) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (160, 160)))
+
+        data = self.api.get('/api/profiles/client-profiles/me/').data
+        self.assertEqual(set(data['profile_image_sizes']['64']), {'webp', 'jpeg'})
+        self.assertEqual(data['profile_image_srcset']['webp'].count('w,'), len(VARIANT_SIZES) - 1)
+
+    def test_upload_is_stripped_before_the_background_job(self):
+        # Sin ejecutar los on_commit: el trabajo de las miniaturas se perdió (p. ej. reinicio del worker)
+        with self.captureOnCommitCallbacks():
+            response = self.api.post(
+                '/api/profiles/client-profiles/me/upload_image/', {'profile_image': self.photo()}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        profile = ClientProfile.objects.get(user=self.user)
+        self.assertEqual(profile.profile_image_variants, {})
+        with default_storage.open(profile.profile_image.name) as file, Image.open(file) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (200, 400)))
+            self.assertFalse(image.getexif())
+
+        # El comando completa las miniaturas sin volver a codificar la imagen
+        call_command('process_profile_images', stdout=io.StringIO())
+        processed = ClientProfile.objects.get(user=self.user)
+        self.assertEqual(processed.profile_image, profile.profile_image)
+        self.assertEqual(len(processed.profile_image_variants), len(VARIANT_SIZES))
+
+    def test_invalid_image_is_rejected(self):
+        response = self.api.post('/api/profiles/client-profiles/me/upload_image/', {
+            'profile_image': SimpleUploadedFile('foto.jpg', b'no es una imagen', content_type='image/jpeg')
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ClientProfile.objects.get(user=self.user).profile_image)
+
+    def test_stale_jobs_do_not_overwrite_a_newer_image(self):
+        profile = self.upload()
+        self.assertFalse(process_profile_image(profile._meta.label, profile.pk, 'profile_images/anterior.jpg'))
+        self.assertEqual(ClientProfile.objects.get(pk=profile.pk).profile_image, profile.profile_image)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.profiles = []
+        for email in ('uno@example.com', 'dos@example.com'):
+            user = User.objects.create_user(email=email, username=email, password='testpass123', user_type='client')
+            self.profiles.append(ClientProfile.objects.get(user=user))
+
+    def set_image(self, profile, content):
+        profile.profile_image = SimpleUploadedFile('foto.png', content, content_type='image/png')
+        profile.save()
+        return profile.profile_image.name
+
+    def old_file(self, name, content=b'x'):
+        """Archivo escrito directamente en MEDIA_ROOT con fecha de hace dos días."""
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+        two_days_ago = time.time() - 48 * 3600
+        os.utime(path, (two_days_ago, two_days_ago))
+        return name
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.set_image(self.profiles[0], b'misma imagen')
+        second = self.set_image(self.profiles[1], b'misma imagen')
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^profile_images/cas/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(first)))), 1)
+
+    @override_settings(MEDIA_DELETE_GRACE_SECONDS=0)
+    def test_released_file_is_kept_while_referenced(self):
+        name = self.set_image(self.profiles[0], b'misma imagen')
+        self.set_image(self.profiles[1], b'misma imagen')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.set_image(self.profiles[0], b'otra imagen')
+            release_files([name])
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profiles[1].profile_image = None
+            self.profiles[1].save()
+            release_files([name])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_recently_reused_file_is_not_released(self):
+        name = self.set_image(self.profiles[0], b'misma imagen')
+        os.utime(default_storage.path(name), (0, 0))
+        # Otra petición reutiliza el archivo pero todavía no confirma su fila
+        profile = self.profiles[1]
+        profile.profile_image = SimpleUploadedFile('foto.png', b'misma imagen', content_type='image/png')
+        profile.profile_image.field.pre_save(profile, add=False)
+        self.assertGreater(os.path.getmtime(default_storage.path(name)), time.time() - 60)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClientProfile.objects.filter(pk=self.profiles[0].pk).update(profile_image=None)
+            release_files([name])
+        self.assertTrue(default_storage.exists(name))
+
+        # Pasado el plazo y sin referencias, se borra
+        os.utime(default_storage.path(name), (0, 0))
+        self.assertEqual(delete_unreferenced([name]), {name})
+
+    def test_release_leaves_variants_to_gc_media(self):
+        variant = self.old_file('profile_images/variants/miniatura.webp')
+        with self.assertNumQueries(len(MEDIA_REFERENCES)):
+            self.assertEqual(delete_unreferenced([variant]), set())
+        self.assertTrue(default_storage.exists(variant))
+
+        call_command('gc_media', stdout=io.StringIO())
+        self.assertFalse(default_storage.exists(variant))
+
+    def test_gc_media_deletes_only_old_orphans(self):
+        referenced = self.set_image(self.profiles[0], b'en uso')
+        os.utime(default_storage.path(referenced), (0, 0))
+        variant = self.old_file('profile_images/variants/miniatura.webp')
+        ClientProfile.objects.filter(pk=self.profiles[0].pk).update(
+            profile_image_variants={'64': {'webp': variant}}
+        )
+        orphans = [self.old_file('cas/ab/huerfano.pdf'), self.old_file('payment_proofs/antiguo.pdf')]
+        protected = self.old_file('profile_images/default-profile.png')
+        recent = 'cas/cd/reciente.pdf'
+        default_storage.save(recent, ContentFile(b'subida en curso'))
+
+        out = io.StringIO()
+        call_command('gc_media', '--dry-run', stdout=out)
+        self.assertIn('Se borrarían: 2', out.getvalue())
+        self.assertTrue(all(default_storage.exists(name) for name in orphans))
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('gc_media', '--batch-size', '2', stdout=io.StringIO())
+        self.assertFalse(any(default_storage.exists(name) for name in orphans))
+        # Los JSON de miniaturas se leen una vez por ejecución, no por lote
+        variant_scans = [query for query in queries if 'profile_image_variants' in query['sql']]
+        self.assertEqual(len(variant_scans), len(VARIANT_REFERENCES))
+        for name in (referenced, variant, protected, recent):
+            self.assertTrue(default_storage.exists(name), name)
@@ -1,8 +1,9 @@
 from django.urls import path, include
+from rest_framework.permissions import AllowAny
 from rest_framework.routers import DefaultRouter
 from .views import (
     ClientProfileViewSet, PsychologistProfileViewSet,
-    PublicPsychologistListView, PsychologistDetailView,
+    PublicPsychologistListView, PublicPsychologistFacetsView, PsychologistDetailView,
     AdminProfileViewSet
 )
 from .views.public_views import PublicBankInfoView
@@ -129,13 +130,15 @@ urlpatterns = [
           name='psychologist-delete-document'),
      
      path('public/psychologists/', PublicPsychologistListView.as_view(), name='public-psychologists'),
+     path('public/psychologists/facets/', PublicPsychologistFacetsView.as_view(),
+          name='public-psychologist-facets'),
      path('public/psychologists/<int:pk>/', PsychologistDetailView.as_view(), name='public-psychologist-detail'),
      path('public/psychologists/<int:pk>/experiences/', 
           PsychologistProfileViewSet.as_view({'get': 'public_experiences'}), 
           name='public-psychologist-experiences'),
      
      path('public/psychologists/<int:pk>/presentation-video/', 
-          PsychologistProfileViewSet.as_view({'get': 'get_presentation_video'}), 
+          PsychologistProfileViewSet.as_view({'get': 'get_presentation_video'}, permission_classes=[AllowAny]), 
           name='psychologist-presentation-video'),
      
      # Add this to the urlpatterns list for psychologist (already exists)
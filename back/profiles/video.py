@@ -0,0 +1,164 @@
+"""
+Metadatos y cuadro de portada de los videos de presentación.
+
+Al subir un ``ProfessionalDocument`` de tipo ``presentation_video`` se guardan
+su tamaño, duración y resolución (``ffprobe``) y un JPEG de portada
+(``ffmpeg``). Con eso el perfil público muestra la portada y carga el video
+solo cuando se reproduce, pidiéndolo por partes (``Range``) a la URL firmada.
+``schedule_presentation_video`` hace ese procesamiento fuera de la petición, en
+un hilo, al confirmar la transacción.
+
+``ffprobe`` y ``ffmpeg`` son binarios del sistema (``FFPROBE_BINARY`` y
+``FFMPEG_BINARY``); si no están, solo se registra el tamaño.
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from backend.signed_urls import signed_file_url
+from backend.storage import release_files
+
+logger = logging.getLogger(__name__)
+
+PRESENTATION_VIDEO = 'presentation_video'
+
+# Segundos que puede tardar cada binario antes de abandonar el procesamiento
+PROBE_TIMEOUT = 30
+# Ancho máximo de la portada; el alto mantiene la proporción
+POSTER_WIDTH = 1280
+
+METADATA_FIELDS = ['file_size', 'duration_seconds', 'width', 'height', 'poster']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.VIDEO_PROCESSING_WORKERS, thread_name_prefix='presentation-videos'
+            )
+        return _executor
+
+
+def probe(path):
+    """``duration_seconds``, ``width`` y ``height`` del video; vacío si no se pudo leer."""
+    ffprobe = shutil.which(settings.FFPROBE_BINARY)
+    if ffprobe is None:
+        return {}
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format',
+             '-show_streams', '-select_streams', 'v:0', path],
+            capture_output=True, check=True, timeout=PROBE_TIMEOUT
+        )
+        info = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.warning("ffprobe no pudo leer %s: %s", path, e)
+        return {}
+
+    metadata = {}
+    duration = info.get('format', {}).get('duration')
+    if duration is not None:
+        metadata['duration_seconds'] = round(float(duration), 2)
+    streams = info.get('streams') or [{}]
+    for field in ('width', 'height'):
+        if streams[0].get(field):
+            metadata[field] = int(streams[0][field])
+    return metadata
+
+
+def poster_frame(path, duration=None):
+    """JPEG de un cuadro cercano al inicio del video o ``None`` si no se pudo extraer."""
+    ffmpeg = shutil.which(settings.FFMPEG_BINARY)
+    if ffmpeg is None:
+        return None
+    # Un segundo después del inicio evita el cuadro negro de muchos videos
+    offset = min(1.0, duration / 2) if duration else 0
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', str(offset), '-i', path, '-frames:v', '1',
+             '-vf', f'scale=min({POSTER_WIDTH}\\,iw):-2', '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1'],
+            capture_output=True, check=True, timeout=PROBE_TIMEOUT
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning("ffmpeg no pudo extraer la portada de %s: %s", path, e)
+        return None
+    return result.stdout or None
+
+
+def process_presentation_video(document):
+    """
+    Registra tamaño, duración, resolución y portada del video. Se guarda solo si
+    el documento sigue teniendo el mismo archivo; devuelve si se guardó.
+    """
+    path = document.file.path
+    metadata = {'file_size': os.path.getsize(path), 'duration_seconds': None, 'width': None, 'height': None}
+    metadata.update(probe(path))
+    for field, value in metadata.items():
+        setattr(document, field, value)
+
+    previous_poster = document.poster.name
+    document.poster = None
+    poster = poster_frame(path, metadata['duration_seconds'])
+    if poster:
+        name = os.path.splitext(os.path.basename(document.file.name))[0] + '.jpg'
+        document.poster.save(name, ContentFile(poster), save=False)
+
+    # Si entretanto se subió otro video, no se pisan sus metadatos
+    values = {field: getattr(document, field) for field in METADATA_FIELDS}
+    values['poster'] = document.poster.name or None
+    updated = type(document).objects.filter(pk=document.pk, file=document.file.name).update(**values)
+    if not updated:
+        release_files([document.poster.name])
+    elif previous_poster != document.poster.name:
+        release_files([previous_poster])
+    return bool(updated)
+
+
+def _run(pk, file_name, in_thread=True):
+    try:
+        Document = apps.get_model('profiles', 'ProfessionalDocument')
+        document = Document.objects.filter(pk=pk, file=file_name).first()
+        if document is not None:
+            process_presentation_video(document)
+    except Exception:
+        logger.exception("No se pudo procesar el video del documento %s", pk)
+    finally:
+        if in_thread:
+            close_old_connections()
+
+
+def schedule_presentation_video(document):
+    """Procesa el video recién subido fuera de la petición, al confirmar la transacción."""
+    if document.document_type != PRESENTATION_VIDEO:
+        return
+    args = (document.pk, document.file.name)
+    if settings.VIDEO_PROCESSING_WORKERS == 0:
+        # Sin hilos (tests y entornos de un solo proceso)
+        transaction.on_commit(lambda: _run(*args, in_thread=False))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run, *args))
+
+
+def video_payload(request, document):
+    """Datos del video para el perfil público: URLs firmadas y metadatos para cargarlo de forma diferida."""
+    return {
+        'url': signed_file_url(request, 'video', document.file),
+        'poster_url': signed_file_url(request, 'video', document.poster) if document.poster else None,
+        'file_size': document.file_size,
+        'duration_seconds': document.duration_seconds,
+        'width': document.width,
+        'height': document.height,
+    }
@@ -2,6 +2,7 @@ from .client_views import ClientProfileViewSet
 from .psychologist_views import (
     PsychologistProfileViewSet, 
     PublicPsychologistListView,
+    PublicPsychologistFacetsView,
     PsychologistDetailView
 )
 from .admin_views import AdminProfileViewSet
@@ -10,6 +11,7 @@ __all__ = [
     'ClientProfileViewSet',
     'PsychologistProfileViewSet',
     'PublicPsychologistListView',
+    'PublicPsychologistFacetsView',
     'PsychologistDetailView',
     'AdminProfileViewSet',
 ]
\ No newline at end of file
@@ -1,18 +1,23 @@
-import os
+import logging
 from django.conf import settings
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from backend.storage import release_files
 
 from ..models import AdminProfile, PsychologistProfile
 from ..serializers import AdminProfileSerializer, UserBasicSerializer
 from ..permissions import IsAdminUser, IsAdminOrClient
+from ..images import clean_profile_image, image_files, schedule_image_variants
+from ..stats import get_admin_stats
 
 # Obtener el modelo de usuario
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 # Agregar esta clase con el endpoint para las estadísticas
 class AdminStatisticsView(APIView):
     """API endpoint para obtener estadísticas del panel de administración"""
@@ -21,76 +26,9 @@ class AdminStatisticsView(APIView):
     def get(self, request):
         """Obtener estadísticas para el dashboard del administrador"""
         try:
-            # Importar modelos necesarios
-            from ..models import ClientProfile, PsychologistProfile, AdminProfile
-            from django.db.models import Count
-            
-            # Análisis detallado de cada usuario
-            print("\n[DEBUG] ======= ANÁLISIS DETALLADO DE USUARIOS Y PERFILES =======")
-            all_users = User.objects.all()
-            
-            psychologist_ids = [] # IDs de usuarios que son psicólogos
-            client_ids = []       # IDs de usuarios que son clientes
-            
-            for user in all_users:
-                # Verificar si tienen perfiles asociados
-                has_psychologist_profile = PsychologistProfile.objects.filter(user=user).exists()
-                has_client_profile = ClientProfile.objects.filter(user=user).exists()
-                has_admin_profile = AdminProfile.objects.filter(user=user).exists()
-                
-                print(f"[DEBUG] Usuario ID: {user.id}, Email: {user.email}, Tipo: {user.user_type}")
-                print(f"[DEBUG]   - Perfiles: Psicólogo: {has_psychologist_profile}, Cliente: {has_client_profile}, Admin: {has_admin_profile}")
-                
-                # Recolectar IDs de psicólogos y clientes para el conteo
-                if user.user_type == 'psychologist' and has_psychologist_profile and user.is_active:
-                    psychologist_ids.append(user.id)
-                elif user.user_type == 'client' and has_client_profile and user.is_active:
-                    client_ids.append(user.id)
-            
-            print("[DEBUG] =========================================================\n")
-            
-            # Conteo final
-            print(f"[DEBUG] Conteo final de perfiles verificados:")
-            print(f"[DEBUG] - Total clientes con perfil: {len(client_ids)}")
-            print(f"[DEBUG] - Total psicólogos con perfil: {len(psychologist_ids)}")
-            
-            # Obtener estados de verificación
-            psychologist_profiles = PsychologistProfile.objects.filter(user_id__in=psychologist_ids)
-            verified_count = psychologist_profiles.filter(verification_status='VERIFIED').count()
-            pending_count = psychologist_profiles.filter(
-                verification_status__in=['PENDING', 'DOCUMENTS_SUBMITTED', 'VERIFICATION_IN_PROGRESS']
-            ).count()
-            rejected_count = psychologist_profiles.filter(verification_status='REJECTED').count()
-            
-            print(f"[DEBUG] Estados de verificación de psicólogos:")
-            print(f"[DEBUG] - Verificados: {verified_count}")
-            print(f"[DEBUG] - Pendientes: {pending_count}")
-            print(f"[DEBUG] - Rechazados: {rejected_count}")
-            print(f"[DEBUG] - Total: {verified_count + pending_count + rejected_count} (debe coincidir con {len(psychologist_ids)})")
-            
-            # Total de usuarios (suma de clientes y psicólogos con perfil)
-            total_active_users = len(client_ids) + len(psychologist_ids)
-            
-            # Total de clientes
-            client_count = len(client_ids)
-            
-            # Stats para el frontend
-            stats = {
-                'totalUsers': total_active_users,
-                'verifiedUsers': verified_count,
-                'pendingUsers': pending_count, 
-                'rejectedUsers': rejected_count,
-                'clientUsers': client_count  # Añadir conteo de clientes
-            }
-            
-            print(f"[DEBUG] Estadísticas finales: {stats}")
-            
-            return Response(stats)
-            
+            return Response(get_admin_stats())
         except Exception as e:
-            import traceback
-            print(f"[ERROR] Error al obtener estadísticas: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error al obtener estadísticas")
             return Response(
                 {"detail": f"Error al obtener estadísticas: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -199,22 +137,25 @@ class AdminProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete previous image if it exists
-        if profile.profile_image:
-            # Get the old file path
-            old_image_path = profile.profile_image.path
-            
-            # Check if the file exists and is not the default image
-            if os.path.isfile(old_image_path) and not old_image_path.endswith('default-profile.png'):
-                try:
-                    os.remove(old_image_path)
-                except (OSError, FileNotFoundError) as e:
-                    # Log the error but continue with the upload
-                    print(f"Error deleting previous image: {e}")
+        # Orientación y sin EXIF (ubicación GPS) antes de guardar: la imagen es pública
+        try:
+            image = clean_profile_image(request.FILES['profile_image'])
+        except ValueError:
+            return Response(
+                {"detail": "El archivo no es una imagen válida."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # La imagen anterior se libera después de guardar: otro perfil puede usar el mismo archivo
+        previous_files = image_files(profile)
         
         # Save the new image
-        profile.profile_image = request.FILES['profile_image']
+        profile.profile_image = image
+        profile.profile_image_variants = {}
         profile.save()
+        release_files(previous_files)
+        # Miniaturas WebP/JPEG en segundo plano
+        schedule_image_variants(profile)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
@@ -238,21 +179,14 @@ class AdminProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete the image file from storage
-        # Get the file path
-        image_path = profile.profile_image.path
-        
-        # Check if the file exists and is not the default image
-        if os.path.isfile(image_path) and not image_path.endswith('default-profile.png'):
-            try:
-                os.remove(image_path)
-                print(f"Deleted profile image: {image_path}")
-            except (OSError, FileNotFoundError) as e:
-                print(f"Error deleting profile image: {e}")
+        previous_files = image_files(profile)
         
         # Set profile_image to None/null
         profile.profile_image = None
+        profile.profile_image_variants = {}
         profile.save()
+        # Se borran si ya nadie los referencia
+        release_files(previous_files)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
@@ -1,12 +1,16 @@
-import os
+import logging
 from django.conf import settings
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from backend.storage import release_files
 
 from ..models import ClientProfile
 from ..serializers import ClientProfileSerializer, UserBasicSerializer
 from ..permissions import IsProfileOwner, IsAdminUser
+from ..images import clean_profile_image, image_files, schedule_image_variants
+
+logger = logging.getLogger(__name__)
 
 class ClientProfileViewSet(viewsets.ModelViewSet):
     """API endpoint para perfil de cliente"""
@@ -84,22 +88,25 @@ class ClientProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete previous image if it exists
-        if profile.profile_image:
-            # Get the old file path
-            old_image_path = profile.profile_image.path
-            
-            # Check if the file exists and is not the default image
-            if os.path.isfile(old_image_path) and not old_image_path.endswith('default-profile.png'):
-                try:
-                    os.remove(old_image_path)
-                except (OSError, FileNotFoundError) as e:
-                    # Log the error but continue with the upload
-                    print(f"Error deleting previous image: {e}")
+        # Orientación y sin EXIF (ubicación GPS) antes de guardar: la imagen es pública
+        try:
+            image = clean_profile_image(request.FILES['profile_image'])
+        except ValueError:
+            return Response(
+                {"detail": "El archivo no es una imagen válida."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # La imagen anterior se libera después de guardar: otro perfil puede usar el mismo archivo
+        previous_files = image_files(profile)
         
         # Save the new image
-        profile.profile_image = request.FILES['profile_image']
+        profile.profile_image = image
+        profile.profile_image_variants = {}
         profile.save()
+        release_files(previous_files)
+        # Miniaturas WebP/JPEG en segundo plano
+        schedule_image_variants(profile)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
@@ -123,21 +130,14 @@ class ClientProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete the image file from storage
-        # Get the file path
-        image_path = profile.profile_image.path
-        
-        # Check if the file exists and is not the default image
-        if os.path.isfile(image_path) and not image_path.endswith('default-profile.png'):
-            try:
-                os.remove(image_path)
-                print(f"Deleted profile image: {image_path}")
-            except (OSError, FileNotFoundError) as e:
-                print(f"Error deleting profile image: {e}")
+        previous_files = image_files(profile)
         
         # Set profile_image to None/null
         profile.profile_image = None
+        profile.profile_image_variants = {}
         profile.save()
+        # Se borran si ya nadie los referencia
+        release_files(previous_files)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
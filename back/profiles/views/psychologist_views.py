@@ -1,21 +1,34 @@
 import os
-import mimetypes
-from django.http import HttpResponse, Http404
+import logging
+from datetime import datetime, timedelta
+from django.db.models import Case, DateTimeField, F, When
+from django.utils import timezone
+from django.http import Http404
 from django.conf import settings
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny  # Add this import
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
 from backend.email_utils import send_verification_status_email
+from backend.file_delivery import protected_file_response
+from backend.storage import release_files
 
 from ..models import PsychologistProfile, ProfessionalDocument, ProfessionalExperience
 
 from ..serializers import (
     PsychologistProfileSerializer, PsychologistProfileBasicSerializer,
-    ProfessionalDocumentSerializer, UserBasicSerializer, ProfessionalExperienceSerializer
+    ProfessionalDocumentSerializer, PublicProfessionalDocumentSerializer, UserBasicSerializer,
+    ProfessionalExperienceSerializer
 )
 from ..permissions import IsProfileOwner, IsAdminUser
+from ..facets import facet_counts
+from ..filters import public_psychologists, search_term, with_rating
+from ..images import clean_profile_image, image_files, schedule_image_variants
+from ..video import PRESENTATION_VIDEO, schedule_presentation_video, video_payload
+
+logger = logging.getLogger(__name__)
 
 class PublicPsychologistListView(generics.ListAPIView):
     """API endpoint para listar psicólogos públicamente"""
@@ -23,37 +36,59 @@ class PublicPsychologistListView(generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
-        # Solo mostrar psicólogos verificados
-        queryset = PsychologistProfile.objects.filter(verification_status='VERIFIED')
-        
-        # Filtrar por especialidad si se proporciona
-        specialty = self.request.query_params.get('specialty', None)
-        if specialty:
-            queryset = queryset.filter(specialties__contains=[specialty])
-        
-        # Filtrar por población objetivo si se proporciona
-        population = self.request.query_params.get('population', None)
-        if population:
-            queryset = queryset.filter(target_populations__contains=[population])
-        
-        # Filtrar por región si se proporciona
-        region = self.request.query_params.get('region', None)
-        if region:
-            queryset = queryset.filter(region__icontains=region)
-        
-        # Filtrar por ciudad si se proporciona
-        city = self.request.query_params.get('city', None)
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-        
-        # Filtrar por nombre si se proporciona
-        name = self.request.query_params.get('name', None)
-        if name:
-            queryset = queryset.filter(user__first_name__icontains=name) | queryset.filter(user__last_name__icontains=name)
-        
+        params = self.request.query_params
+        now = timezone.now()
+
+        # Disponibilidad precalculada (appointments.AvailabilitySummary); un próximo
+        # horario que ya pasó se trata como desconocido hasta el siguiente recálculo.
+        queryset = public_psychologists(params).annotate(
+            next_available_slot=Case(
+                When(availability_summary__next_free_slot__gte=now,
+                     then=F('availability_summary__next_free_slot')),
+                default=None,
+                output_field=DateTimeField()
+            ),
+            free_hours_this_week=F('availability_summary__free_hours_this_week'),
+        )
+        queryset = with_rating(queryset)  # rating y rating_count para mostrar y ordenar
+
+        # Filtrar por disponibilidad: antes de una fecha o dentro de N días
+        try:
+            available_before = params.get('available_before', None)
+            if available_before:
+                limit = datetime.strptime(available_before, '%Y-%m-%d').date() + timedelta(days=1)
+                queryset = queryset.filter(next_available_slot__lt=limit)
+
+            available_within_days = params.get('available_within_days', None)
+            if available_within_days:
+                queryset = queryset.filter(
+                    next_available_slot__lt=now + timedelta(days=int(available_within_days))
+                )
+        except ValueError:
+            raise ValidationError({"detail": "Parámetros de disponibilidad inválidos."})
+
+        # Ordenar por el próximo horario libre; sin disponibilidad al final
+        ordering = params.get('ordering', None)
+        if ordering == 'availability':
+            queryset = queryset.order_by(F('next_available_slot').asc(nulls_last=True), 'id')
+        # Mejor calificados primero; sin valoraciones al final
+        elif ordering == 'rating':
+            queryset = queryset.order_by(F('rating').desc(nulls_last=True), '-rating_count', 'id')
+        # Con búsqueda y sin otro orden, los más relevantes primero
+        elif search_term(params):
+            queryset = queryset.order_by('-search_rank', 'id')
+
         return queryset
 
 
+class PublicPsychologistFacetsView(generics.GenericAPIView):
+    """Conteos por especialidad, población, región y género para los filtros actuales del directorio"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        return Response(facet_counts(request.query_params))
+
+
 class PsychologistDetailView(generics.RetrieveAPIView):
     """API endpoint para ver detalles de un psicólogo públicamente"""
     serializer_class = PsychologistProfileSerializer
@@ -66,13 +101,15 @@ class PsychologistDetailView(generics.RetrieveAPIView):
         """
         pk = self.kwargs.get('pk')
         
+        queryset = with_rating(self.get_queryset())
+
         # First try to find by profile ID
         try:
-            return PsychologistProfile.objects.get(id=pk, verification_status='VERIFIED')
+            return queryset.get(id=pk)
         except PsychologistProfile.DoesNotExist:
             # If not found, try to find by user ID
             try:
-                return PsychologistProfile.objects.get(user_id=pk, verification_status='VERIFIED')
+                return queryset.get(user_id=pk)
             except PsychologistProfile.DoesNotExist:
                 raise Http404("No se encontró el perfil del psicólogo")
     
@@ -84,7 +121,7 @@ class PsychologistDetailView(generics.RetrieveAPIView):
         # Get the presentation video document if it exists
         presentation_video = ProfessionalDocument.objects.filter(
             psychologist=instance,
-            document_type='presentation_video',
+            document_type=PRESENTATION_VIDEO,
             verification_status__in=['verified', 'approved']
         ).first()
         
@@ -93,16 +130,18 @@ class PsychologistDetailView(generics.RetrieveAPIView):
             psychologist=instance,
             verification_status__in=['verified', 'approved']
         )
-        document_serializer = ProfessionalDocumentSerializer(documents, many=True)
+        # Vista pública: los documentos van sin archivo; solo el video se firma
+        document_serializer = PublicProfessionalDocumentSerializer(documents, many=True)
         data['verification_documents'] = document_serializer.data
         
-        # Add presentation video URL specifically
-        if presentation_video:
-            data['presentation_video_url'] = presentation_video.file.url if presentation_video.file else None
-            print(f"Found presentation video: {data['presentation_video_url']}")
+        # Add presentation video URL specifically (firmada, ver backend/signed_urls.py)
+        if presentation_video and presentation_video.file:
+            # Portada y metadatos para cargar el video solo al reproducirlo
+            data['presentation_video'] = video_payload(request, presentation_video)
+            data['presentation_video_url'] = data['presentation_video']['url']
         else:
+            data['presentation_video'] = None
             data['presentation_video_url'] = None
-            print("No presentation video found for psychologist", instance.id)
             
         return Response(data)
 
@@ -140,51 +179,39 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             )
             
         try:
-            # Información de depuración
-            print(f"[DEBUG] Request: {request.method} {request.path}")
-            print(f"[DEBUG] Query params: {request.query_params}")
-            
             # Obtener todos los perfiles de psicólogos con datos de usuario relacionados
             # Usamos una lista en lugar de queryset para evitar problemas con la evaluación tardía
             profiles = list(PsychologistProfile.objects.filter(
                 user__user_type='psychologist'
             ).select_related('user').order_by('-created_at'))
             
-            print(f"[DEBUG] Perfiles encontrados inicialmente: {len(profiles)}")
-            
             # Filtrar por estado de verificación si se proporciona
             verification_status = request.query_params.get('verification_status', None)
             if verification_status:
-                print(f"[DEBUG] Filtrando por estado: {verification_status}")
                 # Obtener los valores válidos del modelo
                 valid_statuses = [choice[0] for choice in PsychologistProfile._meta.get_field('verification_status').choices]
-                print(f"[DEBUG] Estados válidos: {valid_statuses}")
                 
                 # Filtrar solo si el estado es válido
                 if verification_status in valid_statuses:
                     profiles = [p for p in profiles if p.verification_status == verification_status]
-                    print(f"[DEBUG] Perfiles después de filtrar por {verification_status}: {len(profiles)}")
                 else:
-                    print(f"[DEBUG] Estado de verificación no válido: {verification_status}")
+                    logger.debug("admin_list: estado de verificación no válido %s", verification_status)
             
             # Limitar resultados si se solicita
             limit_param = request.query_params.get('limit', None)
             if limit_param:
                 try:
                     limit = int(limit_param)
-                    print(f"[DEBUG] Limitando a {limit} perfiles")
                     profiles = profiles[:limit]
                 except ValueError:
-                    print(f"[DEBUG] Parámetro limit no válido: {limit_param}")
+                    logger.debug("admin_list: parámetro limit no válido %s", limit_param)
             
             # Serializar la lista de perfiles
             serializer = self.get_serializer(profiles, many=True)
             return Response(serializer.data)
             
         except Exception as e:
-            import traceback
-            print(f"[ERROR] Error en admin_list: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error en admin_list")
             return Response(
                 {"detail": f"Error al obtener listado de psicólogos: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -218,7 +245,7 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
         
         # Get the verification documents
         documents = ProfessionalDocument.objects.filter(psychologist=profile)
-        document_serializer = ProfessionalDocumentSerializer(documents, many=True)
+        document_serializer = ProfessionalDocumentSerializer(documents, many=True, context={'request': request})
         
         # Return both profile and documents data
         response_data = profile_serializer.data
@@ -280,9 +307,8 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
         if previous_status != new_status:
             try:
                 send_verification_status_email(profile)
-                print(f"Correo de actualización de estado enviado a {profile.user.email}")
-            except Exception as e:
-                print(f"Error al enviar correo de actualización de estado: {str(e)}")
+            except Exception:
+                logger.exception("Error al enviar correo de actualización de estado al psicólogo %s", profile.id)
         
         # Devolver el perfil actualizado
         serializer = self.get_serializer(profile)
@@ -300,7 +326,7 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             
         profile = self.get_object()
         documents = ProfessionalDocument.objects.filter(psychologist=profile)
-        serializer = ProfessionalDocumentSerializer(documents, many=True)
+        serializer = ProfessionalDocumentSerializer(documents, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -348,10 +374,6 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
         user_data = {}
         profile_data = request.data.copy()
         
-        # Log para depuración - Ver todos los datos recibidos
-        print("DEBUG - Datos recibidos para actualizar:", profile_data)
-        print("DEBUG - Valor de gender recibido:", profile_data.get('gender', 'No hay valor de gender en la solicitud'))
-        
         # Remove profile_image from regular update if it's present but not a file
         if 'profile_image' in profile_data and not hasattr(profile_data['profile_image'], 'read'):
             profile_data.pop('profile_image')
@@ -361,9 +383,7 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             if field in profile_data:
                 user_data[field] = profile_data.pop(field)
         
-        # Log the data being processed
-        print("User data to update:", user_data)
-        print("Profile data to update:", profile_data)
+        logger.debug("Actualización de perfil %s: usuario %s, perfil %s", profile.id, user_data, profile_data)
         
         # Update user if needed
         if user_data:
@@ -373,23 +393,15 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             else:
                 return Response(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        # Asegurarse de que el campo gender se procese correctamente
-        if 'gender' in profile_data:
-            print("DEBUG - Procesando campo gender:", profile_data['gender'])
-            
         # Update profile
         serializer = self.get_serializer(profile, data=profile_data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            print("DEBUG - Perfil actualizado correctamente con gender:", profile.gender)
-            
             # Return the complete updated profile
             updated_serializer = self.get_serializer(profile)
             return Response(updated_serializer.data)
         else:
-            print("DEBUG - Errores al validar el perfil:", serializer.errors)
-            if 'gender' in serializer.errors:
-                print("DEBUG - Error específico en gender:", serializer.errors['gender'])
+            logger.debug("Errores al validar el perfil %s: %s", profile.id, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['post'])
@@ -410,22 +422,25 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete previous image if it exists
-        if profile.profile_image:
-            # Get the old file path
-            old_image_path = profile.profile_image.path
-            
-            # Check if the file exists and is not the default image
-            if os.path.isfile(old_image_path) and not old_image_path.endswith('default-profile.png'):
-                try:
-                    os.remove(old_image_path)
-                except (OSError, FileNotFoundError) as e:
-                    # Log the error but continue with the upload
-                    print(f"Error deleting previous image: {e}")
+        # Orientación y sin EXIF (ubicación GPS) antes de guardar: la imagen es pública
+        try:
+            image = clean_profile_image(request.FILES['profile_image'])
+        except ValueError:
+            return Response(
+                {"detail": "El archivo no es una imagen válida."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # La imagen anterior se libera después de guardar: otro perfil puede usar el mismo archivo
+        previous_files = image_files(profile)
         
         # Save the new image
-        profile.profile_image = request.FILES['profile_image']
+        profile.profile_image = image
+        profile.profile_image_variants = {}
         profile.save()
+        release_files(previous_files)
+        # Miniaturas WebP/JPEG en segundo plano
+        schedule_image_variants(profile)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
@@ -449,21 +464,14 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete the image file from storage
-        # Get the file path
-        image_path = profile.profile_image.path
-        
-        # Check if the file exists and is not the default image
-        if os.path.isfile(image_path) and not image_path.endswith('default-profile.png'):
-            try:
-                os.remove(image_path)
-                print(f"Deleted profile image: {image_path}")
-            except (OSError, FileNotFoundError) as e:
-                print(f"Error deleting profile image: {e}")
+        previous_files = image_files(profile)
         
         # Set profile_image to None/null
         profile.profile_image = None
+        profile.profile_image_variants = {}
         profile.save()
+        # Se borran si ya nadie los referencia
+        release_files(previous_files)
         
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
@@ -480,7 +488,7 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             
         profile = PsychologistProfile.objects.get(user=user)
         documents = ProfessionalDocument.objects.filter(psychologist=profile)
-        serializer = ProfessionalDocumentSerializer(documents, many=True)
+        serializer = ProfessionalDocumentSerializer(documents, many=True, context={'request': request})
         return Response(serializer.data)
     
     # Alias for verification_documents
@@ -523,19 +531,8 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
                 document_type=document_type
             )
             
-            # Delete the old file from storage before updating
-            if document.file:
-                # Get the old file path
-                old_file_path = document.file.path
-                
-                # Check if the file exists
-                if os.path.isfile(old_file_path):
-                    try:
-                        os.remove(old_file_path)
-                        print(f"Deleted old document file: {old_file_path}")
-                    except (OSError, FileNotFoundError) as e:
-                        # Log the error but continue with the upload
-                        print(f"Error deleting previous document file: {e}")
+            # El archivo anterior se libera después de guardar (puede estar compartido)
+            previous_file = document.file.name
             
             # Update existing document
             document.file = request.FILES['file']
@@ -544,6 +541,8 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             document.is_verified = False
             document.rejection_reason = None
             document.save()
+            release_files([previous_file])
+            schedule_presentation_video(document)
             
             serializer = ProfessionalDocumentSerializer(document)
             return Response(serializer.data)
@@ -558,6 +557,7 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
                 verification_status='pending'
             )
             document.save()
+            schedule_presentation_video(document)
             
             # Update psychologist verification status if needed
             if profile.verification_status == 'PENDING':
@@ -567,6 +567,23 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
             serializer = ProfessionalDocumentSerializer(document)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
+    def get_presentation_video(self, request, pk=None):
+        """Video de presentación aprobado de un psicólogo verificado (por ID de perfil o de usuario)"""
+        # Igual que get_object: primero por ID de perfil y, si no existe, por ID de usuario
+        psychologist_id = PsychologistProfile.objects.filter(id=pk).values_list('id', flat=True).first()
+        if psychologist_id is None:
+            psychologist_id = PsychologistProfile.objects.filter(user_id=pk).values_list('id', flat=True).first()
+        video = ProfessionalDocument.objects.filter(
+            psychologist_id=psychologist_id,
+            psychologist__verification_status='VERIFIED',
+            document_type=PRESENTATION_VIDEO,
+            verification_status__in=['verified', 'approved']
+        ).exclude(file='').first() if psychologist_id is not None else None
+        if video is None:
+            raise Http404("El psicólogo no tiene video de presentación")
+        return Response(video_payload(request, video))
+    
     # Alias for upload_verification_document
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_verification_document(self, request):
@@ -660,22 +677,8 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
             
-        # Determine content type based on file extension
-        content_type, encoding = mimetypes.guess_type(file_path)
-        if not content_type:
-            content_type = 'application/octet-stream'
-            
-        # Get the original filename
-        filename = os.path.basename(file_path)
-        
-        # Open the file
-        with open(file_path, 'rb') as file:
-            response = HttpResponse(file.read(), content_type=content_type)
-            
-        # Set content disposition to force download
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        # Forzar la descarga sin cargar el archivo en memoria
+        return protected_file_response(request, file_path)
     
     @action(detail=True, methods=['patch'], url_path='documents/(?P<document_id>[^/.]+)/verify')
     def verify_document(self, request, pk=None, document_id=None):
@@ -774,9 +777,6 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
         valid_statuses_tuples = ProfessionalDocument._meta.get_field('verification_status').choices
         valid_statuses = [status_value for status_value, _ in valid_statuses_tuples]
         
-        print(f"Estado solicitado: {new_status}")
-        print(f"Estados válidos para documentos: {valid_statuses}")
-        
         # Convertir 'VERIFIED' a 'approved' para manejar la inconsistencia
         if new_status == 'VERIFIED':
             new_status = 'approved'
@@ -980,9 +980,8 @@ class PsychologistProfileViewSet(viewsets.ModelViewSet):
         if previous_status != new_status:
             try:
                 send_verification_status_email(profile)
-                print(f"Correo de actualización de estado enviado a {profile.user.email}")
-            except Exception as e:
-                print(f"Error al enviar correo de actualización de estado: {str(e)}")
+            except Exception:
+                logger.exception("Error al enviar correo de actualización de estado al psicólogo %s", profile.id)
         
         # Devolver el perfil actualizado
         serializer = self.get_serializer(profile)
@@ -1,6 +1,5 @@
 import { FC, useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
-import axios from 'axios';
 
 // Usar la misma lógica que en api.ts para la URL base
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'https://www.emindapp.cl/api';
@@ -9,79 +8,29 @@ const BASE_URL = API_BASE_URL.replace(/\/api\/?$/, '');
 
 interface PresentationVideoProps {
   videoUrl: string;
+  posterUrl?: string | null;
 }
 
-const PresentationVideo: FC<PresentationVideoProps> = ({ videoUrl }) => {
-  const [isLoading, setIsLoading] = useState(true);
+const PresentationVideo: FC<PresentationVideoProps> = ({ videoUrl, posterUrl }) => {
+  const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [videoBlob, setVideoBlob] = useState<string | null>(null);
   const [isPlaying, setIsPlaying] = useState(false);
   const videoRef = useRef<HTMLVideoElement>(null);
 
-  useEffect(() => {
-    if (!videoUrl) {
-      console.log('PresentationVideo: No videoUrl provided');
-      setIsLoading(false);
-      return;
-    }
+  // Si la URL es una ruta relativa, anteponer la URL base
+  const videoSrc = videoUrl && videoUrl.startsWith('/') ? `${BASE_URL}${videoUrl}` : videoUrl;
 
-    // Process the URL to ensure it's a full URL
-    let processedUrl = videoUrl;
-    
-    // Si la URL es una ruta relativa, anteponer la URL base
-    if (videoUrl.startsWith('/media/')) {
-      processedUrl = `${BASE_URL}${videoUrl}`;
-    }
-    
-    console.log('PresentationVideo: Processing video URL:', videoUrl);
-    console.log('PresentationVideo: Full processed URL:', processedUrl);
-    
-    // Fetch the video as a blob to avoid CORS issues
-    const fetchVideo = async () => {
-      try {
-        setIsLoading(true);
-        setError(null);
-        
-        console.log('PresentationVideo: Fetching video from:', processedUrl);
-        
-        const response = await axios.get(processedUrl, {
-          responseType: 'blob',
-          headers: {
-            'Accept': 'video/*'
-          }
-        });
-        
-        // Create a blob URL from the response
-        const blob = new Blob([response.data], { 
-          type: response.headers['content-type'] || 'video/mp4' 
-        });
-        const blobUrl = URL.createObjectURL(blob);
-        
-        console.log('PresentationVideo: Created blob URL:', blobUrl);
-        console.log('PresentationVideo: Content type:', response.headers['content-type']);
-        console.log('PresentationVideo: Blob size:', response.data.size);
-        
-        setVideoBlob(blobUrl);
-        setIsLoading(false);
-      } catch (err) {
-        console.error('PresentationVideo: Error fetching video:', err);
-        setError('No se pudo cargar el video');
-        setIsLoading(false);
-      }
-    };
-    
-    fetchVideo();
-    
-    // Cleanup function to revoke blob URL when component unmounts
-    return () => {
-      if (videoBlob) {
-        URL.revokeObjectURL(videoBlob);
-      }
-    };
+  useEffect(() => {
+    // Nuevo video: volver a mostrar la portada
+    setIsPlaying(false);
+    setIsLoading(false);
+    setError(null);
   }, [videoUrl]);
 
   const handlePlayClick = () => {
+    // El navegador pide el video por partes (Range) recién al reproducir
     setIsPlaying(true);
+    setIsLoading(true);
     if (videoRef.current) {
       videoRef.current.play().catch(err => {
         console.error('Error playing video:', err);
@@ -134,17 +83,16 @@ const PresentationVideo: FC<PresentationVideoProps> = ({ videoUrl }) => {
           animate={{ opacity: 1 }}
           transition={{ delay: 0.6 }}
         >
-          {videoBlob && (
+          {videoSrc && (
             <video 
               ref={videoRef}
-              src={videoBlob}
+              src={videoSrc}
+              poster={posterUrl || undefined}
+              preload="none"
               className="w-full h-full object-cover"
               controls={isPlaying}
               controlsList="nodownload"
-              onLoadedData={() => {
-                console.log('PresentationVideo: Video loaded successfully');
-                setIsLoading(false);
-              }}
+              onPlaying={() => setIsLoading(false)}
               onError={(e) => {
                 console.error('PresentationVideo: Video error event:', e);
                 setError('Error al reproducir el video');
@@ -157,7 +105,7 @@ const PresentationVideo: FC<PresentationVideoProps> = ({ videoUrl }) => {
           )}
           
           {/* Blur overlay with play button */}
-          {!isPlaying && !isLoading && !error && videoBlob && (
+          {!isPlaying && !error && videoSrc && (
             <motion.div 
               className="absolute inset-0 backdrop-blur-sm bg-gradient-to-b from-black/40 to-black/60 flex flex-col items-center justify-center cursor-pointer"
               onClick={handlePlayClick}
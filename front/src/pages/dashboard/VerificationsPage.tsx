@@ -5,6 +5,7 @@ import AppointmentFilters, { FilterValues } from '../../components/appointments/
 import AppointmentList from '../../components/appointments/AppointmentList';
 import { 
   AppointmentData, 
+  exportAdminPaymentVerifications,
   getAdminPaymentVerifications,
   getPsychologistPendingPayments,
   updateAppointmentPaymentStatus,
@@ -19,6 +20,10 @@ const VerificationsPage = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<Error | null>(null);
   const [filters, setFilters] = useState<FilterValues>({});
+  // Cursor de la siguiente página de verificaciones (solo admin)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [isExporting, setIsExporting] = useState(false);
 
   useEffect(() => {
     fetchAppointments();
@@ -31,18 +36,17 @@ const VerificationsPage = () => {
     try {
       if (user?.user_type === 'admin') {
         try {
-          // Para administradores, usar el endpoint de administración
+          // Para administradores, usar el endpoint de administración (solo la primera página)
           // NO APLICAR FILTRO DE ESTADO POR DEFECTO AQUÍ
-          const data = await getAdminPaymentVerifications({
+          const page = await getAdminPaymentVerifications({
             ...filters
             // status ya no se fuerza aquí, se pasa si está en 'filters'
           });
 
-          // Manejar diferentes formatos de respuesta
-          const appointmentsData = Array.isArray(data) ? data : (data as any).results || [];
-          setAppointments(appointmentsData);
+          setAppointments(page.results);
+          setNextCursor(page.nextCursor);
 
-          console.log('Citas cargadas para admin:', appointmentsData.length);
+          console.log('Citas cargadas para admin:', page.results.length);
         } catch (adminError: any) {
           console.error('Error específico de admin:', adminError);
 
@@ -95,6 +99,33 @@ const VerificationsPage = () => {
     }
   };
 
+  // Agrega la página siguiente a la lista ya cargada
+  const loadMoreAppointments = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await getAdminPaymentVerifications({ ...filters }, nextCursor);
+      setAppointments(prevAppointments => [...prevAppointments, ...page.results]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error al cargar más citas:', err);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  // El historial completo se descarga como CSV en vez de paginarlo en pantalla
+  const handleExport = async () => {
+    setIsExporting(true);
+    try {
+      await exportAdminPaymentVerifications({ ...filters });
+    } catch (err) {
+      console.error('Error al exportar las citas:', err);
+    } finally {
+      setIsExporting(false);
+    }
+  };
+
   const handleFilterChange = (newFilters: FilterValues) => {
     setFilters(newFilters);
   };
@@ -187,12 +218,23 @@ const VerificationsPage = () => {
             </p>
           )}
         </div>
-        <button
-          onClick={fetchAppointments}
-          className="inline-flex items-center px-3 py-2 border border-transparent text-sm leading-4 font-medium rounded-md shadow-sm text-white bg-[#2A6877] hover:bg-[#2A6877]/90 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-[#2A6877]"
-        >
-          Actualizar
-        </button>
+        <div className="flex gap-2">
+          {user?.user_type === 'admin' && (
+            <button
+              onClick={handleExport}
+              disabled={isExporting}
+              className="inline-flex items-center px-3 py-2 border border-[#2A6877] text-sm leading-4 font-medium rounded-md shadow-sm text-[#2A6877] bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-[#2A6877] disabled:opacity-50"
+            >
+              {isExporting ? 'Exportando...' : 'Exportar CSV'}
+            </button>
+          )}
+          <button
+            onClick={fetchAppointments}
+            className="inline-flex items-center px-3 py-2 border border-transparent text-sm leading-4 font-medium rounded-md shadow-sm text-white bg-[#2A6877] hover:bg-[#2A6877]/90 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-[#2A6877]"
+          >
+            Actualizar
+          </button>
+        </div>
       </div>
       
       <div className="space-y-6">
@@ -202,6 +244,7 @@ const VerificationsPage = () => {
           <div className="bg-blue-50 p-3 rounded-md border border-blue-200">
             <p className="text-sm text-blue-800">
               Mostrando {appointments.length} citas de verificación de pagos para todos los psicólogos
+              {nextCursor && ' (hay más: use "Cargar más" o "Exportar CSV")'}
             </p>
           </div>
         )}
@@ -213,6 +256,18 @@ const VerificationsPage = () => {
           onVerifyPayment={handleVerifyPayment}
           onConfirmAppointment={handleConfirmAppointment}
         />
+
+        {user?.user_type === 'admin' && nextCursor && !isLoading && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadMoreAppointments}
+              disabled={isLoadingMore}
+              className="inline-flex items-center px-4 py-2 border border-[#2A6877] text-sm font-medium rounded-md text-[#2A6877] bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-[#2A6877] disabled:opacity-50"
+            >
+              {isLoadingMore ? 'Cargando...' : 'Cargar más'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -36,6 +36,15 @@ interface Experience {
   description: string;
 }
 
+interface PresentationVideoData {
+  url: string;
+  poster_url: string | null;
+  file_size: number | null;
+  duration_seconds: number | null;
+  width: number | null;
+  height: number | null;
+}
+
 interface Specialist {
   id: number;
   user: User;
@@ -51,6 +60,7 @@ interface Specialist {
   verification_status: string;
   verification_documents?: Document[];
   presentation_video_url?: string;
+  presentation_video?: PresentationVideoData | null;
   rut: string;
   phone: string;
   city: string;
@@ -73,6 +83,7 @@ const SpecialistProfilePage = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [presentationVideoUrl, setPresentationVideoUrl] = useState('');
+  const [presentationPosterUrl, setPresentationPosterUrl] = useState<string | null>(null);
   const [experiences, setExperiences] = useState<Experience[]>([]);
   
   useEffect(() => {
@@ -102,6 +113,7 @@ const SpecialistProfilePage = () => {
         if (specialistData.presentation_video_url) {
           console.log('Found presentation video URL directly:', specialistData.presentation_video_url);
           setPresentationVideoUrl(specialistData.presentation_video_url);
+          setPresentationPosterUrl(specialistData.presentation_video?.poster_url || null);
         } else if (specialistData.verification_documents) {
           // Try to find presentation video in verification documents
           console.log('All verification documents:', specialistData.verification_documents);
@@ -327,7 +339,7 @@ const SpecialistProfilePage = () => {
                 className="lg:col-span-2 space-y-6"
                 variants={itemVariants}
               >
-                <PresentationVideo videoUrl={presentationVideoUrl} />
+                <PresentationVideo videoUrl={presentationVideoUrl} posterUrl={presentationPosterUrl} />
                 <ProfessionalExperience experiences={experiences} />
                 <ReviewsList psychologistId={specialist.id} />
               </motion.div>
@@ -1,11 +1,19 @@
 import api from './api';
 
+export interface WeeklySignups {
+  week: string; // lunes de la semana (YYYY-MM-DD)
+  total: number;
+  clients: number;
+  psychologists: number;
+}
+
 export interface AdminStats {
   totalUsers: number;
   verifiedUsers: number;
   pendingUsers: number;
   rejectedUsers: number;
   clientUsers: number;
+  signupsByWeek?: WeeklySignups[];
 }
 
 export interface PendingPsychologist {
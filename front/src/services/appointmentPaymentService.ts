@@ -635,14 +635,26 @@ export const updateAppointmentPaymentStatus = async (
 };
 
 // Servicios para administradores
+export interface AdminPaymentVerificationParams {
+  psychologist_id?: number,
+  start_date?: string,
+  end_date?: string,
+  status?: string // Permitir que 'status' sea opcional
+}
+
+// Página de citas del endpoint paginado por cursor; nextCursor es null en la última
+export interface AppointmentPage {
+  results: AppointmentData[];
+  nextCursor: string | null;
+}
+
+// Citas por página: el historial completo se obtiene con exportAdminPaymentVerifications
+const ADMIN_VERIFICATIONS_PAGE_SIZE = 50;
+
 export const getAdminPaymentVerifications = async (
-  params?: { 
-    psychologist_id?: number, 
-    start_date?: string, 
-    end_date?: string,
-    status?: string // Permitir que 'status' sea opcional
-  }
-) => {
+  params?: AdminPaymentVerificationParams,
+  cursor?: string | null
+): Promise<AppointmentPage> => {
   try {
     const adjustedParams = { ...params };
     
@@ -680,20 +692,24 @@ export const getAdminPaymentVerifications = async (
     for (const route of routesToTry) {
       try {
         console.log(`Intentando con ruta: ${route}`);
+        // El endpoint pagina por cursor: se pide una sola página y el cursor de la siguiente
         // Pasar adjustedParams directamente, incluyendo 'status' si vino
-        const response = await api.get<AppointmentData[]>(route, { 
-          params: adjustedParams
+        const response = await api.get<{ next: string | null, results: AppointmentData[] }>(route, {
+          params: { ...adjustedParams, page_size: ADMIN_VERIFICATIONS_PAGE_SIZE, ...(cursor ? { cursor } : {}) }
         });
         console.log(`Éxito con ruta: ${route}`);
         
         // Procesar las fechas para asegurar que se muestran correctamente
-        const processedData = response.data.map(appointment => ({
+        const processedData = response.data.results.map(appointment => ({
           ...appointment,
           // Asegurarse de que la fecha se mantiene igual
           date: appointment.date
         }));
         
-        return processedData;
+        return {
+          results: processedData,
+          nextCursor: response.data.next ? new URL(response.data.next).searchParams.get('cursor') : null
+        };
       } catch (error: any) {
         console.error(`Error con ruta ${route}:`, error.response?.status || error.message);
         errorToThrow = error;
@@ -734,7 +750,7 @@ export const getAdminPaymentVerifications = async (
 
 
       console.log('Citas recuperadas y filtradas manualmente (fallback)', filteredData.length);
-      return filteredData;
+      return { results: filteredData, nextCursor: null };
     } catch (fallbackError) {
       console.error('Fallback también falló:', fallbackError);
       // Si el fallback también falla, lanzar el error original
@@ -750,6 +766,32 @@ export const getAdminPaymentVerifications = async (
   }
 };
 
+// Descarga todas las citas filtradas (?export=csv) sin paginar en el navegador
+export const exportAdminPaymentVerifications = async (
+  params?: AdminPaymentVerificationParams
+) => {
+  try {
+    const response = await api.get<Blob>('/appointments/admin-payment-verification/', {
+      params: { ...params, export: 'csv' },
+      responseType: 'blob'
+    });
+    const url = window.URL.createObjectURL(response.data);
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = 'verificaciones_de_pago.csv';
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    window.URL.revokeObjectURL(url);
+  } catch (error) {
+    console.error('Error al exportar las verificaciones de pago:', error);
+    toast.error('Error al exportar las citas', {
+      id: 'unique-notification'
+    });
+    throw error;
+  }
+};
+
 // Servicios para psicólogos
 export const getPsychologistPendingPayments = async (
   params?: { 